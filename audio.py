@@ -0,0 +1,101 @@
+"""
+Sound effects, loaded off the UI thread.
+
+Nothing audio related happens at import time. AudioSystem.start() (called once
+the menu is on screen) imports pygame, opens the mixer and decodes every effect
+on a background thread, so startup never waits for the audio stack. Until that
+finishes, or if pygame or an audio device is missing, play() does nothing.
+
+Each effect is decoded once and kept. Playback goes through a small pool of
+mixer channels: play() takes an idle channel or, when all are busy (rapid
+pickups), cuts off the one used longest ago, so it never waits on the mixer.
+"""
+import os
+import threading
+import time
+
+SOUND_DIR = os.path.dirname(os.path.abspath(__file__))
+SOUNDS = {"munch": "munch-sound-effect.mp3"}
+CHANNELS = 4
+
+
+class AudioSystem:
+    """Loads the game's sound effects in the background and plays them on a channel pool."""
+    def __init__(self, sounds=SOUNDS, directory=SOUND_DIR, channels=CHANNELS):
+        self.files = {name: os.path.join(directory, filename) for name, filename in sounds.items()}
+        self.channel_count = channels
+        self.sounds = {}
+        self.channels = []
+        self.next_channel = 0
+        self.ready = threading.Event()
+        self.thread = None
+        self.available = False
+        self.error = None
+        # How long the background load took, for the benchmarks
+        self.load_ms = None
+        self.plays = 0
+        self.steals = 0
+
+    def start(self):
+        """Starts loading on a background thread. Safe to call more than once."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._load, name="audio-loader", daemon=True)
+            self.thread.start()
+
+    def wait(self, timeout=None):
+        """Blocks until loading finished (or failed). Returns True if sound is available."""
+        self.ready.wait(timeout)
+        return self.available
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            import pygame
+            pygame.mixer.init()
+            pygame.mixer.set_num_channels(self.channel_count)
+            for name, path in self.files.items():
+                if os.path.exists(path):
+                    self.sounds[name] = pygame.mixer.Sound(path)
+            self.channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+            self.available = bool(self.sounds)
+        except Exception as error:
+            # No pygame, no audio device or an unreadable file: play silently
+            self.error = error
+        finally:
+            self.load_ms = (time.perf_counter() - start) * 1000.0
+            self.ready.set()
+
+    def play(self, name="munch"):
+        """Plays an effect if audio is loaded; never blocks."""
+        if not self.available:
+            return
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+        count = len(self.channels)
+        channel = None
+        for offset in range(count):
+            candidate = self.channels[(self.next_channel + offset) % count]
+            if not candidate.get_busy():
+                channel = candidate
+                break
+        if channel is None:
+            # Every channel is busy: restart the one after the last used
+            channel = self.channels[self.next_channel % count]
+            self.steals += 1
+        self.next_channel = (self.channels.index(channel) + 1) % count
+        try:
+            channel.play(sound)
+            self.plays += 1
+        except Exception:
+            pass
+
+    def close(self):
+        """Shuts the mixer down if it was opened."""
+        if self.ready.is_set() and self.channels:
+            try:
+                import pygame
+                pygame.mixer.quit()
+            except Exception:
+                pass
+            self.available = False
@@ -0,0 +1,213 @@
+"""
+Autopilot: lets the snake play itself.
+
+Each step the planner follows a shortest path (breadth-first search) to the
+food. Moves come from a neighbour table built once per kind of arena, so
+Classic wrap-around and the board edges are resolved ahead of time rather than
+per search; a layout change only refills the table of blocked cells. Body cells
+count as free from the step the tail will have left them. A path is only
+taken if the snake could still reach its own tail after eating; otherwise it
+follows its tail until a safe path opens up.
+
+A planned path stays valid until the food moves or the layout changes (the
+body only ever vacates cells along it), so most steps just pop the next move.
+"""
+import time
+from collections import deque
+from simulation import UP, DOWN, LEFT, RIGHT
+
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+# Release step of an obstacle cell: never free
+BLOCKED = 1 << 30
+
+
+class Autopilot:
+    """Chooses the next direction for a Simulation's snake."""
+    def __init__(self, sim):
+        self.sim = sim
+        self.board = None
+        self.layout = None
+        self.cells = []
+        self.index = {}
+        self.neighbors = []
+        self.moves = []
+        self.blocked = []
+        self.release = []
+        self.path = deque()
+        self.target = None
+        self.expected_head = None
+        self.plans = 0
+        self.last_plan_ms = 0.0
+        self.max_plan_ms = 0.0
+
+    def reset(self):
+        """Forgets the cached path (e.g. at the start of a game)."""
+        self.path.clear()
+        self.target = None
+        self.expected_head = None
+
+    def _build_tables(self, arena):
+        """
+        Indexes every cell of the board and the cell each direction leads to.
+        Moves into obstacles are kept (they are masked by the blocked table),
+        so the tables only depend on the kind of arena and its size.
+        """
+        limit = arena.limit
+        self.cells = [(x, y) for x in range(-limit, limit + 1) for y in range(-limit, limit + 1)]
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+        self.neighbors = []
+        self.moves = []
+        for x, y in self.cells:
+            targets = []
+            directions = []
+            for direction in DIRECTIONS:
+                cell, cause = arena.check_collision((x + direction[0], y + direction[1]))
+                if (cause is None or cell in arena.obstacles) and cell in self.index:
+                    targets.append(self.index[cell])
+                    directions.append(direction)
+            self.neighbors.append(tuple(targets))
+            self.moves.append(tuple(directions))
+
+    def _load_layout(self, arena):
+        """Marks the current obstacles as blocked."""
+        self.blocked = [0] * len(self.cells)
+        for cell in arena.obstacles:
+            position = self.index.get(cell)
+            if position is not None:
+                self.blocked[position] = BLOCKED
+        self.release = list(self.blocked)
+        self.reset()
+
+    def sync(self):
+        """Rebuilds the tables if the arena changed. Cheap when it did not."""
+        arena = self.sim.arena
+        board = (type(arena), arena.limit)
+        if board != self.board:
+            self.board = board
+            self.layout = None
+            self._build_tables(arena)
+        layout = (arena, arena.version)
+        if layout != self.layout:
+            self.layout = layout
+            self._load_layout(arena)
+
+    def next_action(self):
+        """The direction for the coming step (None keeps the current one)."""
+        start = time.perf_counter()
+        sim = self.sim
+        self.sync()
+        head = sim.body.head
+        if not (self.path and self.target == sim.food and head == self.expected_head):
+            self._plan()
+        if self.path:
+            direction, self.expected_head = self.path.popleft()
+        else:
+            direction = self._survive()
+            self.expected_head = None
+
+        self.last_plan_ms = (time.perf_counter() - start) * 1000.0
+        self.max_plan_ms = max(self.max_plan_ms, self.last_plan_ms)
+        return direction
+
+    def _plan(self):
+        """Caches a safe shortest path to the food in self.path, or leaves it empty."""
+        self.plans += 1
+        self.path.clear()
+        self.target = self.sim.food
+        cells = list(self.sim.body.cells)
+        if self.target is None or self.target not in self.index:
+            return
+        path = self._search(cells, self.index[self.target])
+        if path is None:
+            return
+        # Where the body will be once the food is eaten (one cell longer)
+        after = [self.cells[i] for i in reversed(path)] + cells
+        after = after[:len(cells) + 1]
+        if len(after) > 2 and self._search(after, self.index[after[-1]]) is None:
+            return
+        self.path.extend((self._direction(a, b), self.cells[b]) for a, b in zip([self.index[cells[0]]] + path, path))
+
+    def _survive(self):
+        """Follows the tail; failing that, takes any move that does not die at once."""
+        cells = list(self.sim.body.cells)
+        tail = self.index.get(cells[-1])
+        if tail is not None:
+            path = self._search(cells, tail)
+            if path:
+                return self._direction(self.index[cells[0]], path[0])
+        release = self._mark_body(cells)
+        head = self.index.get(cells[0])
+        options = []
+        if head is not None:
+            options = [direction for direction, i in zip(self.moves[head], self.neighbors[head])
+                       if release[i] <= 1]
+        self._clear_body(cells)
+        current = self.sim.body.direction
+        if current in options or not options:
+            return None
+        return options[0]
+
+    def _mark_body(self, cells):
+        """Fills self.release: steps until each body cell is vacated (0 for free cells)."""
+        release = self.release
+        length = len(cells)
+        index = self.index
+        # Head-ward copies of a cell overwrite tail-ward ones, keeping the latest release
+        for i in range(length - 1, -1, -1):
+            position = index.get(cells[i])
+            if position is not None:
+                release[position] = length - i
+        return release
+
+    def _clear_body(self, cells):
+        release = self.release
+        index = self.index
+        for cell in cells:
+            position = index.get(cell)
+            if position is not None:
+                release[position] = 0
+
+    def _direction(self, a, b):
+        """The direction that leads from cell index a to its neighbour b."""
+        return self.moves[a][self.neighbors[a].index(b)]
+
+    def _search(self, cells, goal):
+        """
+        Breadth-first search from the head of a body (list of cells, head
+        first) to the cell index goal. Returns the cell indexes of the path
+        (excluding the head), or None.
+        """
+        start = self.index.get(cells[0])
+        if start is None:
+            return None
+        release = self._mark_body(cells)
+        neighbors = self.neighbors
+        parents = [-1] * len(neighbors)
+        parents[start] = start
+        frontier = [start]
+        depth = 0
+        found = False
+        while frontier and not found:
+            depth += 1
+            following = []
+            for current in frontier:
+                for nxt in neighbors[current]:
+                    if parents[nxt] < 0 and release[nxt] <= depth:
+                        parents[nxt] = current
+                        if nxt == goal:
+                            found = True
+                            break
+                        following.append(nxt)
+                if found:
+                    break
+            frontier = following
+        self._clear_body(cells)
+        if not found:
+            return None
+        path = []
+        node = goal
+        while node != start:
+            path.append(node)
+            node = parents[node]
+        path.reverse()
+        return path
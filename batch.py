@@ -0,0 +1,247 @@
+"""
+Batch runner for large numbers of headless bot games.
+
+Games are fanned out over a process pool (all cores by default) in chunks of
+seeds. Each finished game is appended to a JSON-lines results file as soon as
+its chunk completes, and score, length and death-cause statistics per mode are
+updated incrementally. Rerunning with the same arguments resumes an interrupted
+batch: games already in the results file are loaded into the statistics and
+not played again.
+
+Usage:
+    python batch.py --games 10000 --modes Classic Obstacle
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from simulation import Simulation, UP, DOWN, LEFT, RIGHT
+
+RESULTS_FILE = "batch_results.jsonl"
+CHUNK_SIZE = 50
+MAX_STEPS = 20000
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+
+def is_safe(sim, direction):
+    """True if moving in direction would not end the game on the next step."""
+    head = sim.body.head
+    cell, cause = sim.arena.check_collision((head[0] + direction[0], head[1] + direction[1]))
+    if cause is not None:
+        return False
+    # The tail moves out of the way unless the snake is about to grow
+    return not sim.body.occupies(cell) or (cell == sim.body.cells[-1] and cell != sim.food)
+
+
+def greedy_policy(sim, rng):
+    """Takes the move that gets closest to the food, avoiding moves that die at once."""
+    head = sim.body.head
+    current = sim.body.direction
+    options = [d for d in DIRECTIONS if d != (-current[0], -current[1])]
+    target = sim.food if sim.food is not None else head
+    options.sort(key=lambda d: (abs(head[0] + d[0] - target[0]) + abs(head[1] + d[1] - target[1]), rng.random()))
+    for direction in options:
+        if is_safe(sim, direction):
+            return direction
+    return None
+
+
+def run_game(mode, seed, max_steps=MAX_STEPS, policy=greedy_policy):
+    """Plays one game to the end (or max_steps). Returns its result record."""
+    sim = Simulation(mode, seed=seed)
+    rng = random.Random(seed)
+    while not sim.is_game_over and sim.steps < max_steps:
+        sim.step(policy(sim, rng))
+    return {
+        "mode": mode,
+        "seed": seed,
+        "score": sim.score,
+        "length": len(sim.body),
+        "level": sim.level,
+        "steps": sim.steps,
+        "cause": sim.cause or "timeout",
+    }
+
+
+def run_chunk(mode, seeds, max_steps):
+    """Worker entry point: plays a chunk of games."""
+    return [run_game(mode, seed, max_steps) for seed in seeds]
+
+
+class RunningStats:
+    """Count, mean, standard deviation, min and max, updated one value at a time (Welford)."""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def summary(self):
+        return {"mean": self.mean, "stdev": self.stdev, "min": self.min, "max": self.max}
+
+
+class BatchStats:
+    """Per-mode score, length and level statistics plus death-cause counts."""
+    def __init__(self):
+        self.modes = {}
+
+    def add(self, result):
+        stats = self.modes.get(result["mode"])
+        if stats is None:
+            stats = self.modes[result["mode"]] = {
+                "score": RunningStats(),
+                "length": RunningStats(),
+                "level": RunningStats(),
+                "causes": Counter(),
+            }
+        for key in ("score", "length", "level"):
+            stats[key].add(result[key])
+        stats["causes"][result["cause"]] += 1
+
+    def summary(self):
+        return {
+            mode: {
+                "games": stats["score"].count,
+                "score": stats["score"].summary(),
+                "length": stats["length"].summary(),
+                "level": stats["level"].summary(),
+                "causes": dict(stats["causes"]),
+            }
+            for mode, stats in self.modes.items()
+        }
+
+    def report(self):
+        lines = []
+        for mode, stats in self.summary().items():
+            score, length = stats["score"], stats["length"]
+            causes = ", ".join(f"{cause} {count}" for cause, count in sorted(stats["causes"].items()))
+            lines.append(f"{mode:<9} {stats['games']:>7} games  score {score['mean']:7.2f} +/- {score['stdev']:6.2f} "
+                         f"(max {score['max']})  length {length['mean']:7.2f}  deaths: {causes}")
+        return "\n".join(lines)
+
+
+def load_finished(path, stats, wanted):
+    """
+    Adds the games of this batch already in a results file to stats.
+    wanted is the batch's set of (mode, seed); other records (from a batch with
+    other modes or seeds, or repeats of a game) are left out of the statistics.
+    Returns (the finished (mode, seed) pairs, the number of records left out).
+    """
+    finished = set()
+    ignored = 0
+    if not os.path.exists(path):
+        return finished, ignored
+    with open(path) as results:
+        for line in results:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run; its game is played again
+                continue
+            game = (result["mode"], result["seed"])
+            if game not in wanted or game in finished:
+                ignored += 1
+                continue
+            finished.add(game)
+            stats.add(result)
+    return finished, ignored
+
+
+def ends_with_newline(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return True
+    with open(path, "rb") as results:
+        results.seek(-1, os.SEEK_END)
+        return results.read(1) == b"\n"
+
+
+def plan_chunks(modes, games, base_seed, finished, chunk_size=CHUNK_SIZE):
+    """[(mode, seeds)] for every game of the batch not yet finished."""
+    chunks = []
+    for mode in modes:
+        seeds = [seed for seed in range(base_seed, base_seed + games) if (mode, seed) not in finished]
+        for start in range(0, len(seeds), chunk_size):
+            chunks.append((mode, seeds[start:start + chunk_size]))
+    return chunks
+
+
+def run_batch(modes, games, output=RESULTS_FILE, workers=None, base_seed=0,
+              max_steps=MAX_STEPS, chunk_size=CHUNK_SIZE, progress=print):
+    """Runs (or resumes) a batch. Returns its BatchStats."""
+    stats = BatchStats()
+    wanted = {(mode, seed) for mode in modes for seed in range(base_seed, base_seed + games)}
+    finished, ignored = load_finished(output, stats, wanted)
+    chunks = plan_chunks(modes, games, base_seed, finished, chunk_size)
+    total = sum(len(seeds) for _, seeds in chunks)
+    if ignored:
+        progress(f"Ignoring {ignored} results in {output} that are not part of this batch")
+    if finished:
+        progress(f"Resuming: {len(finished)} games already done, {total} to go")
+    if not chunks:
+        return stats
+
+    start = time.perf_counter()
+    done = 0
+    complete = ends_with_newline(output)
+    with open(output, "a") as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        if not complete:
+            # Keep new results off the line an interrupted run left unfinished
+            out.write("\n")
+        futures = [pool.submit(run_chunk, mode, seeds, max_steps) for mode, seeds in chunks]
+        try:
+            for future in as_completed(futures):
+                results = future.result()
+                for result in results:
+                    out.write(json.dumps(result) + "\n")
+                    stats.add(result)
+                out.flush()
+                done += len(results)
+                elapsed = time.perf_counter() - start
+                progress(f"{done}/{total} games, {done / elapsed:.0f} games/s")
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            progress("Interrupted: rerun the same command to resume")
+            raise
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many headless bot games in parallel.")
+    parser.add_argument("--games", type=int, default=1000, help="games per mode")
+    parser.add_argument("--modes", nargs="+", default=["Classic", "Obstacle"], choices=["Classic", "Obstacle"])
+    parser.add_argument("--output", default=RESULTS_FILE, help="JSON-lines results file (resumed if present)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--max-steps", type=int, default=MAX_STEPS, help="steps before a game counts as a timeout")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="games per task")
+    parser.add_argument("--summary", help="also write the final statistics to this JSON file")
+    args = parser.parse_args(argv)
+
+    stats = run_batch(args.modes, args.games, args.output, args.workers, args.seed,
+                      args.max_steps, args.chunk)
+    print(stats.report())
+    if args.summary:
+        with open(args.summary, "w") as out:
+            json.dump(stats.summary(), out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,603 @@
+"""
+Benchmark suite for the game's hot paths.
+
+The simulation cases run anywhere. The view cases (Snake view moves and a
+full Game frame) run once per renderer that can open here: the null renderer
+always, turtle and pygame only with a display (on a headless Linux box run
+them under a virtual one, e.g. `xvfb-run -a python benchmark.py`). Their frame
+times are also printed side by side per renderer.
+
+The startup case times a cold start (import, first menu frame, background
+audio load) in a fresh interpreter.
+
+Results are per-call times, saved as JSON and compared against a baseline:
+
+    python benchmark.py --save-baseline           # record benchmark_baseline.json
+    python benchmark.py --output results.json     # run, save and compare
+    python benchmark.py --quick                   # fewer repeats, smaller sizes
+    python benchmark.py --soak                    # plus a 1000 game restart soak
+
+A case more than --threshold (default 25%) slower than the baseline is
+reported as a regression and the script exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import random
+import subprocess
+import tracemalloc
+from simulation import (Simulation, SnakeBody, ClassicArena, ObstacleArena,
+                        UP, DOWN, LEFT, RIGHT, FOOD_LIMIT, BONUS_LIMIT)
+from particles import ParticleSystem, ParticleView
+from autopilot import Autopilot
+from renderer import RENDERERS, NullRenderer, create_renderer
+from camera import window_size
+from feed import EventFeed, POLICIES
+
+SNAKE_LENGTHS = [3, 100, 1000, 10000]
+OBSTACLE_COUNTS = [0, 110, 1000, 5000]
+FILL_RATIOS = [0.0, 0.5, 0.9, 0.95]
+BASELINE_FILE = "benchmark_baseline.json"
+REGRESSION_THRESHOLD = 0.25
+
+
+def time_per_call(fn, repeat, rounds=3):
+    """Returns the best-of-rounds average seconds per call of fn over repeat calls."""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        elapsed = (time.perf_counter() - start) / repeat
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def make_body(length):
+    """A straight snake of the given length, head at the origin, moving right."""
+    body = SnakeBody()
+    body.reset([(-i, 0) for i in range(length)])
+    body.direction = RIGHT
+    return body
+
+
+def bench_snake_move(lengths=SNAKE_LENGTHS, repeat=20000):
+    """SnakeBody.move per snake length. Returns {length: seconds}."""
+    results = {}
+    for length in lengths:
+        body = make_body(length)
+        results[length] = time_per_call(lambda: body.move(body.next_cell()), repeat)
+    return results
+
+
+def bench_snake_extend(lengths=SNAKE_LENGTHS, repeat=2000):
+    """A growth step (move + extend) per starting snake length. Returns {length: seconds}."""
+    results = {}
+    for length in lengths:
+        body = make_body(length)
+
+        def tick():
+            body.move(body.next_cell())
+            body.extend()
+
+        results[length] = time_per_call(tick, repeat, rounds=1)
+    return results
+
+
+def bench_self_collision(lengths=SNAKE_LENGTHS, repeat=20000):
+    """Move plus head-vs-body check, per snake length. Returns {length: seconds}."""
+    results = {}
+    for length in lengths:
+        body = make_body(length)
+
+        def tick():
+            body.move(body.next_cell())
+            body.hits_itself()
+
+        results[length] = time_per_call(tick, repeat)
+    return results
+
+
+def make_arena(arena_class, count, seed=0):
+    """An arena large enough to hold count random obstacles."""
+    arena = arena_class()
+    arena.limit = max(arena.limit, int(count ** 0.5) + 1)
+    rng = random.Random(seed)
+    while len(arena.obstacles) < count:
+        arena.obstacles.add((rng.randint(-arena.limit, arena.limit),
+                             rng.randint(-arena.limit, arena.limit)))
+    return arena
+
+
+def bench_obstacle_collision(counts=OBSTACLE_COUNTS, repeat=20000):
+    """Arena.check_collision per obstacle count, for both modes. Returns {(mode, count): seconds}."""
+    results = {}
+    for name, arena_class in [("Classic", ClassicArena), ("Obstacle", ObstacleArena)]:
+        for count in counts:
+            arena = make_arena(arena_class, count)
+            cells = [(i % arena.limit, i // arena.limit % arena.limit) for i in range(256)]
+            position = [0]
+
+            def tick():
+                arena.check_collision(cells[position[0] & 255])
+                position[0] += 1
+
+            results[(name, count)] = time_per_call(tick, repeat)
+    return results
+
+
+def serpentine(limit, count):
+    """count cells of a boustrophedon path over a (2*limit+1)^2 square."""
+    cells = []
+    for row, y in enumerate(range(-limit, limit + 1)):
+        xs = range(-limit, limit + 1)
+        for x in (xs if row % 2 == 0 else reversed(xs)):
+            if len(cells) == count:
+                return cells
+            cells.append((x, y))
+    return cells
+
+
+def filled_simulation(ratio, limit=FOOD_LIMIT):
+    """A simulation whose snake covers ratio of a (2*limit+1)^2 region, no obstacles."""
+    sim = Simulation("Obstacle", seed=0)
+    sim.arena.obstacles.clear()
+    area = (2 * limit + 1) ** 2
+    sim.body.reset(serpentine(limit, max(3, int(area * ratio)))[::-1])
+    sim.rebuild_free_cells()
+    return sim
+
+
+def bench_food_spawn(ratios=FILL_RATIOS, repeat=20000):
+    """refresh_food with the snake filling a share of the food region. Returns {ratio: seconds}."""
+    results = {}
+    for ratio in ratios:
+        sim = filled_simulation(ratio)
+        results[ratio] = time_per_call(sim.refresh_food, repeat)
+    return results
+
+
+def bench_bonus_spawn(ratios=FILL_RATIOS, repeat=20000):
+    """spawn_bonus with the snake filling a share of the bonus region. Returns {ratio: seconds}."""
+    results = {}
+    for ratio in ratios:
+        sim = filled_simulation(ratio, BONUS_LIMIT)
+        results[ratio] = time_per_call(sim.spawn_bonus, repeat)
+    return results
+
+
+def bench_generate_obstacles(lengths=SNAKE_LENGTHS, repeat=200):
+    """ObstacleArena.generate_obstacles over the four layouts, per snake length kept clear."""
+    results = {}
+    for length in lengths:
+        arena = ObstacleArena()
+        body = SnakeBody()
+        body.reset(serpentine(max(16, int(length ** 0.5) // 2 + 1), length))
+        rng = random.Random(0)
+        level = [0]
+
+        def tick():
+            level[0] += 1
+            arena.generate_obstacles(level[0], rng, body.occupancy)
+
+        results[length] = time_per_call(tick, repeat)
+    return results
+
+
+def hamiltonian_cycle(width, height):
+    """
+    {cell: next cell} for a closed serpentine tour of a width x height block
+    (height even): rows are swept over columns 1.., column 0 leads back down.
+    """
+    path = []
+    for y in range(height):
+        xs = range(1, width)
+        path.extend((x, y) for x in (xs if y % 2 == 0 else reversed(xs)))
+    path.extend((0, y) for y in range(height - 1, -1, -1))
+    return {cell: path[(i + 1) % len(path)] for i, cell in enumerate(path)}
+
+
+def tour_simulation(mode, length):
+    """
+    A simulation in an arena big enough for the snake, laid along a closed tour
+    so it can be stepped forever without dying. Returns (sim, actions), where
+    actions maps the head cell to the direction that follows the tour.
+    """
+    side = 2
+    while side * side < length * 2:
+        side += 2
+    sim = Simulation(mode, seed=0)
+    sim.arena.limit = max(sim.arena.limit, side)
+    sim.arena.obstacles.clear()
+    tour = hamiltonian_cycle(side, side)
+    back = {after: cell for cell, after in tour.items()}
+    cells = [(0, 0)]
+    while len(cells) < length:
+        cells.append(back[cells[-1]])
+    sim.body.reset(cells)
+    sim.rebuild_free_cells()
+    directions = {(1, 0): RIGHT, (-1, 0): LEFT, (0, 1): UP, (0, -1): DOWN}
+    actions = {cell: directions[(after[0] - cell[0], after[1] - cell[1])] for cell, after in tour.items()}
+    return sim, actions
+
+
+def bench_sim_step(lengths=SNAKE_LENGTHS, repeat=5000):
+    """A full headless game tick (Simulation.step) per mode and snake length."""
+    results = {}
+    for mode in ("Classic", "Obstacle"):
+        for length in lengths:
+            sim, actions = tour_simulation(mode, length)
+            # Food stays off the tour so the snake keeps its length
+            sim.food = None
+            body = sim.body
+            results[(mode, length)] = time_per_call(lambda: sim.step(actions[body.cells[0]]), repeat, rounds=1)
+    return results
+
+
+def bench_particle_soak(pickups=10000, frames_per_pickup=5, checkpoints=5):
+    """
+    Emits a burst per food pickup and runs a few frames between pickups.
+    Returns {pickups so far: (traced bytes, renderer items, live particles)}.
+    """
+    system = ParticleSystem(rng=random.Random(0))
+    renderer = NullRenderer()
+    view = ParticleView(system, renderer)
+    results = {}
+    tracemalloc.start()
+    try:
+        for pickup in range(1, pickups + 1):
+            system.emit(0, 0, "red")
+            for _ in range(frames_per_pickup):
+                system.update()
+                view.draw()
+            if pickup % (pickups // checkpoints) == 0:
+                results[pickup] = (tracemalloc.get_traced_memory()[0], renderer.created, len(system))
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def bench_game_soak(games=1000, checkpoints=5, arena_size=65, seed=0):
+    """
+    Plays games back to back on the null renderer with random key presses,
+    alternating modes, as a long session of restarts would. The arena is a
+    little larger than the window so the camera scrolls and wall layers come
+    and go too. Returns {games so far: (traced bytes, renderer items, pooled
+    items)}; all three should level off after the first few games.
+    """
+    import gc
+    import tempfile
+    from game_engine import Game
+    rng = random.Random(seed)
+    keys = ["Up", "Down", "Left", "Right"] + [None] * 6
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        game = Game(arena_size, renderer="null", data_dir=directory)
+        renderer = game.renderer
+        tracemalloc.start()
+        try:
+            for played in range(1, games + 1):
+                game.set_mode(("Classic", "Obstacle")[played % 2])
+                game.start_game()
+                while game.is_running or game.effects.active:
+                    key = rng.choice(keys)
+                    if key is not None:
+                        renderer.key_handlers[key]()
+                    renderer.step()
+                if played % (games // checkpoints) == 0:
+                    game.store.flush()
+                    gc.collect()
+                    results[played] = (tracemalloc.get_traced_memory()[0], len(renderer.items),
+                                       renderer.pool.stats()["pooled"])
+        finally:
+            tracemalloc.stop()
+            game.store.close()
+    return results
+
+
+class StalledSink:
+    """A feed sink that blocks its writer until released, so the feed's buffer stays full."""
+    def __init__(self):
+        import threading
+        self.released = threading.Event()
+
+    def write(self, data):
+        self.released.wait()
+
+    def close(self):
+        pass
+
+
+def bench_feed_publish(repeat=20000, capacity=256):
+    """
+    Publishing a move (with an eat every tenth call) to an event feed whose
+    writer is stuck, per drop policy: the cost the game loop pays once the
+    buffer is full. Returns {policy: seconds per publish}.
+    """
+    results = {}
+    for policy in POLICIES:
+        sink = StalledSink()
+        feed = EventFeed(sink, "binary", capacity, policy)
+        calls = [0]
+
+        def tick():
+            calls[0] += 1
+            x = calls[0] % 1000
+            feed.publish("move", (x, 0), (x - 3, 0))
+            if x % 10 == 0:
+                feed.publish("eat", "food", (x, 0))
+
+        results[policy] = time_per_call(tick, repeat)
+        sink.released.set()
+        feed.close()
+    return results
+
+
+def bench_autopilot(steps=20000):
+    """
+    Autopilot.next_action per step over a self-played game on the standard
+    (33x33) board, per mode. The snake grows to a few hundred cells.
+    Returns {(mode, "mean"|"p99"): seconds}.
+    """
+    results = {}
+    for mode in ("Classic", "Obstacle"):
+        sim = Simulation(mode, seed=0)
+        autopilot = Autopilot(sim)
+        autopilot.sync()
+        times = []
+        while not sim.is_game_over and len(times) < steps:
+            start = time.perf_counter()
+            action = autopilot.next_action()
+            times.append(time.perf_counter() - start)
+            sim.step(action)
+        times.sort()
+        results[(mode, "mean")] = sum(times) / len(times)
+        results[(mode, "p99")] = times[len(times) * 99 // 100]
+        print(f"  autopilot {mode}: {len(times)} steps, final length {len(sim.body)}")
+    return results
+
+
+def available_renderers():
+    """The renderers that can open a window here (null always can)."""
+    names = []
+    for name in RENDERERS:
+        try:
+            create_renderer(name, *window_size())
+        except Exception:
+            continue
+        names.append(name)
+    return names
+
+
+def bench_view_snake_move(renderer_name, lengths=SNAKE_LENGTHS, repeat=500):
+    """Snake view move plus a flushed frame per length, on one renderer."""
+    from snake import Snake
+    renderer = create_renderer(renderer_name, *window_size())
+    results = {}
+    for length in lengths:
+        body = make_body(length)
+        snake = Snake(renderer, body)
+
+        def tick():
+            body.move(body.next_cell())
+            snake.move()
+            renderer.flush()
+
+        results[length] = time_per_call(tick, repeat, rounds=1)
+        snake.hide()
+    return results
+
+
+# Run in a fresh interpreter so imports are really paid for
+STARTUP_PROBE = """
+import json, tempfile, time
+start = time.perf_counter()
+import game_engine
+result = {"import": time.perf_counter() - start}
+# Scores and replays of the probe go to a scratch directory, not the player's
+with tempfile.TemporaryDirectory() as directory:
+    try:
+        game = game_engine.Game(data_dir=directory)
+    except Exception:
+        game = None
+    if game is not None:
+        result["first_menu"] = time.perf_counter() - start
+        if game.audio.wait(10):
+            result["audio_load"] = game.audio.load_ms / 1000.0
+        game.store.close()
+print(json.dumps(result))
+"""
+
+
+def bench_startup(rounds=3):
+    """
+    Cold start in a new process: importing game_engine and, with a display,
+    import plus Game() up to the first menu frame and the background audio load.
+    Returns {"import"|"first_menu"|"audio_load": best seconds}.
+    """
+    results = {}
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(rounds):
+        output = subprocess.run([sys.executable, "-c", STARTUP_PROBE], cwd=directory,
+                                capture_output=True, text=True, check=True).stdout
+        for name, seconds in json.loads(output.splitlines()[-1]).items():
+            results[name] = min(seconds, results.get(name, seconds))
+    return results
+
+
+def bench_game_frame(renderer_name, repeat=500):
+    """A full Game.game_loop frame that takes one step, per mode, on one renderer."""
+    import tempfile
+    from game_engine import Game
+    results = {}
+    # Benchmark games must not land in the player's scores and last replay
+    with tempfile.TemporaryDirectory() as directory:
+        game = Game(renderer=renderer_name, data_dir=directory)
+        # Benchmark frames are driven directly, not by Tk timers
+        game.schedule_frame = lambda delay=None: None
+        for mode in ("Classic", "Obstacle"):
+            game.set_mode(mode)
+            game.is_running = False
+            game.start_game()
+            now = [0.0]
+            game.clock.clock = lambda: now[0]
+            game.clock.start()
+
+            def tick():
+                now[0] += game.get_current_delay() / 1000.0
+                if not game.is_running:
+                    game.effects.clear()
+                    game.start_game()
+                game.game_loop()
+
+            results[mode] = time_per_call(tick, repeat, rounds=1)
+        game.store.close()
+    return results
+
+
+def run_suite(quick=False):
+    """Runs every case. Returns {"case/param": seconds per call}."""
+    lengths = SNAKE_LENGTHS[:3] if quick else SNAKE_LENGTHS
+    counts = OBSTACLE_COUNTS[:3] if quick else OBSTACLE_COUNTS
+    scale = 0.1 if quick else 1.0
+
+    def n(repeat):
+        return max(10, int(repeat * scale))
+
+    cases = [
+        ("snake_move", lambda: bench_snake_move(lengths, n(20000))),
+        ("snake_extend", lambda: bench_snake_extend(lengths, n(2000))),
+        ("self_collision", lambda: bench_self_collision(lengths, n(20000))),
+        ("check_collision", lambda: bench_obstacle_collision(counts, n(20000))),
+        ("food_refresh", lambda: bench_food_spawn(FILL_RATIOS, n(20000))),
+        ("bonus_spawn", lambda: bench_bonus_spawn(FILL_RATIOS, n(20000))),
+        ("generate_obstacles", lambda: bench_generate_obstacles(lengths, n(200))),
+        ("sim_step", lambda: bench_sim_step(lengths, n(5000))),
+        ("autopilot_step", lambda: bench_autopilot(n(20000))),
+        ("feed_publish", lambda: bench_feed_publish(n(20000))),
+        ("startup", lambda: bench_startup(1 if quick else 3)),
+    ]
+    renderers = available_renderers()
+    for renderer in renderers:
+        cases += [
+            (f"view_snake_move/{renderer}", lambda r=renderer: bench_view_snake_move(r, lengths, n(500))),
+            (f"game_frame/{renderer}", lambda r=renderer: bench_game_frame(r, n(500))),
+        ]
+    skipped = [name for name in RENDERERS if name not in renderers]
+    if skipped:
+        print(f"No display for {', '.join(skipped)}: skipping their view cases (try xvfb-run)")
+
+    results = {}
+    for name, case in cases:
+        for param, seconds in case().items():
+            if isinstance(param, tuple):
+                param = "/".join(str(part) for part in param)
+            results[f"{name}/{param}"] = seconds
+    return results
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Returns [(name, seconds, baseline seconds, ratio)] for cases slower than threshold allows."""
+    regressions = []
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before:
+            ratio = seconds / before
+            if ratio > 1 + threshold:
+                regressions.append((name, seconds, before, ratio))
+    return regressions
+
+
+def save_results(path, results):
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+    with open(path, "w") as out:
+        json.dump(report, out, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as data:
+        return json.load(data)["results"]
+
+
+def print_results(results, baseline=None):
+    for name, seconds in results.items():
+        line = f"  {name:<36} {seconds * 1e6:10.3f} us"
+        if baseline and baseline.get(name):
+            line += f"  ({seconds / baseline[name]:5.2f}x baseline)"
+        print(line)
+
+
+def print_renderer_comparison(results):
+    """Frame times of the view cases side by side, one column per renderer."""
+    rows = {}
+    for name, seconds in results.items():
+        parts = name.split("/")
+        if parts[0] in ("view_snake_move", "game_frame"):
+            rows.setdefault((parts[0], "/".join(parts[2:])), {})[parts[1]] = seconds
+    if not rows:
+        return
+    columns = [name for name in RENDERERS if any(name in row for row in rows.values())]
+    print("Frame time by renderer (ms)")
+    print("  " + " " * 30 + "".join(f"{name:>10}" for name in columns))
+    for (case, param), times in rows.items():
+        cells = "".join(f"{times[name] * 1e3:10.3f}" if name in times else f"{'-':>10}" for name in columns)
+        print(f"  {case + '/' + param:<30}{cells}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths.")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed slowdown before a case counts as a regression (0.25 = 25%%)")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats")
+    parser.add_argument("--soak", type=int, nargs="?", const=1000, default=0, metavar="GAMES",
+                        help="also play GAMES (default 1000) games back to back headless and report "
+                             "memory and item counts (takes several minutes)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.quick)
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        baseline = load_results(args.baseline)
+    print_results(results, baseline)
+    print_renderer_comparison(results)
+
+    print("Particle soak (pickups: traced bytes, renderer items, live particles)")
+    for pickups, (memory, items, live) in bench_particle_soak().items():
+        print(f"  {pickups:>6}: {memory:>8} B {items:>4} items {live:>3} live")
+
+    if args.soak:
+        print(f"Game soak, {args.soak} games (games: traced bytes, renderer items, pooled items)")
+        for played, (memory, items, pooled) in bench_game_soak(args.soak).items():
+            print(f"  {played:>6}: {memory:>8} B {items:>5} items {pooled:>4} pooled")
+
+    if args.output:
+        save_results(args.output, results)
+    if args.save_baseline:
+        save_results(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for name, seconds, before, ratio in regressions:
+            print(f"REGRESSION {name}: {before * 1e6:.3f} us -> {seconds * 1e6:.3f} us ({ratio:.2f}x)")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+The view onto the arena.
+
+The window shows VIEW_LIMIT cells either side of the camera centre (the whole
+standard arena). In larger arenas the camera follows the snake head: it stays
+put while the head is inside a dead zone around the centre and recentres on
+the head when it leaves, so most steps redraw nothing but the snake's ends.
+Everything drawn in world cells goes through to_pixels(), which also culls
+cells outside the view.
+"""
+from simulation import ARENA_LIMIT, CELL_SIZE
+
+VIEW_LIMIT = ARENA_LIMIT
+# How far (in cells) the head may stray from the centre before the camera recentres
+DEAD_ZONE = 8
+# Extra height above the board for the scoreboard
+HUD_HEIGHT = 40
+
+
+def window_size(view_limit=VIEW_LIMIT):
+    """(width, height) in pixels of a window showing the view."""
+    width = (2 * view_limit + 2) * CELL_SIZE
+    return width, width + HUD_HEIGHT
+
+
+class Camera:
+    """Maps world cells to screen pixels for the part of the arena in view."""
+    def __init__(self, world_limit=ARENA_LIMIT, view_limit=VIEW_LIMIT, dead_zone=DEAD_ZONE):
+        self.view_limit = view_limit
+        self.dead_zone = dead_zone
+        self.configure(world_limit)
+
+    def configure(self, world_limit):
+        self.world_limit = world_limit
+        # Arenas that fit the window are shown whole and never scroll
+        self.fixed = world_limit <= self.view_limit
+        # Keep the view inside the arena, including the Classic walls just past its edge
+        self.bound = 0 if self.fixed else world_limit + 1 - self.view_limit
+        self.center = (0, 0)
+
+    def _clamp(self, value):
+        return max(-self.bound, min(self.bound, value))
+
+    def reset(self, head):
+        """Centres the view on head. Returns True if the view moved."""
+        center = (self._clamp(head[0]), self._clamp(head[1]))
+        moved = center != self.center
+        self.center = center
+        return moved
+
+    def follow(self, head):
+        """Recentres on head if it left the dead zone. Returns True if the view moved."""
+        if self.fixed:
+            return False
+        cx, cy = self.center
+        if abs(head[0] - cx) <= self.dead_zone and abs(head[1] - cy) <= self.dead_zone:
+            return False
+        return self.reset(head)
+
+    def contains(self, cell):
+        """True if cell is on screen (one cell of margin takes in the Classic walls)."""
+        reach = self.view_limit + 1
+        return abs(cell[0] - self.center[0]) <= reach and abs(cell[1] - self.center[1]) <= reach
+
+    def to_pixels(self, cell):
+        """Screen coordinates of a world cell, or None if it is out of view."""
+        if not self.contains(cell):
+            return None
+        return (cell[0] - self.center[0]) * CELL_SIZE, (cell[1] - self.center[1]) * CELL_SIZE
+
+    def visible_cells(self):
+        """Every cell in view."""
+        cx, cy = self.center
+        reach = self.view_limit + 1
+        for x in range(cx - reach, cx + reach + 1):
+            for y in range(cy - reach, cy + reach + 1):
+                yield (x, y)
+
+    @property
+    def area(self):
+        return (2 * self.view_limit + 3) ** 2
@@ -0,0 +1,43 @@
+"""
+Frame compositor: coalesces redraws into at most one renderer flush per frame.
+
+Anything that changes the picture during a frame (snake, food, bonus food,
+scoreboard, particles, effects) marks itself dirty; flush() then calls
+renderer.flush() once if anything did, and skips the redraw entirely otherwise.
+"""
+
+class Compositor:
+    """Dirty tracking plus counters for flushed and skipped frames."""
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.dirty = set()
+        self.frames = 0
+        self.flushes = 0
+        self.skipped = 0
+        self.marks = {}
+
+    def mark(self, source):
+        """Records that source changed something on screen this frame."""
+        self.dirty.add(source)
+
+    def flush(self):
+        """Ends the frame: one renderer.flush() if anything changed. Returns True if it redrew."""
+        self.frames += 1
+        if not self.dirty:
+            self.skipped += 1
+            return False
+        for source in self.dirty:
+            self.marks[source] = self.marks.get(source, 0) + 1
+        self.dirty.clear()
+        self.renderer.flush()
+        self.flushes += 1
+        return True
+
+    def stats(self):
+        """Frames ended, frames redrawn, frames skipped, and how often each source marked a redraw."""
+        return {
+            "frames": self.frames,
+            "flushes": self.flushes,
+            "skipped": self.skipped,
+            "marks": dict(self.marks),
+        }
@@ -0,0 +1,64 @@
+"""
+Non-blocking timed effects (banners, flashes, blinks).
+
+Effects are registered with a duration and optional callbacks, and advanced by
+the game loop's timer tick, so they run alongside the game instead of sleeping
+on the Tk event-loop thread.
+"""
+
+class Effect:
+    """A running effect. on_frame(progress) gets 0..1; on_end() runs once at the end."""
+    def __init__(self, duration_ms, on_frame=None, on_end=None, key=None):
+        self.duration_ms = duration_ms
+        self.on_frame = on_frame
+        self.on_end = on_end
+        self.key = key
+        self.elapsed_ms = 0
+
+class EffectScheduler:
+    """Keeps the running effects and advances them once per frame."""
+    def __init__(self):
+        self.effects = []
+
+    @property
+    def active(self):
+        return bool(self.effects)
+
+    def add(self, duration_ms, on_frame=None, on_end=None, key=None):
+        """
+        Starts an effect. An effect with the same key is finished first,
+        so e.g. a new banner replaces the one on screen.
+        """
+        if key is not None:
+            self.finish(key)
+        effect = Effect(duration_ms, on_frame, on_end, key)
+        self.effects.append(effect)
+        return effect
+
+    def update(self, elapsed_ms):
+        """Advances every effect by elapsed_ms. Returns True if any effect ran."""
+        if not self.effects:
+            return False
+        for effect in self.effects[:]:
+            effect.elapsed_ms += elapsed_ms
+            if effect.on_frame:
+                effect.on_frame(min(1.0, effect.elapsed_ms / effect.duration_ms))
+            if effect.elapsed_ms >= effect.duration_ms:
+                self._end(effect)
+        return True
+
+    def finish(self, key):
+        """Ends the effect with this key now, running its on_end."""
+        for effect in self.effects[:]:
+            if effect.key == key:
+                self._end(effect)
+
+    def clear(self):
+        """Drops every effect without running on_end."""
+        self.effects.clear()
+
+    def _end(self, effect):
+        if effect in self.effects:
+            self.effects.remove(effect)
+            if effect.on_end:
+                effect.on_end()
@@ -0,0 +1,538 @@
+"""
+Live event feed for spectators and analytics.
+
+The game publishes what happens on each step to an EventFeed: game start,
+snake moves, food and bonus eaten, score changes, bonus spawns and expiries,
+level-ups, the collision that ended a game and the game over summary. A move
+carries the new head and the cell the tail left (none if the snake grew), so
+a spectator rebuilds the snake from the moves (see SpectatorBody). A resync
+gives the head and length outright: one follows the start of a game and the
+first step after any move was lost.
+publish() only appends a tuple to a bounded buffer, so it never stalls the
+game loop. A writer thread drains the buffer, encodes the events and writes
+them to a sink:
+- a file, or "-" for stdout;
+- a local TCP port that spectators connect to.
+
+When the writer falls behind and the buffer is full, the feed's policy
+decides what gives:
+- "drop-new": the incoming event is discarded.
+- "drop-old": the oldest buffered event is discarded.
+- "coalesce": moves give way first. A new move is skipped and the next
+  resync takes spectators straight to the latest position. Any other event
+  evicts the oldest buffered move. Only when no move is buffered is the
+  oldest event dropped.
+Every discarded event is counted by kind. Events keep the order of their steps.
+
+Events are written as JSON lines or in a compact binary framing. Each binary
+event is a kind byte, a payload length byte and the step number (4 bytes),
+followed by the kind's fixed fields in network byte order. A move is 14 bytes.
+
+Usage:
+    python main.py --feed-port 5556 --feed-format binary
+    python feed.py 127.0.0.1:5556 --format binary    # print the events as JSON lines
+    python feed.py --check                           # rebuild snakes from starved feeds
+"""
+import argparse
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+FORMATS = ("json", "binary")
+POLICIES = ("drop-new", "drop-old", "coalesce")
+DEFAULT_CAPACITY = 1024
+# Bytes a spectator may fall behind by before it is disconnected
+CLIENT_BUFFER = 256 * 1024
+# Seconds close() waits for the writer to finish
+CLOSE_TIMEOUT = 2.0
+
+# kind -> (code, field names, struct format of the fields); cells take two "h"
+SCHEMAS = {
+    "start": (0, ("mode", "limit", "seed"), "BHI"),
+    "move": (1, ("head", "tail"), "hhhh"),
+    "eat": (2, ("food", "cell"), "Bhh"),
+    "score": (3, ("points", "score"), "HI"),
+    "bonus_spawn": (4, ("cell",), "hh"),
+    "bonus_expire": (5, (), ""),
+    "level_up": (6, ("level", "obstacles_changed"), "HB"),
+    "collision": (7, ("cause", "cell"), "Bhh"),
+    "game_over": (8, ("score", "level", "length", "time_ms"), "IHII"),
+    "resync": (9, ("head", "length"), "hhI"),
+}
+KINDS = {code: kind for kind, (code, _, _) in SCHEMAS.items()}
+# Fields sent as an index into a fixed list of names
+ENUMS = {
+    "mode": ("Classic", "Obstacle"),
+    "food": ("food", "bonus"),
+    "cause": ("wall", "obstacle", "self"),
+}
+CELL_FIELDS = {"head", "tail", "cell"}
+# Losing one of these leaves spectators' snakes wrong until the next resync
+SNAKE_EVENTS = ("move", "resync")
+# A cell that is not there, e.g. the tail of a move that grew the snake
+NO_CELL = (-32768, -32768)
+
+FRAME = struct.Struct("!BBI")
+PAYLOADS = {kind: struct.Struct("!" + layout) for kind, (_, _, layout) in SCHEMAS.items()}
+
+
+def encode_binary(kind, step, values):
+    flat = []
+    for name, value in zip(SCHEMAS[kind][1], values):
+        if name in CELL_FIELDS:
+            flat.extend(NO_CELL if value is None else value)
+        elif name in ENUMS:
+            flat.append(ENUMS[name].index(value))
+        else:
+            flat.append(int(value))
+    payload = PAYLOADS[kind].pack(*flat)
+    return FRAME.pack(SCHEMAS[kind][0], len(payload), step) + payload
+
+
+def encode_json(kind, step, values):
+    event = {"type": kind, "step": step}
+    event.update(zip(SCHEMAS[kind][1], values))
+    return (json.dumps(event, separators=(",", ":")) + "\n").encode()
+
+
+ENCODERS = {"json": encode_json, "binary": encode_binary}
+
+
+def decode_binary(data):
+    """Decodes whole binary events from data. Returns (events as dicts, bytes used)."""
+    events = []
+    offset = 0
+    while len(data) - offset >= FRAME.size:
+        code, length, step = FRAME.unpack_from(data, offset)
+        end = offset + FRAME.size + length
+        if end > len(data):
+            break
+        kind = KINDS[code]
+        flat = list(PAYLOADS[kind].unpack_from(data, offset + FRAME.size))
+        event = {"type": kind, "step": step}
+        for name in SCHEMAS[kind][1]:
+            if name in CELL_FIELDS:
+                cell = (flat.pop(0), flat.pop(0))
+                event[name] = None if cell == NO_CELL else list(cell)
+            elif name in ENUMS:
+                event[name] = ENUMS[name][flat.pop(0)]
+            else:
+                event[name] = flat.pop(0)
+        events.append(event)
+        offset = end
+    return events, offset
+
+
+def publish_start(feed, sim):
+    """Publishes the start of a game and where the snake is."""
+    feed.step = sim.steps
+    feed.publish("start", sim.mode_name, sim.arena.limit, sim.seed)
+    feed.publish("resync", sim.body.head, len(sim.body))
+
+
+def publish_step(feed, sim, result):
+    """
+    Publishes what happened during one Simulation.step, in the order the step
+    did it: bonus expiry, the move, the food eaten with its score, level-up and
+    bonus spawn, the bonus eaten with its score, the collision and game over.
+    """
+    feed.step = sim.steps
+    if result.bonus_expired:
+        feed.publish("bonus_expire")
+    # A snake that grew keeps its tail
+    feed.publish("move", result.head, None if result.grew else result.tail)
+    if feed.needs_resync:
+        # A move was lost: send the snake as it stands after this step
+        feed.publish("resync", sim.body.head, len(sim.body))
+    if result.ate_food:
+        feed.publish("eat", "food", result.ate_food)
+        feed.publish("score", result.food_points, sim.score - result.bonus_points)
+        if result.leveled_up:
+            feed.publish("level_up", sim.level, result.obstacles_changed)
+        if result.bonus_spawned:
+            feed.publish("bonus_spawn", sim.bonus)
+    if result.ate_bonus:
+        feed.publish("eat", "bonus", result.ate_bonus)
+        feed.publish("score", result.bonus_points, sim.score)
+    if result.cause is not None:
+        feed.publish("collision", result.cause, result.head)
+    if result.game_over:
+        feed.publish("game_over", sim.score, sim.level, len(sim.body), sim.time_ms)
+
+
+class SpectatorBody:
+    """
+    The snake rebuilt from decoded events, as a spectator sees it. cells are
+    the known cells, head first, with the stacked segment of a snake that just
+    grew as in SnakeBody. After a resync only the head is known; the rest fills
+    in as the snake moves on, and complete is True once every cell is known.
+    Every step has one move, published after the bonus expiry and before the
+    rest of the step's events. A step seen without its move means the move was
+    lost: the snake is unknown again until the next resync.
+    """
+    def __init__(self):
+        self.cells = deque()
+        self.length = 0
+        self.step = None
+
+    @property
+    def complete(self):
+        return self.length > 0 and len(self.cells) == self.length
+
+    def apply(self, event):
+        kind = event["type"]
+        step = event["step"]
+        if kind == "resync":
+            self.cells = deque([tuple(event["head"])])
+            self.length = event["length"]
+            self.step = step
+            return
+        if not self.length or step == self.step:
+            return
+        if step != self.step + 1 or kind not in ("move", "bonus_expire"):
+            self.cells.clear()
+            self.length = 0
+        elif kind == "move":
+            self.step = step
+            complete = self.complete
+            self.cells.appendleft(tuple(event["head"]))
+            if event["tail"] is None:
+                self.length += 1
+                if complete:
+                    # The tail moved on and a segment was stacked on the new last cell
+                    self.cells.pop()
+                    self.cells.append(self.cells[-1])
+            elif len(self.cells) > self.length:
+                self.cells.pop()
+
+
+class FileSink:
+    """Appends the feed to a file ("-" for stdout)."""
+    def __init__(self, path):
+        self.path = path
+        self.out = sys.stdout.buffer if path == "-" else open(path, "ab")
+        # Held while writing; close() may run while a stuck writer thread is still in write()
+        self.lock = threading.Lock()
+
+    def write(self, data):
+        """Raises ValueError once the sink is closed."""
+        with self.lock:
+            self.out.write(data)
+            self.out.flush()
+
+    def close(self):
+        # A writer stuck in write() (e.g. on a full pipe) keeps the file;
+        # closing it would wait for that write, so it is left to process exit
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            if self.out is not sys.stdout.buffer:
+                self.out.close()
+        finally:
+            self.lock.release()
+
+
+class SocketSink:
+    """
+    Serves the feed on a local TCP port. Spectators may connect at any time
+    and get the events from then on; one that hangs up is dropped. Sends
+    never block: each spectator has its own buffer of unsent bytes, and one
+    that falls more than CLIENT_BUFFER bytes behind is disconnected (and
+    counted in lagging) so it cannot hold up the others.
+    """
+    def __init__(self, port, host="127.0.0.1", buffer_size=CLIENT_BUFFER):
+        self.server = socket.create_server((host, port))
+        self.server.setblocking(False)
+        self.port = self.server.getsockname()[1]
+        self.buffer_size = buffer_size
+        # client socket -> bytes not sent yet
+        self.clients = {}
+        self.lagging = 0
+        # close() may run while a stuck writer thread is still in write()
+        self.lock = threading.Lock()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except BlockingIOError:
+                return
+            client.setblocking(False)
+            self.clients[client] = bytearray()
+
+    def _drop(self, client):
+        del self.clients[client]
+        client.close()
+
+    def _flush(self, client):
+        """Sends what the client's socket takes right now. Returns False if the client hung up."""
+        pending = self.clients[client]
+        try:
+            while pending:
+                del pending[:client.send(pending)]
+        except BlockingIOError:
+            pass
+        except OSError:
+            return False
+        return True
+
+    def write(self, data):
+        """Raises OSError once the sink is closed."""
+        with self.lock:
+            self._accept()
+            for client in list(self.clients):
+                self.clients[client] += data
+                if not self._flush(client):
+                    self._drop(client)
+                elif len(self.clients[client]) > self.buffer_size:
+                    self.lagging += 1
+                    self._drop(client)
+
+    def close(self):
+        with self.lock:
+            for client in list(self.clients):
+                self._flush(client)
+                self._drop(client)
+            self.server.close()
+
+
+class EventFeed:
+    """
+    A bounded buffer of events drained by a writer thread into a sink.
+    step is stamped on every published event; the game keeps it current.
+    """
+    def __init__(self, sink, encoding="json", capacity=DEFAULT_CAPACITY, policy="coalesce"):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r}, expected one of {', '.join(POLICIES)}")
+        self.sink = sink
+        self.encode = ENCODERS[encoding]
+        self.capacity = capacity
+        self.policy = policy
+        self.step = 0
+        self.buffer = deque()
+        self.condition = threading.Condition()
+        self.closing = False
+        self.published = 0
+        self.written = 0
+        self.bytes_written = 0
+        self.coalesced = 0
+        self.dropped = Counter()
+        # Set when a move or resync is lost; the game then publishes a resync
+        self.needs_resync = False
+        self.errors = 0
+        self.last_error = None
+        self.thread = threading.Thread(target=self._run, name="event-feed", daemon=True)
+        self.thread.start()
+
+    def publish(self, kind, *values):
+        """Queues an event (values in the order of its SCHEMAS fields). Never blocks on the sink."""
+        event = (kind, self.step, values)
+        with self.condition:
+            self.published += 1
+            if len(self.buffer) >= self.capacity and not self._make_room(event):
+                return
+            self.buffer.append(event)
+            if kind == "resync":
+                self.needs_resync = False
+            self.condition.notify()
+
+    def _make_room(self, event):
+        """Applies the policy to a full buffer. Returns False if event itself was dropped or merged."""
+        buffer = self.buffer
+        if self.policy == "drop-new":
+            self._drop(event[0])
+            return False
+        if self.policy == "coalesce":
+            if event[0] == "move":
+                # The resync that follows carries the snake past this move
+                self.coalesced += 1
+                self.needs_resync = True
+                return False
+            for index, buffered in enumerate(buffer):
+                if buffered[0] == "move":
+                    del buffer[index]
+                    self._drop("move")
+                    return True
+        self._drop(buffer.popleft()[0])
+        return True
+
+    def _drop(self, kind):
+        """Counts a lost event (condition held)."""
+        self.dropped[kind] += 1
+        if kind in SNAKE_EVENTS:
+            self.needs_resync = True
+
+    def stats(self):
+        """
+        Counters: published, written, buffered, coalesced, dropped (by kind),
+        bytes, errors and lagging (spectators a SocketSink cut off).
+        """
+        with self.condition:
+            return {
+                "published": self.published,
+                "written": self.written,
+                "buffered": len(self.buffer),
+                "coalesced": self.coalesced,
+                "dropped": dict(self.dropped),
+                "bytes": self.bytes_written,
+                "errors": self.errors,
+                "lagging": getattr(self.sink, "lagging", 0),
+            }
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """
+        Writes out what is still buffered and stops the writer thread. A writer
+        stuck on its sink for longer than timeout seconds is abandoned (it is a
+        daemon thread) and the sink is closed anyway; whatever that writer
+        still tries to write fails and is counted as dropped.
+        """
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.thread.join(timeout)
+        self.sink.close()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.buffer and not self.closing:
+                    self.condition.wait()
+                if not self.buffer:
+                    return
+                batch = list(self.buffer)
+                self.buffer.clear()
+            encoded = []
+            chunks = []
+            for event in batch:
+                try:
+                    chunks.append(self.encode(*event))
+                except (TypeError, ValueError, struct.error) as error:
+                    # An event that cannot be encoded is dropped on its own
+                    self._lose([event], error)
+                    continue
+                encoded.append(event)
+            data = b"".join(chunks)
+            try:
+                self.sink.write(data)
+            except (OSError, ValueError) as error:
+                # A broken (or already closed) sink loses events, never the game
+                self._lose(encoded, error)
+                continue
+            self.written += len(encoded)
+            self.bytes_written += len(data)
+
+    def _lose(self, events, error):
+        with self.condition:
+            for event in events:
+                self._drop(event[0])
+            self.errors += 1
+            self.last_error = error
+
+
+class GatedSink:
+    """Keeps what is written in memory; writes wait while the gate is shut, to starve the feed."""
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+        self.data = bytearray()
+
+    def write(self, data):
+        self.gate.wait()
+        self.data += data
+
+    def close(self):
+        self.gate.set()
+
+
+def check_spectator(policy, games=4, capacity=16, period=400, stall=40, max_steps=3000, seed=0):
+    """
+    Plays autopilot games into binary feeds whose writer is stuck for stall
+    steps out of every period, rebuilds the snake from what was written and
+    compares it with the simulation's after every step where the rebuilt
+    snake is complete. Returns (steps compared, steps that differed, summed
+    feed stats).
+    """
+    from simulation import Simulation
+    from autopilot import Autopilot
+    compared = differed = 0
+    totals = Counter()
+    for game in range(games):
+        sim = Simulation("Classic" if game % 2 == 0 else "Obstacle", seed=seed + game)
+        autopilot = Autopilot(sim)
+        sink = GatedSink()
+        feed = EventFeed(sink, "binary", capacity, policy)
+        publish_start(feed, sim)
+        snapshots = {sim.steps: list(sim.body.cells)}
+        while not sim.is_game_over and sim.steps < max_steps:
+            stalled = sim.steps % period >= period - stall
+            if stalled:
+                sink.gate.clear()
+            else:
+                sink.gate.set()
+            result = sim.step(autopilot.next_action())
+            publish_step(feed, sim, result)
+            snapshots[sim.steps] = list(sim.body.cells)
+            # Between stalls the writer keeps up, as it does at game speed
+            while not stalled and feed.stats()["buffered"]:
+                time.sleep(0.0001)
+        feed.close(timeout=None)
+        events, _ = decode_binary(bytes(feed.sink.data))
+        body = SpectatorBody()
+        for index, event in enumerate(events):
+            body.apply(event)
+            # Compare once all of a step's events are in
+            last_of_step = index + 1 == len(events) or events[index + 1]["step"] != event["step"]
+            if last_of_step and body.complete:
+                compared += 1
+                differed += list(body.cells) != snapshots[event["step"]]
+        stats = feed.stats()
+        totals.update(published=stats["published"], written=stats["written"],
+                      coalesced=stats["coalesced"], dropped=sum(stats["dropped"].values()),
+                      resyncs=sum(event["type"] == "resync" for event in events))
+    return compared, differed, totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print a game's event feed as JSON lines.")
+    parser.add_argument("source", nargs="?", help="HOST:PORT of a game started with --feed-port, or a feed file")
+    parser.add_argument("--format", choices=FORMATS, default="json", help="the feed's encoding")
+    parser.add_argument("--check", action="store_true",
+                        help="instead, check that spectators rebuild the snake from starved feeds")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        for policy in POLICIES:
+            compared, differed, totals = check_spectator(policy)
+            status = "OK" if compared and not differed else f"{differed} steps differ"
+            print(f"{policy}: snake compared after {compared} steps: {status} "
+                  f"({totals['written']}/{totals['published']} events written, {totals['coalesced']} moves "
+                  f"coalesced, {totals['dropped']} dropped, {totals['resyncs']} resyncs)")
+        return
+    if args.source is None:
+        parser.error("a source is needed unless --check is given")
+
+    host, _, port = args.source.rpartition(":")
+    if host and port.isdigit():
+        stream = socket.create_connection((host, int(port))).makefile("rb")
+    else:
+        stream = open(args.source, "rb")
+    pending = b""
+    with stream:
+        for chunk in iter(lambda: stream.read1(65536), b""):
+            if args.format == "json":
+                sys.stdout.write(chunk.decode())
+                continue
+            pending += chunk
+            events, used = decode_binary(pending)
+            pending = pending[used:]
+            for event in events:
+                print(json.dumps(event, separators=(",", ":")))
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
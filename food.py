@@ -1,116 +1,99 @@
-from turtle import Turtle
-import random
-import time
 import math
+from camera import Camera
 
-class Food(Turtle):
-    """Class representing the regular food."""
-    def __init__(self):
-        super().__init__()
-        self.shape("circle")
-        self.penup()
-        self.color("red")
-        self.shapesize(stretch_wid=0.6, stretch_len=0.6)
-        self.speed("fastest")
-        self.obstacles_list = []
-        self.refresh()
+class Food:
+    """
+    Class representing the regular food.
+    Its shape is taken from the renderer's pool while the food is in view and
+    given back when it is hidden.
+    """
+    color = "red"
+    scale = 0.6
 
-    def refresh(self, obstacles=None):
-        """Moves the food to a random position not occupied by obstacles."""
-        if obstacles is not None:
-            self.obstacles_list = obstacles
-        
-        max_attempts = 50
-        for _ in range(max_attempts):
-            random_x = random.randint(-280, 280)
-            random_y = random.randint(-280, 280)
-            random_x = (random_x // 20) * 20
-            random_y = (random_y // 20) * 20
-            
-            collision = False
-            for obs in self.obstacles_list:
-                # Increased buffer to 40 to prevent food spawning too close to walls
-                if abs(obs.xcor() - random_x) < 40 and abs(obs.ycor() - random_y) < 40:
-                    collision = True
-                    break
-            
-            if not collision:
-                self.goto(random_x, random_y)
-                return
-        
-        self.goto(random_x, random_y)
+    def __init__(self, renderer, camera=None):
+        self.renderer = renderer
+        self.pool = renderer.pool
+        self.camera = camera if camera is not None else Camera()
+        self.cell = None
+        # Pixel position while in view, else None
+        self.position = None
+        self.item = None
 
-class BonusFood(Turtle):
+    def refresh(self, cell):
+        """Moves the food to the grid cell chosen by the simulation."""
+        self.cell = cell
+        # None: no free cell left on the board
+        self.position = self.camera.to_pixels(cell) if cell is not None else None
+        if self.position is None:
+            self._release()
+        elif self.item is None:
+            self.item = self.pool.acquire_cell(*self.position, self.color, self.scale, "circle")
+        else:
+            self.renderer.move_cell(self.item, *self.position, self.scale)
+
+    def reposition(self):
+        """Follows a camera move."""
+        self.refresh(self.cell)
+
+    def hide(self):
+        self.position = None
+        self._release()
+
+    def _release(self):
+        if self.item is not None:
+            self.pool.release(self.item)
+            self.item = None
+
+class BonusFood:
     """Class representing temporary bonus food (Golden Apple)."""
-    def __init__(self):
-        super().__init__()
-        self.shape("circle")
-        self.penup()
-        self.color("gold")
-        self.shapesize(stretch_wid=0.8, stretch_len=0.8)
-        self.speed("fastest")
+    def __init__(self, renderer, camera=None):
+        self.renderer = renderer
+        self.pool = renderer.pool
+        self.camera = camera if camera is not None else Camera()
+        self.cell = None
+        self.position = None
+        self.item = None
+        self.scale = 0.8
         self.is_active = False
-        self.obstacles_list = []
-        self.spawn_time = 0
         self.pulse_phase = 0
-        self.hideturtle()
-    
-    def spawn(self, obstacles=None):
-        if obstacles is not None:
-            self.obstacles_list = obstacles
-        
-        max_attempts = 50
-        for _ in range(max_attempts):
-            random_x = random.randint(-260, 260)
-            random_y = random.randint(-260, 260)
-            random_x = (random_x // 20) * 20
-            random_y = (random_y // 20) * 20
-            
-            collision = False
-            for obs in self.obstacles_list:
-                # Increased buffer to 40 to prevent food spawning too close to walls
-                if abs(obs.xcor() - random_x) < 40 and abs(obs.ycor() - random_y) < 40:
-                    collision = True
-                    break
-            
-            if not collision:
-                self.goto(random_x, random_y)
-                self.showturtle()
-                self.is_active = True
-                self.spawn_time = time.time()
-                self.pulse_phase = 0
-                return
-        
-        self.goto(random_x, random_y)
-        self.showturtle()
+
+    def spawn(self, cell):
+        self.cell = cell
         self.is_active = True
-        self.spawn_time = time.time()
         self.pulse_phase = 0
-    
+        self.reposition()
+
+    def reposition(self):
+        """Follows a camera move."""
+        if self.cell is None or not self.is_active:
+            return
+        self.position = self.camera.to_pixels(self.cell)
+        if self.position is None:
+            self._release()
+        elif self.item is None:
+            self.item = self.pool.acquire_cell(*self.position, "gold", self.scale, "circle")
+        else:
+            self.renderer.move_cell(self.item, *self.position, self.scale)
+
     def hide(self):
-        self.hideturtle()
+        self._release()
         self.is_active = False
-    
+
+    def _release(self):
+        if self.item is not None:
+            self.pool.release(self.item)
+            self.item = None
+
     def animate(self):
-        if not self.is_active:
+        if not self.is_active or self.item is None:
             return
-        
+
         self.pulse_phase += 0.2
-        size = 0.9 + 0.3 * math.sin(self.pulse_phase)
-        self.shapesize(stretch_wid=size, stretch_len=size)
-        
+        self.scale = 0.9 + 0.3 * math.sin(self.pulse_phase)
+        self.renderer.move_cell(self.item, *self.position, self.scale)
+
         # Flash effect
         if int(self.pulse_phase * 2) % 2 == 0:
-            self.color("#FFFF00") # Yellow
+            self.renderer.configure(self.item, color="#FFFF00") # Yellow
         else:
-            self.color("#FFD700") # Gold
-    
-    def check_expiration(self):
-        if not self.is_active:
-            return False
-        
-        elapsed = time.time() - self.spawn_time
-        if elapsed >= 5.0:
-            self.hide()
-            return True
-        return False
+            self.renderer.configure(self.item, color="#FFD700") # Gold
@@ -1,245 +1,251 @@
-from turtle import Screen, Turtle
-import time
-import os
-import random
 from snake import Snake
 from food import Food, BonusFood
 from scoreboard import Scoreboard
 from modes import ClassicMode, ObstacleMode
-
-# Sound support
-try:
-    import pygame
-    pygame.mixer.init()
-    SOUND_AVAILABLE = True
-except ImportError:
-    SOUND_AVAILABLE = False
+from simulation import Simulation, ARENA_LIMIT
+from camera import Camera, window_size
+from particles import ParticleSystem, ParticleView
+from effects import EffectScheduler
+from timing import FrameClock, LatencyStats
+from compositor import Compositor
+from ui import Panel, Label, Button, TextButton
+from storage import ScoreStore, DATA_DIR
+from profiler import FrameProfiler
+from replay import Recorder
+from autopilot import Autopilot
+from audio import AudioSystem
+from renderer import create_renderer
+from feed import publish_start, publish_step
 
 class Game:
     """
     The main game class that manages the screen, game loop, and game elements.
     It coordinates the Snake, Food, Scoreboard, and Game Modes.
     """
-    def __init__(self):
-        self.screen = Screen()
-        self.screen.setup(width=680, height=720)
-        self.screen.bgcolor("black") # Start with black menu
-        self.screen.title("Snake — Classic")
-        self.screen.tracer(0)
-
-        self.width = 680
-        self.height = 720
+    def __init__(self, arena_size=None, renderer="turtle", data_dir=DATA_DIR, feed=None):
+        # arena_size is the board's width in cells (odd; default 33, at most 501)
+        limit = ARENA_LIMIT if arena_size is None else arena_size // 2
+        # The window always shows the standard board; larger arenas scroll
+        self.camera = Camera(limit)
+        self.width, self.height = window_size(self.camera.view_limit)
+
+        # Everything is drawn through the renderer: "turtle", "pygame" or "null"
+        self.renderer = create_renderer(renderer, self.width, self.height, "Snake — Classic")
+        self.renderer.background("black") # Start with black menu
         
+        # The simulation owns all game state and rules; this class renders it
+        self.sim = Simulation(limit=limit)
+
         # Dictionary of available game modes
         self.modes = {
-            "Classic": ClassicMode(self.width, self.height),
-            "Obstacle": ObstacleMode(self.width, self.height)
+            "Classic": ClassicMode(self.renderer, self.width, self.height, self.sim.arenas["Classic"], self.camera),
+            "Obstacle": ObstacleMode(self.renderer, self.width, self.height, self.sim.arenas["Obstacle"], self.camera)
         }
         self.current_mode_name = "Classic"
         self.mode = self.modes[self.current_mode_name]
 
         # Initialize game objects: Snake, Food, Bonus Food, Scoreboard
-        self.snake = Snake()
-        self.food = Food()
-        self.bonus_food = BonusFood()
-        self.scoreboard = Scoreboard()
-        
-        self.effect_pen = Turtle()
-        self.effect_pen.hideturtle()
-        self.effect_pen.penup()
+        self.snake = Snake(self.renderer, self.sim.body, self.camera)
+        self.food = Food(self.renderer, self.camera)
+        self.bonus_food = BonusFood(self.renderer, self.camera)
+        # High scores and run history are written on a background thread
+        self.store = ScoreStore(data_dir)
+        self.recorder = Recorder()
+        self.autopilot = Autopilot(self.sim)
+        self.autopilot_enabled = False
+        # Optional live event stream (feed.EventFeed) for spectators and analytics
+        self.feed = feed
+        self.scoreboard = Scoreboard(self.renderer, self.store)
         
         self.is_running = False
         self.is_paused = False
         self.is_game_over = False
         
-        self.base_speed = 100
-        self.speed_step = 4
-        self.min_speed = 30
-        self.speed_level = 0
         self.tick_ms = 20
-        self.tick_accumulator = 0
+        self.clock = FrameClock(self.tick_ms, clock=self.renderer.clock)
+        # Per-phase frame timings, toggled with F3
+        self.profiler = FrameProfiler()
+        # Key-to-step latency of turns, grouped by step delay (speed level)
+        self.input_latency = LatencyStats()
+        # Collects changes so each frame flushes the renderer at most once
+        self.compositor = Compositor(self.renderer)
+        self.loop_scheduled = False
         
-        self.slow_motion_active = False
+        # Timed visual effects, advanced by the game loop instead of sleeping
+        self.effects = EffectScheduler()
         
-        # Level System
-        self.level = 1
-        self.foods_eaten = 0
-        self.last_level_score = 0
+        # Level colors
         self.colors = ["white", "#3498db", "#e74c3c", "#9b59b6", "#f1c40f", "#2ecc71"] # White, Blue, Red, Purple, Yellow, Green
         
         # Particles
-        self.particles = []
+        # Reseeded with every game, so particle bursts replay identically too
+        self.particles = ParticleSystem(rng=self.sim.streams["particles"])
+        self.particle_view = ParticleView(self.particles, self.renderer)
         
-        # Sound
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        sound_path = os.path.join(script_dir, "munch-sound-effect.mp3")
-        if SOUND_AVAILABLE and os.path.exists(sound_path):
-            self.munch_sound = pygame.mixer.Sound(sound_path)
-        else:
-            self.munch_sound = None
+        # Sound is loaded in the background once the menu is up
+        self.audio = AudioSystem()
 
         self._bind_keys()
         
-        self.menu_pen = Turtle()
-        self.menu_pen.hideturtle()
-        self.menu_pen.penup()
+        # Menu and game over screens are built once and only shown/hidden
+        self._build_ui()
         
         # Set up initial state
         self.hide_game_objects()
         self.show_menu()
+        # The menu has been drawn; pygame and the sound files load behind it
+        self.audio.start()
         
         # Listen for mouse clicks on the screen
-        self.screen.onscreenclick(self.handle_click)
+        self.renderer.on_click(self.handle_click)
 
     def hide_game_objects(self):
         self.snake.hide() 
-        self.food.goto(1000, 1000)
+        self.food.hide()
         self.bonus_food.hide()
         self.scoreboard.clear()
         if hasattr(self.mode, 'clear'):
             self.mode.clear()
-        self.effect_pen.clear()
+        self.banner.hide()
         # Clear particles
-        for p in self.particles:
-            p["t"].hideturtle()
-            p["t"].clear()
         self.particles.clear()
+        self.particle_view.draw()
 
     def _bind_keys(self):
         """Set up keyboard bindings for controlling the snake."""
-        self.screen.listen()
-        self.screen.onkey(self.snake.up, "Up")
-        self.screen.onkey(self.snake.down, "Down")
-        self.screen.onkey(self.snake.left, "Left")
-        self.screen.onkey(self.snake.right, "Right")
-        self.screen.onkey(self.toggle_pause, "p")
-        self.screen.onkey(self.start_game, "space")
+        self.renderer.on_key("Up", self.snake.up)
+        self.renderer.on_key("Down", self.snake.down)
+        self.renderer.on_key("Left", self.snake.left)
+        self.renderer.on_key("Right", self.snake.right)
+        self.renderer.on_key("p", self.toggle_pause)
+        self.renderer.on_key("space", self.start_game)
+        self.renderer.on_key("F3", self.toggle_profiler)
 
     def play_sound(self):
-        if self.munch_sound:
-            try:
-                self.munch_sound.play()
-            except:
-                pass
+        self.audio.play("munch")
+
+    def _build_ui(self):
+        renderer = self.renderer
+
+        self.menu_panel = Panel()
+        self.menu_panel.add(Label(renderer, 0, 150, "SNAKE", "#2ecc71", ("Courier", 80, "bold")))
+        self.menu_panel.add(Label(renderer, 0, 100, "CLASSIC EDITION", "white", ("Courier", 20, "normal")))
+        
+        # Mode Buttons
+        self.mode_buttons = {}
+        start_x = -170
+        for m in self.modes:
+            button = TextButton(renderer, start_x, -50, m, lambda m=m: self.set_mode(m))
+            self.mode_buttons[m] = self.menu_panel.add(button)
+            start_x += 170
+        # Autopilot is a toggle on top of the selected mode
+        self.autopilot_button = self.menu_panel.add(
+            TextButton(renderer, start_x, -50, "Autopilot", self.toggle_autopilot, w=120))
+        self.menu_panel.add(Button(renderer, 0, -150, "START GAME", "#2ecc71", "black", self.start_game, w=240, h=60))
+
+        self.game_over_panel = Panel()
+        self.game_over_panel.add(Button(renderer, 0, -20, "PLAY AGAIN", "#2ecc71", "black", self.start_game, w=200, h=60))
+        self.game_over_panel.add(Button(renderer, 0, -100, "MENU", "#3498db", "black", self.show_menu, w=200, h=60))
+        self.game_over_panel.add(Button(renderer, 0, -180, "QUIT", "#e74c3c", "black", renderer.close, w=200, h=60))
+
+        # Profiler overlay, to the left under the scoreboard
+        self.profiler_label = Label(renderer, -330, 120, "", "#95a5a6", ("Courier", 9, "normal"), align="left")
+        # Level up and bonus banners in the middle of the screen
+        self.banner = Label(renderer, 0, 0, "", "white", ("Courier", 40, "bold"))
+
+    def toggle_profiler(self):
+        self.profiler.toggle()
+        if self.profiler.enabled:
+            self.profiler_label.show()
+        else:
+            self.profiler_label.hide()
+        self.compositor.mark("profiler")
 
     def set_mode(self, mode_name):
         if mode_name in self.modes:
             self.current_mode_name = mode_name
             self.mode = self.modes[mode_name]
             self.scoreboard.set_mode(mode_name)
-            self.show_menu()
+            self._select_mode_button()
+            self.renderer.flush()
+
+    def _select_mode_button(self):
+        for name, button in self.mode_buttons.items():
+            button.select(name == self.current_mode_name)
+        self.autopilot_button.select(self.autopilot_enabled)
+
+    def toggle_autopilot(self):
+        self.autopilot_enabled = not self.autopilot_enabled
+        self._select_mode_button()
+        self.renderer.flush()
 
     def show_menu(self):
         """Displays the main menu with Start Game, Mode selection, etc."""
         if self.is_running:
             return
             
-        self.screen.bgcolor("black")
+        self.renderer.background("black")
         self.hide_game_objects()
-        self.menu_pen.clear()
+        self.game_over_panel.hide()
         self.is_game_over = False
         
-        self.menu_pen.goto(0, 150)
-        self.menu_pen.color("#2ecc71")
-        self.menu_pen.write("SNAKE", align="center", font=("Courier", 80, "bold"))
-        
-        self.menu_pen.goto(0, 100)
-        self.menu_pen.color("white")
-        self.menu_pen.write("CLASSIC EDITION", align="center", font=("Courier", 20, "normal"))
+        self._select_mode_button()
+        self.menu_panel.show()
         
-        # Draw Mode Buttons
-        modes = ["Classic", "Obstacle"]
-        start_x = -100
-        for m in modes:
-            if m == self.current_mode_name:
-                color = "#2ecc71"
-                font_type = "bold"
-            else:
-                color = "#7f8c8d"
-                font_type = "normal"
-                
-            self._draw_text_button(start_x, -50, m, color, font_type)
-            start_x += 200
-            
-        self._draw_button(0, -150, "START GAME", "#2ecc71", "black", w=240, h=60)
-        
-        self.screen.update()
-
-    def _draw_text_button(self, x, y, label, color, font_type):
-        self.menu_pen.goto(x, y)
-        self.menu_pen.color(color)
-        self.menu_pen.write(label, align="center", font=("Courier", 16, font_type))
-        if font_type == "bold":
-            self.menu_pen.goto(x - 40, y - 5)
-            self.menu_pen.pendown()
-            self.menu_pen.forward(80)
-            self.menu_pen.penup()
-
-    def _draw_button(self, x, y, label, color, text_color, w=160, h=50):
-        self.menu_pen.goto(x - w/2, y - h/2)
-        self.menu_pen.pencolor(color)
-        self.menu_pen.fillcolor(color)
-            
-        self.menu_pen.begin_fill()
-        for _ in range(2):
-            self.menu_pen.forward(w)
-            self.menu_pen.left(90)
-            self.menu_pen.forward(h)
-            self.menu_pen.left(90)
-        self.menu_pen.end_fill()
-        
-        self.menu_pen.goto(x, y - 12)
-        self.menu_pen.color(text_color)
-        self.menu_pen.write(label, align="center", font=("Courier", 20, "bold"))
+        self.renderer.flush()
 
     def handle_click(self, x, y):
-        if self.is_running:
+        if self.is_running or self.effects.active:
             return
 
-        if self.is_game_over:
-            if -100 <= x <= 100 and -50 <= y <= 10:
-                self.start_game()
-            elif -100 <= x <= 100 and -130 <= y <= -70:
-                self.show_menu()
-            elif -100 <= x <= 100 and -210 <= y <= -150:
-                self.screen.bye()
-            return
-
-        if -120 <= x <= 120 and -180 <= y <= -120:
-            self.start_game()
-            return
-
-        if -150 <= x <= -50 and -60 <= y <= -30:
-            self.set_mode("Classic")
-        elif 50 <= x <= 150 and -60 <= y <= -30:
-            self.set_mode("Obstacle")
+        panel = self.game_over_panel if self.is_game_over else self.menu_panel
+        button = panel.hit(x, y)
+        if button:
+            button.action()
 
     def start_game(self):
         """Initializes game state and starts the game loop."""
         if self.is_running:
             return
             
-        self.menu_pen.clear()
-        self.screen.bgcolor("black")
+        # Drop any leftover game over animation
+        self.effects.clear()
+        self.banner.hide()
+        self.menu_panel.hide()
+        self.game_over_panel.hide()
+        self.renderer.background("black")
         self.is_running = True
         self.is_paused = False
         self.is_game_over = False
         
+        self.sim.set_mode(self.current_mode_name)
+        self.sim.reset()
+        self.recorder.start(self.sim.mode_name, self.sim.seed, self.sim.arena.limit)
+        if self.feed is not None:
+            publish_start(self.feed, self.sim)
+        if self.autopilot_enabled:
+            # Build the path tables now rather than on the first step
+            self.autopilot.sync()
+            self.autopilot.reset()
+        self.camera.reset(self.sim.body.head)
         self.snake.reset()
         self.snake.set_color("white") # Reset color
         self.scoreboard.reset()
-        self.speed_level = 0
-        self.slow_motion_active = False
-        
-        self.level = 1
-        self.foods_eaten = 0
+        # Autopilot games do not count towards high scores
+        self.scoreboard.record_high_scores = not self.autopilot_enabled
         
         self.mode.setup()
-        self.food.refresh(self.mode.obstacles)
+        self.food.refresh(self.sim.food)
         self.bonus_food.hide()
         
-        self.tick_accumulator = 0
-        self.screen.ontimer(self.game_loop, self.tick_ms)
+        self.compositor.mark("start")
+        self.clock.start()
+        if not self.loop_scheduled:
+            self.schedule_frame()
+
+    def schedule_frame(self, delay=None):
+        self.loop_scheduled = True
+        self.renderer.after(self.tick_ms if delay is None else delay, self.game_loop)
 
     def toggle_pause(self):
         if not self.is_running:
@@ -247,168 +253,203 @@ class Game:
         self.is_paused = not self.is_paused
 
     def get_current_delay(self):
-        base_delay = max(self.min_speed, self.base_speed - self.speed_level * self.speed_step)
-        
-        if self.slow_motion_active:
-            return base_delay + 50
-            
-        return base_delay
+        return self.sim.get_current_delay()
 
-    def level_up(self):
-        """Increases the level, speeds up the game, and changes snake color."""
-        self.level += 1
+    def level_up(self, result):
+        """Shows the new level: redraws obstacles and changes snake color."""
+        level = self.sim.level
         
-        # Regenerate obstacles if in Obstacle Mode
-        if self.current_mode_name == "Obstacle" and hasattr(self.mode, 'generate_obstacles'):
-            self.mode.generate_obstacles(self.level, self.snake.segments)
-            # Refresh food position to ensure it's not inside a new obstacle
-            self.food.refresh(self.mode.obstacles)
-            # If bonus food is active, we might want to check it too, or just hide it to be safe/simple
+        # Obstacle Mode regenerates its layout (and moves the food) on level up
+        if result.obstacles_changed:
+            self.mode.setup()
+            self.food.refresh(self.sim.food)
             if self.bonus_food.is_active:
                 self.bonus_food.hide()
 
         # Visual Feedback
-        color_idx = (self.level - 1) % len(self.colors)
+        color_idx = (level - 1) % len(self.colors)
         new_color = self.colors[color_idx]
         self.snake.set_color(new_color)
         
         # Flash Level Up
-        self.effect_pen.clear()
-        self.effect_pen.goto(0, 0)
-        self.effect_pen.color(new_color)
-        self.effect_pen.write(f"LEVEL {self.level}", align="center", font=("Courier", 40, "bold"))
-        self.screen.update()
-        time.sleep(0.5)
-        self.effect_pen.clear()
+        self.show_banner(f"LEVEL {level}", new_color, 40)
+
+    def show_banner(self, text, color, size, duration_ms=500):
+        """Writes text in the middle of the screen for a while."""
+        self.effects.finish("banner")
+        self.banner.set(text=text, color=color, font=("Courier", size, "bold"))
+        self.banner.show()
+        self.compositor.mark("effects")
+        self.effects.add(duration_ms, on_end=self.banner.hide, key="banner")
 
     def shake_screen(self):
-        original = self.screen.bgcolor()
-        self.screen.bgcolor("#2c3e50") # Dark Blue Grey
-        self.screen.update()
-        time.sleep(0.05)
-        self.screen.bgcolor(original)
+        self.effects.finish("shake")
+        self.renderer.background("#2c3e50") # Dark Blue Grey
+        self.effects.add(50, on_end=lambda: self.renderer.background("black"), key="shake")
 
     def create_particles(self, x, y, color):
-        for _ in range(8):
-            p = Turtle("square")
-            p.shapesize(0.3, 0.3)
-            p.penup()
-            p.goto(x, y)
-            p.color(color)
-            p.setheading(random.randint(0, 360))
-            self.particles.append({"t": p, "life": 15, "speed": random.randint(5, 12)})
+        self.particles.emit(x, y, color)
 
     def update_particles(self):
-        for p in self.particles[:]:
-            p["t"].forward(p["speed"])
-            p["life"] -= 1
-            if p["life"] <= 0:
-                p["t"].hideturtle()
-                p["t"].clear()
-                self.particles.remove(p)
+        self.particles.update()
+        if self.particle_view.draw():
+            self.compositor.mark("particles")
 
     def game_loop(self):
-        """The main game loop. Moves the snake, checks collisions, and updates the screen."""
+        """The main game loop. Steps the simulation and renders the result."""
+        self.loop_scheduled = False
         if not self.is_running:
+            # Keep animating effects (e.g. the game over blink) after the game ends
+            if self.effects.active:
+                if self.effects.update(self.clock.tick()):
+                    self.compositor.mark("effects")
+                self.compositor.flush()
+                self.schedule_frame()
             return
 
         if self.is_paused:
-            self.screen.update()
-            self.screen.ontimer(self.game_loop, self.tick_ms)
+            self.clock.skip()
+            self.compositor.flush()
+            self.schedule_frame()
             return
 
+        profiler = self.profiler
+        profiler.begin_frame()
+
+        if self.effects.update(self.clock.tick()):
+            self.compositor.mark("effects")
+        profiler.mark("effects")
+
         if self.bonus_food.is_active:
             self.bonus_food.animate()
-            if self.bonus_food.check_expiration():
-                pass
+            self.compositor.mark("bonus")
+        profiler.mark("bonus")
 
         # Update particles every frame
         self.update_particles()
-
-        self.tick_accumulator += self.tick_ms
-        delay = self.get_current_delay()
-        
-        did_move = False
-        if self.tick_accumulator >= delay:
-            self.snake.move()
-            self.tick_accumulator -= delay
-            did_move = True
-            self.screen.update()
-
-        if did_move:
-            if self.snake.head.distance(self.food) < 15:
-                self.play_sound()
-                self.shake_screen()
-                self.create_particles(self.food.xcor(), self.food.ycor(), self.food.color()[0])
-                
-                self.food.refresh(self.mode.obstacles)
-                self.snake.extend()
-                
-                # Score depends on level
-                points = 1 * self.level
-                self.scoreboard.increase_score(points)
-                
-                self.foods_eaten += 1
-                self.speed_level += 1
-                
-                # Level Up Check
-                if self.foods_eaten % 5 == 0:
-                    self.level_up()
-                
-                if self.slow_motion_active:
-                    self.slow_motion_active = False
-                    self.effect_pen.clear()
-                
-                if self.foods_eaten % 5 == 0 and not self.bonus_food.is_active:
-                    self.bonus_food.spawn(self.mode.obstacles)
-
-            if self.bonus_food.is_active and self.snake.head.distance(self.bonus_food) < 15:
-                self.play_sound()
-                self.bonus_food.hide()
-                self.create_particles(self.bonus_food.xcor(), self.bonus_food.ycor(), "gold")
-                self.scoreboard.increase_score(5 * self.level)
-                self.slow_motion_active = True
-                
-                self.effect_pen.clear()
-                self.effect_pen.goto(0, 0)
-                self.effect_pen.color("#f1c40f")
-                self.effect_pen.write("SLOW MOTION!", align="center", font=("Courier", 30, "bold"))
-                self.screen.update()
-                time.sleep(0.5)
-                self.effect_pen.clear()
-
-            for segment in self.snake.segments[1:]:
-                if self.snake.head.distance(segment) < 10:
-                    self.game_over()
-                    return
-
-            if self.mode.check_collision(self.snake):
-                self.game_over()
-                return
-
-        self.screen.update()
-        self.screen.ontimer(self.game_loop, self.tick_ms)
+        profiler.mark("particles")
+
+        # Catch up on every step that is due (bounded by the clock)
+        while self.is_running and self.clock.consume(self.get_current_delay()):
+            delay = self.get_current_delay()
+            turn = self.snake.take_turn()
+            if self.autopilot_enabled:
+                self.snake.turn_queue.clear()
+                turn = self.autopilot.next_action()
+            elif turn is not None:
+                self.input_latency.record(delay, self.snake.last_turn_latency_ms)
+            if turn is not None:
+                self.recorder.record(self.sim.steps + 1, turn)
+            # Movement, food/bonus checks, self and wall collisions
+            result = self.sim.step(turn)
+            if self.feed is not None:
+                publish_step(self.feed, self.sim, result)
+            profiler.mark("sim")
+            if self.camera.follow(self.sim.body.head):
+                self.scroll_view()
+            else:
+                self.snake.move()
+            self.compositor.mark("snake")
+            profiler.mark("snake")
+            self.render_step(result)
+            profiler.mark("events")
+
+        if self.scoreboard.refresh():
+            self.compositor.mark("scoreboard")
+        if profiler.enabled and profiler.frames % 25 == 0:
+            items = self.renderer.pool.stats()
+            text = profiler.overlay_text() + f"\nitems    {items['live']} live {items['pooled']} pooled"
+            redraws = self.compositor.stats()
+            text += f"\nredraws  {redraws['flushes']} of {redraws['frames']} frames, {redraws['skipped']} skipped"
+            # Key-to-step latency of turns at the current speed
+            delay = self.get_current_delay()
+            if delay in self.input_latency.samples:
+                count, total, worst = self.input_latency.samples[delay]
+                text += f"\nturns    {total / count:.1f} mean {worst:.1f} max ms at {delay} ms/step ({count})"
+            if self.feed is not None:
+                feed = self.feed.stats()
+                text += f"\nfeed     {feed['written']} sent {sum(feed['dropped'].values())} dropped"
+            self.profiler_label.set(text=text)
+            self.compositor.mark("profiler")
+
+        redrew = self.compositor.flush()
+        profiler.mark("flush")
+        profiler.end_frame(redrew)
+        self.schedule_frame(self.clock.next_delay(self.get_current_delay()))
+
+    def scroll_view(self):
+        """Redraws what is in view after the camera recentred (large arenas only)."""
+        self.snake.redraw()
+        self.mode.scroll()
+        self.food.reposition()
+        if self.bonus_food.is_active:
+            self.bonus_food.reposition()
+        # Particles are in screen space; drop them rather than let them drift
+        self.particles.clear()
+        self.compositor.mark("camera")
+
+    def render_step(self, result):
+        """Plays the effects of a simulation step."""
+        if result.bonus_expired:
+            self.bonus_food.hide()
+            self.compositor.mark("bonus")
+
+        if result.ate_food:
+            self.play_sound()
+            self.shake_screen()
+            if self.food.position is not None:
+                self.create_particles(*self.food.position, self.food.color)
+            
+            self.food.refresh(self.sim.food)
+            self.compositor.mark("food")
+            self.scoreboard.increase_score(result.food_points)
+            
+            if result.leveled_up:
+                self.level_up(result)
+            
+            if result.bonus_spawned:
+                self.bonus_food.spawn(self.sim.bonus)
+                self.compositor.mark("bonus")
+
+        if result.food_spawned:
+            self.food.refresh(self.sim.food)
+            self.compositor.mark("food")
+
+        if result.ate_bonus:
+            self.play_sound()
+            self.bonus_food.hide()
+            self.compositor.mark("bonus")
+            position = self.camera.to_pixels(result.ate_bonus)
+            if position is not None:
+                self.create_particles(*position, "gold")
+            self.scoreboard.increase_score(result.bonus_points)
+            self.show_banner("SLOW MOTION!", "#f1c40f", 30)
+
+        if result.game_over:
+            self.game_over()
 
     def game_over(self):
         self.is_running = False
         self.is_game_over = True
         self.scoreboard.game_over()
+        if not self.autopilot_enabled:
+            self.store.record_run(self.current_mode_name, self.sim.score, self.sim.level,
+                                  len(self.sim.body), self.sim.time_ms)
+        self.recorder.finish(self.sim)
+        self.store.save_replay(self.recorder.to_dict())
         
-        for _ in range(3):
-            for seg in self.snake.segments:
-                seg.hideturtle()
-            self.screen.update()
-            time.sleep(0.2)
-            for seg in self.snake.segments:
-                seg.showturtle()
-            self.screen.update()
-            time.sleep(0.2)
-            
+        # Blink the snake three times (200ms off, 200ms on), then show the buttons
+        blink = {"visible": True}
+
+        def on_frame(progress):
+            visible = int(progress * 6) % 2 == 1 or progress >= 1.0
+            if visible != blink["visible"]:
+                blink["visible"] = visible
+                self.snake.set_visible(visible)
+
+        self.effects.add(1200, on_frame=on_frame, on_end=self.show_game_over_screen, key="game_over")
+
+    def show_game_over_screen(self):
         self.hide_game_objects()
-        
-        self.menu_pen.clear()
-        
-        self._draw_button(0, -20, "PLAY AGAIN", "#2ecc71", "black", w=200, h=60)
-        self._draw_button(0, -100, "MENU", "#3498db", "black", w=200, h=60)
-        self._draw_button(0, -180, "QUIT", "#e74c3c", "black", w=200, h=60)
-        self.screen.update()
+        self.game_over_panel.show()
+        self.renderer.flush()
@@ -1,8 +1,72 @@
+import argparse
 from game_engine import Game
+from renderer import RENDERERS
+from simulation import MIN_ARENA_LIMIT, MAX_ARENA_LIMIT
+from feed import EventFeed, FileSink, SocketSink, FORMATS, POLICIES, DEFAULT_CAPACITY
 
 # Entry point of the application
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snake")
+    parser.add_argument("--arena-size", type=int, default=None,
+                        help=f"arena width and height in cells, odd, {2 * MIN_ARENA_LIMIT + 1} to "
+                             f"{2 * MAX_ARENA_LIMIT + 1} (default 33); larger arenas scroll with the snake")
+    parser.add_argument("--renderer", choices=RENDERERS, default="turtle",
+                        help="drawing backend: turtle (Tk), pygame, or null (headless: "
+                             "plays one autopilot game without a window)")
+    parser.add_argument("--max-steps", type=int, default=10000,
+                        help="with --renderer null, stop the game after this many steps (default 10000)")
+    parser.add_argument("--feed", metavar="PATH",
+                        help="stream game events to this file (- for stdout)")
+    parser.add_argument("--feed-port", type=int, metavar="PORT",
+                        help="serve game events to spectators on this local TCP port")
+    parser.add_argument("--feed-format", choices=FORMATS, default="json",
+                        help="JSON lines or compact binary events")
+    parser.add_argument("--feed-policy", choices=POLICIES, default="coalesce",
+                        help="what gives when the feed falls behind")
+    parser.add_argument("--feed-capacity", type=int, default=DEFAULT_CAPACITY,
+                        help="events buffered before the policy applies")
+    args = parser.parse_args()
+    if args.max_steps < 1:
+        parser.error("--max-steps must be at least 1")
+    if args.arena_size is not None:
+        # The snake's head sits on the middle cell, so the width must be odd
+        smallest, largest = 2 * MIN_ARENA_LIMIT + 1, 2 * MAX_ARENA_LIMIT + 1
+        if not smallest <= args.arena_size <= largest or args.arena_size % 2 == 0:
+            parser.error(f"--arena-size must be an odd number from {smallest} to {largest}, "
+                         f"got {args.arena_size}")
+    feed = None
+    if args.feed is not None or args.feed_port is not None:
+        sink = FileSink(args.feed) if args.feed is not None else SocketSink(args.feed_port)
+        feed = EventFeed(sink, args.feed_format, args.feed_capacity, args.feed_policy)
     # Create the Game object
-    game = Game()
-    # Start the game loop
-    game.screen.mainloop()
+    game = Game(arena_size=args.arena_size, renderer=args.renderer, feed=feed)
+    if args.renderer == "null":
+        # Nobody can press keys without a window: let the autopilot play a round
+        game.toggle_autopilot()
+        game.start_game()
+        # The menu keeps animating after game over, so stop on our own once the round
+        # ends; a good autopilot round could otherwise go on for a very long time
+        while game.is_running and game.sim.steps < args.max_steps and game.renderer.step():
+            pass
+        print(f"{game.sim.mode_name}: score {game.sim.score}, length {len(game.sim.body)}, "
+              f"{game.sim.steps} steps" + (" (stopped)" if game.is_running else ""))
+    else:
+        # Start the game loop
+        game.renderer.run()
+    # Finish any score writes still queued on the background thread
+    game.store.close()
+    game.audio.close()
+    if feed is not None:
+        feed.close()
+        stats = feed.stats()
+        if stats["dropped"] or stats["coalesced"] or stats["lagging"]:
+            print(f"Event feed: {stats['written']} events sent, {stats['coalesced']} moves coalesced, "
+                  f"dropped {stats['dropped']}, {stats['lagging']} lagging spectators disconnected")
+    # Keep the frame timings if the profiler was used (F3)
+    if game.profiler.frames:
+        game.profiler.export_csv("frame_profile.csv")
+        # Turn latency per speed level, to show how responsive each speed is
+        if game.input_latency.samples:
+            game.input_latency.export_csv("input_latency.csv")
+            print("Key-to-step latency of turns by step delay:")
+            print(game.input_latency.report())
@@ -1,172 +1,157 @@
-from turtle import Turtle
-import random
+from simulation import CELL_SIZE
+from camera import Camera
+
+# Layouts kept drawn (hidden) per mode; older ones give their items back to the pool
+MAX_CACHED_LAYOUTS = 8
+# Side (in cells) of the squares obstacles are bucketed into for culling in large arenas
+TILE_SIZE = 16
+
+def merge_wall_runs(cells):
+    """
+    Merges obstacle cells into rectangles (x0, y0, x1, y1), inclusive cell ranges.
+    Horizontal runs are merged first, then leftover single cells vertically.
+    """
+    runs = []
+    singles = []
+    row = sorted(cells, key=lambda c: (c[1], c[0]))
+    i = 0
+    while i < len(row):
+        x0, y = row[i]
+        j = i
+        while j + 1 < len(row) and row[j + 1] == (row[j][0] + 1, y):
+            j += 1
+        if j > i:
+            runs.append((x0, y, row[j][0], y))
+        else:
+            singles.append(row[i])
+        i = j + 1
+
+    column = sorted(singles)
+    i = 0
+    while i < len(column):
+        x, y0 = column[i]
+        j = i
+        while j + 1 < len(column) and column[j + 1] == (x, column[j][1] + 1):
+            j += 1
+        runs.append((x, y0, x, column[j][1]))
+        i = j + 1
+    return runs
+
+def bucket_tiles(cells, size=TILE_SIZE):
+    """Groups cells into {(tile x, tile y): [cells]}."""
+    tiles = {}
+    for cell in cells:
+        tiles.setdefault((cell[0] // size, cell[1] // size), []).append(cell)
+    return tiles
+
+class WallLayer:
+    """
+    One obstacle layout baked into renderer rectangles, shown or hidden as a whole.
+    origin is the world cell drawn at the centre of the screen. The rectangles
+    are taken from the renderer's pool (below everything else) and returned by
+    destroy().
+    """
+    def __init__(self, renderer, cells, color, origin=(0, 0)):
+        self.renderer = renderer
+        self.items = []
+        half = CELL_SIZE / 2
+        ox, oy = origin
+        for x0, y0, x1, y1 in merge_wall_runs(cells):
+            x0, x1, y0, y1 = x0 - ox, x1 - ox, y0 - oy, y1 - oy
+            self.items.append(renderer.pool.acquire(
+                "rect", x0 * CELL_SIZE - half, y0 * CELL_SIZE - half,
+                x1 * CELL_SIZE + half, y1 * CELL_SIZE + half, color, lowered=True))
+
+    def show(self):
+        for item in self.items:
+            self.renderer.configure(item, visible=True)
+
+    def hide(self):
+        for item in self.items:
+            self.renderer.configure(item, visible=False)
+
+    def destroy(self):
+        self.renderer.pool.release_all(self.items)
+        self.items.clear()
 
 class GameMode:
-    """Base class for different game modes."""
-    def __init__(self, width, height):
+    """
+    Base class for different game modes.
+    Rules and obstacle layouts live in the mode's simulation Arena;
+    this class only draws them. Each layout is baked once into a WallLayer
+    and reused whenever the same layout comes back.
+    In arenas larger than the window only the obstacles in view are drawn:
+    the layout is bucketed into tiles once, and each camera move rebuilds the
+    layer from the tiles around the view.
+    """
+    wall_color = "#8B4513"
+
+    def __init__(self, renderer, width, height, arena, camera=None):
+        self.renderer = renderer
         self.width = width
         self.height = height
-        self.obstacles = []
+        self.arena = arena
+        self.camera = camera if camera is not None else Camera(arena.limit)
+        self.layers = {}
+        self.layer = None
+        self.tiles = None
 
     def setup(self):
-        """Setup the stage (walls, obstacles)."""
-        pass
+        """Draw the stage (walls, obstacles) from the arena's current layout."""
+        self.clear()
+        if not self.camera.fixed:
+            self.tiles = bucket_tiles(self.arena.obstacles)
+            self.scroll()
+            return
+        key = frozenset(self.arena.obstacles)
+        layer = self.layers.pop(key, None)
+        if layer is None:
+            layer = WallLayer(self.renderer, key, self.wall_color)
+            if len(self.layers) >= MAX_CACHED_LAYOUTS:
+                # Evict the least recently used layout
+                oldest = next(iter(self.layers))
+                self.layers.pop(oldest).destroy()
+        else:
+            layer.show()
+        # Re-insert to mark as most recently used
+        self.layers[key] = layer
+        self.layer = layer
 
-    def check_collision(self, snake):
-        """Check for collisions specific to the mode."""
-        pass
+    def scroll(self):
+        """Redraws the obstacles in view after the camera moved (large arenas only)."""
+        if self.tiles is None:
+            return
+        if self.layer is not None:
+            self.layer.destroy()
+        cx, cy = self.camera.center
+        reach = self.camera.view_limit + 1
+        cells = []
+        for tx in range((cx - reach) // TILE_SIZE, (cx + reach) // TILE_SIZE + 1):
+            for ty in range((cy - reach) // TILE_SIZE, (cy + reach) // TILE_SIZE + 1):
+                for cell in self.tiles.get((tx, ty), ()):
+                    if self.camera.contains(cell):
+                        cells.append(cell)
+        self.layer = WallLayer(self.renderer, cells, self.wall_color, self.camera.center)
 
     def clear(self):
-        """Clear obstacles."""
-        for obs in self.obstacles:
-            obs.hideturtle()
-            obs.clear()
-            obs.goto(1000, 1000)
-        self.obstacles.clear()
-        
-    def _add_obstacle(self, x, y, color="#8B4513"):
-        obs = Turtle("square")
-        obs.penup()
-        obs.color(color) # Allow custom color
-        obs.goto(x, y)
-        self.obstacles.append(obs)
-        
-    def _create_wall_segment(self, c1, c2, c3, horizontal=True, color="#8B4513"):
-        if horizontal:
-            for x in range(c1, c2, 20):
-                self._add_obstacle(x, c3, color)
-        else:
-            for y in range(c2, c3, 20):
-                self._add_obstacle(c1, y, color)
+        """Hide obstacles."""
+        if self.layer is not None:
+            if self.tiles is not None:
+                # View layers are rebuilt on every camera move rather than cached
+                self.layer.destroy()
+            else:
+                self.layer.hide()
+            self.layer = None
+        self.tiles = None
 
 class ClassicMode(GameMode):
     """
     Classic Mode: Walls around the border with wrap-around effect.
     """
-    def setup(self):
-        self.clear()
-        # "Classic Walls" - Long, uniform grey walls at the edges
-        # Edges are at +/- 340 (Screen 680). Walls at +/- 340 (Overlapping edge).
-        # Length: Block most of the edge (540px), leaving ~70px open at corners.
-        # Grid Alignment: Must be multiples of 20.
-        # Range: -260 to 280 (exclusive) gives -260...260 (inclusive).
-        
-        wall_color = "#7f8c8d" # Concrete Grey
-        
-        # Top Edge (y=340)
-        self._create_wall_segment(-260, 280, 340, True, wall_color)
-        
-        # Bottom Edge (y=-340)
-        self._create_wall_segment(-260, 280, -340, True, wall_color)
-        
-        # Left Edge (x=-320)
-        self._create_wall_segment(-320, -260, 280, False, wall_color) # x=-320, y from -260 to 280
-        
-        # Right Edge (x=320)
-        self._create_wall_segment(320, -260, 280, False, wall_color) # x=320, y from -260 to 280
-
-    def check_collision(self, snake):
-        head = snake.head
-        
-        # Check obstacle collision first
-        for obs in self.obstacles:
-            if head.distance(obs) < 20:
-                return True
-        
-        # Wrap around logic (teleport)
-        limit_x = 330 # Window edge
-        limit_y = 330
-        
-        if head.xcor() > limit_x:
-            head.setx(-limit_x)
-        elif head.xcor() < -limit_x:
-            head.setx(limit_x)
-            
-        if head.ycor() > limit_y:
-            head.sety(-limit_y)
-        elif head.ycor() < -limit_y:
-            head.sety(limit_y)
-            
-        return False
+    wall_color = "#7f8c8d" # Concrete Grey
 
 class ObstacleMode(GameMode):
     """
     Obstacle Mode: Walls appear inside the map and change every few levels.
     """
-    def setup(self):
-        # Initial setup uses level 1 layout
-        self.generate_obstacles(1, [])
-
-    def generate_obstacles(self, level, snake_segments):
-        self.clear()
-        
-        # Store segments for collision checking in _add_obstacle
-        self.safe_segments = snake_segments
-        
-        layout_type = level % 4
-        
-        if layout_type == 1:
-            # Level 1, 5, 9...: The Classic Box (current default)
-            self._create_wall_segment(-200, -40, 200, True)
-            self._create_wall_segment(40, 220, 200, True)
-            self._create_wall_segment(-200, -40, -200, True)
-            self._create_wall_segment(40, 220, -200, True)
-            self._create_wall_segment(-200, -200, -40, False)
-            self._create_wall_segment(-200, 40, 220, False)
-            self._create_wall_segment(200, -200, -40, False)
-            self._create_wall_segment(200, 40, 220, False)
-            
-        elif layout_type == 2:
-            # Level 2, 6, 10...: The Cross
-            # Horizontal bar
-            self._create_wall_segment(-140, 160, 0, True)
-            # Vertical bar
-            self._create_wall_segment(0, -140, 160, False)
-            
-        elif layout_type == 3:
-            # Level 3, 7, 11...: Four Pillars
-            self._add_obstacle(-140, 140)
-            self._add_obstacle(140, 140)
-            self._add_obstacle(-140, -140)
-            self._add_obstacle(140, -140)
-            
-            # Add some surrounding blocks to make them pillars
-            for x in [-140, 140]:
-                for y in [-140, 140]:
-                    self._add_obstacle(x+20, y)
-                    self._add_obstacle(x-20, y)
-                    self._add_obstacle(x, y+20)
-                    self._add_obstacle(x, y-20)
-
-        else: # layout_type == 0
-            # Level 4, 8, 12...: Random Scattered Blocks
-            for _ in range(20):
-                rx = random.randint(-14, 14) * 20
-                ry = random.randint(-14, 14) * 20
-                self._add_obstacle(rx, ry)
-                
-        # Clear safe segments after generation
-        self.safe_segments = None
-
-    def _add_obstacle(self, x, y, color="#8B4513"):
-        # Check if this position collides with the snake
-        if hasattr(self, 'safe_segments') and self.safe_segments:
-            for seg in self.safe_segments:
-                # 20 is block size, use slightly larger to be safe
-                if seg.distance(x, y) < 25: 
-                    return # Do not spawn obstacle here
-        
-        super()._add_obstacle(x, y, color)
-
-    def check_collision(self, snake):
-        head = snake.head
-        # Window edge is 330
-        limit = 330 
-        if head.xcor() > limit or head.xcor() < -limit or head.ycor() > limit or head.ycor() < -limit:
-            return True
-            
-        # Check obstacle collision
-        for obs in self.obstacles:
-            if head.distance(obs) < 20:
-                return True
-        return False
+    wall_color = "#8B4513"
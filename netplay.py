@@ -0,0 +1,883 @@
+"""
+Networked versus mode: one process hosts a round, another joins it over TCP.
+
+The host runs the authoritative VersusSimulation (versus.py) on its own clock
+and after every step sends the other player a compact binary delta of what
+changed, never the whole board. The joined player keeps a mirror of the round
+built from those deltas and sends only its turns. Deltas rely on arriving once
+and in order, so the link is TCP with Nagle's algorithm off (TCP_NODELAY): each
+frame leaves in its own packet, which on localhost is as quick as UDP.
+
+Every message is a frame: the payload's length (2 bytes) and a 1-byte type,
+then the payload, in network byte order. A payload of 65535 bytes or more (a
+HELLO or a new obstacle layout in a large arena) has 65535 in the length field
+and its real length in the 4 bytes after the type.
+
+  HELLO  host -> client   full snapshot at the start of each round: mode, arena
+                          size, player number, level, speed, scores, both
+                          snakes, the food and the obstacles
+  STEP   host -> client   step number, flags and one byte per snake (direction
+                          moved, grew); then only what changed: the food cell,
+                          obstacle cells removed and added when
+                          ObstacleArena.generate_obstacles builds a new layout,
+                          the level, and the outcome when the round ends
+  TURN   client -> host   a direction, sent the moment the key is pressed
+  PING / PONG             a client timestamp echoed by the host
+
+A step in which only the snakes moved costs 8 bytes. Heads travel as the
+direction moved (the mirror applies the arena's wrap-around itself) and tails
+as whether the snake grew.
+
+The client predicts its own snake: when the host's frame for a step is late it
+moves its head on by its next pending turn (or straight ahead), at most
+MAX_PREDICTED_STEPS ahead, and drops the prediction if the host disagrees.
+
+Usage:
+    python netplay.py host --mode Obstacle          # wait for a player, then play
+    python netplay.py join 127.0.0.1                # join from another terminal
+    python netplay.py loopback --rounds 5 --fast    # two bots over localhost, with a report
+"""
+import argparse
+import random
+import select
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from simulation import ARENA_LIMIT, OPPOSITE, UP, DOWN, LEFT, RIGHT
+from versus import VersusSimulation, VersusStepResult, PLAYERS, DIRECTIONS, CAUSES, greedy_turn
+from timing import FrameClock, FRAME_MS
+from snake import Snake, MAX_QUEUED_TURNS
+from food import Food
+from modes import ClassicMode, ObstacleMode
+from camera import Camera, window_size
+from ui import Label
+from renderer import create_renderer, RENDERERS
+
+DEFAULT_PORT = 5555
+MODES = ("Classic", "Obstacle")
+
+# Frame types
+HELLO, STEP, TURN, PING, PONG = b"HSTPQ"
+FRAME_NAMES = {HELLO: "HELLO", STEP: "STEP", TURN: "TURN", PING: "PING", PONG: "PONG"}
+
+HEADER = struct.Struct("!HB")
+# Length field value announcing a LONG_LENGTH after the header
+LONG_FRAME = 0xFFFF
+LONG_LENGTH = struct.Struct("!I")
+# Larger frames are refused as garbage (a full 501-cell arena's HELLO is about 2 MB)
+MAX_PAYLOAD = 16 * 1024 * 1024
+# mode, arena limit, receiving player, level, speed level, steps, foods eaten, score of each player
+SNAPSHOT = struct.Struct("!BBBHHIHHH")
+# step number (low 16 bits), flags, one move byte per player
+STEP_HEAD = struct.Struct("!HBBB")
+CELL = struct.Struct("!hh")
+COUNT = struct.Struct("!I")
+LEVEL = struct.Struct("!H")
+# winner (DRAW if none), then each player's cause (0 for none, else 1 + index in CAUSES)
+OUTCOME = struct.Struct("!BBB")
+DIRECTION = struct.Struct("!B")
+TIMESTAMP = struct.Struct("!d")
+
+# STEP flags
+FOOD_CHANGED = 1
+OBSTACLES_CHANGED = 2
+LEVEL_CHANGED = 4
+ROUND_OVER = 8
+# Move byte: direction index in the low two bits, plus this bit if the snake grew
+GREW = 4
+NO_CELL = (-32768, -32768)
+DRAW = 255
+
+MAX_PREDICTED_STEPS = 2
+# How late (ms) a step's frame may be before the client predicts it
+PREDICTION_SLACK_MS = 5
+PING_INTERVAL = 0.25
+ROUND_PAUSE_MS = 1500
+
+
+class ProtocolError(Exception):
+    """A frame that does not fit the mirrored round (lost sync or a different protocol)."""
+
+
+# What decoding a malformed payload raises, reported as a ProtocolError
+DECODE_ERRORS = (struct.error, IndexError, KeyError, ValueError)
+
+
+def pack_cells(cells):
+    cells = list(cells)
+    flat = [value for cell in cells for value in cell]
+    return COUNT.pack(len(cells)) + struct.pack(f"!{len(flat)}h", *flat)
+
+
+def unpack_cells(payload, offset):
+    """(cells, offset after them) for a pack_cells block starting at offset."""
+    (count,) = COUNT.unpack_from(payload, offset)
+    offset += COUNT.size
+    flat = struct.unpack_from(f"!{2 * count}h", payload, offset)
+    return list(zip(flat[0::2], flat[1::2])), offset + CELL.size * count
+
+
+def encode_snapshot(sim, player):
+    """The whole round as a HELLO payload for player."""
+    parts = [
+        SNAPSHOT.pack(MODES.index(sim.mode_name), sim.arena.limit, player, sim.level,
+                      sim.speed_level, sim.steps, sim.foods_eaten, *sim.scores),
+        CELL.pack(*(sim.food if sim.food is not None else NO_CELL)),
+    ]
+    for body in sim.bodies:
+        parts.append(DIRECTION.pack(DIRECTIONS.index(body.direction)))
+        parts.append(pack_cells(body.cells))
+    # Sorted so equal rounds encode to equal bytes
+    parts.append(pack_cells(sorted(sim.arena.obstacles)))
+    return b"".join(parts)
+
+
+def load_snapshot(payload, sim=None):
+    """Reads a HELLO payload into sim (a new VersusSimulation if None). Returns (sim, player)."""
+    mode, limit, player, level, speed_level, steps, foods_eaten, *scores = SNAPSHOT.unpack_from(payload)
+    if sim is None:
+        sim = VersusSimulation(MODES[mode], limit=limit)
+    elif sim.arena.limit != limit:
+        raise ProtocolError(f"arena limit changed from {sim.arena.limit} to {limit}")
+    sim.set_mode(MODES[mode])
+    sim.level = level
+    sim.speed_level = speed_level
+    sim.steps = steps
+    sim.foods_eaten = foods_eaten
+    sim.scores = scores
+    sim.is_game_over = False
+    sim.causes = [None] * PLAYERS
+    sim.winner = None
+
+    offset = SNAPSHOT.size
+    food = CELL.unpack_from(payload, offset)
+    sim.food = None if food == NO_CELL else food
+    offset += CELL.size
+    for body in sim.bodies:
+        (direction,) = DIRECTION.unpack_from(payload, offset)
+        cells, offset = unpack_cells(payload, offset + DIRECTION.size)
+        body.reset(cells)
+        body.direction = DIRECTIONS[direction]
+    obstacles, offset = unpack_cells(payload, offset)
+    sim.arena.obstacles.clear()
+    sim.arena.obstacles.update(obstacles)
+    sim.arena.version += 1
+    return sim, player
+
+
+def encode_step(sim, result, obstacles_before):
+    """The STEP payload for a step the host just took. obstacles_before is the layout sent so far."""
+    flags = 0
+    parts = []
+    moves = [DIRECTIONS.index(body.direction) | (GREW if grew else 0)
+             for body, grew in zip(sim.bodies, result.grew)]
+    # The food moves when it is eaten, when a new layout covers it and when a full board frees up
+    if result.ate_food is not None or result.obstacles_changed or result.food_spawned:
+        flags |= FOOD_CHANGED
+        parts.append(CELL.pack(*(sim.food if sim.food is not None else NO_CELL)))
+    if result.obstacles_changed:
+        flags |= OBSTACLES_CHANGED
+        obstacles = sim.arena.obstacles
+        parts.append(pack_cells(sorted(obstacles_before - obstacles)))
+        parts.append(pack_cells(sorted(obstacles - obstacles_before)))
+    if result.leveled_up:
+        flags |= LEVEL_CHANGED
+        parts.append(LEVEL.pack(sim.level))
+    if result.game_over:
+        flags |= ROUND_OVER
+        winner = DRAW if result.winner is None else result.winner
+        causes = [0 if cause is None else CAUSES.index(cause) + 1 for cause in result.causes]
+        parts.append(OUTCOME.pack(winner, *causes))
+    return STEP_HEAD.pack(sim.steps & 0xFFFF, flags, *moves) + b"".join(parts)
+
+
+def apply_step(sim, payload):
+    """Replays a STEP payload on a mirror. Returns a VersusStepResult like the host's."""
+    step, flags, *moves = STEP_HEAD.unpack_from(payload)
+    if (sim.steps + 1) & 0xFFFF != step:
+        raise ProtocolError(f"expected step {(sim.steps + 1) & 0xFFFF}, got {step}")
+    result = VersusStepResult()
+    sim.time_ms += sim.get_current_delay()
+    sim.steps += 1
+    for player, (body, move) in enumerate(zip(sim.bodies, moves)):
+        body.direction = DIRECTIONS[move & 3]
+        head, _ = sim.arena.check_collision(body.next_cell())
+        result.heads[player] = head
+        result.tails[player] = body.move(head)
+        if move & GREW:
+            body.extend()
+            result.grew[player] = True
+            result.ate_food = head
+            sim.scores[player] += sim.level
+            sim.foods_eaten += 1
+            sim.speed_level += 1
+
+    offset = STEP_HEAD.size
+    if flags & FOOD_CHANGED:
+        food = CELL.unpack_from(payload, offset)
+        result.food_spawned = sim.food is None and food != NO_CELL
+        sim.food = None if food == NO_CELL else food
+        offset += CELL.size
+    if flags & OBSTACLES_CHANGED:
+        removed, offset = unpack_cells(payload, offset)
+        added, offset = unpack_cells(payload, offset)
+        sim.arena.obstacles.difference_update(removed)
+        sim.arena.obstacles.update(added)
+        sim.arena.version += 1
+        result.obstacles_changed = True
+    if flags & LEVEL_CHANGED:
+        (sim.level,) = LEVEL.unpack_from(payload, offset)
+        offset += LEVEL.size
+        result.leveled_up = True
+    if flags & ROUND_OVER:
+        winner, *causes = OUTCOME.unpack_from(payload, offset)
+        sim.is_game_over = True
+        sim.causes = [None if cause == 0 else CAUSES[cause - 1] for cause in causes]
+        sim.winner = None if winner == DRAW else winner
+        result.game_over = True
+        result.causes = list(sim.causes)
+        result.winner = sim.winner
+    return result
+
+
+class Connection:
+    """
+    One end of a TCP link carrying frames, with the bytes sent and received
+    (frame headers included). lag_ms holds every outgoing frame back for that
+    long, plus up to jitter_ms more at random (frames still leave in order), to
+    try prediction and the round-trip report over a slow link locally.
+    """
+    def __init__(self, sock, lag_ms=0, jitter_ms=0, rng=None):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.lag = lag_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.rng = rng if rng is not None else random.Random()
+        # (perf_counter time due, frame) waiting out the lag
+        self.outbox = deque()
+        self.buffer = bytearray()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.closed = False
+
+    def send(self, kind, payload=b""):
+        """Queues a frame for the peer. Returns its size in bytes."""
+        if len(payload) < LONG_FRAME:
+            frame = HEADER.pack(len(payload), kind) + payload
+        else:
+            frame = HEADER.pack(LONG_FRAME, kind) + LONG_LENGTH.pack(len(payload)) + payload
+        self.bytes_sent += len(frame)
+        if self.lag or self.jitter:
+            due = time.perf_counter() + self.lag + self.rng.random() * self.jitter
+            if self.outbox:
+                due = max(due, self.outbox[-1][0])
+            self.outbox.append((due, frame))
+        else:
+            self._write(frame)
+        return len(frame)
+
+    def _write(self, frame):
+        if self.closed:
+            return
+        try:
+            self.sock.sendall(frame)
+        except OSError:
+            self.closed = True
+
+    def flush(self):
+        """Sends the held frames that are due."""
+        now = time.perf_counter()
+        while self.outbox and self.outbox[0][0] <= now:
+            self._write(self.outbox.popleft()[1])
+
+    def wait(self, timeout):
+        """Sleeps until data arrives or timeout seconds pass, sending held frames on time."""
+        if self.outbox:
+            timeout = min(timeout, self.outbox[0][0] - time.perf_counter())
+        if not self.closed:
+            select.select([self.sock], [], [], max(0.0, timeout))
+        self.flush()
+
+    def receive(self):
+        """
+        The frames that have arrived in full, as (type, payload) pairs. Raises
+        ProtocolError for a frame longer than MAX_PAYLOAD.
+        """
+        self.flush()
+        while not self.closed and select.select([self.sock], [], [], 0)[0]:
+            try:
+                data = self.sock.recv(65536)
+            except OSError:
+                data = b""
+            if not data:
+                self.closed = True
+                break
+            self.bytes_received += len(data)
+            self.buffer += data
+
+        frames = []
+        buffer = self.buffer
+        offset = 0
+        while len(buffer) - offset >= HEADER.size:
+            length, kind = HEADER.unpack_from(buffer, offset)
+            start = offset + HEADER.size
+            if length == LONG_FRAME:
+                if len(buffer) - start < LONG_LENGTH.size:
+                    break
+                (length,) = LONG_LENGTH.unpack_from(buffer, start)
+                start += LONG_LENGTH.size
+                if length > MAX_PAYLOAD:
+                    raise ProtocolError(f"frame of {length} bytes")
+            end = start + length
+            if end > len(buffer):
+                break
+            frames.append((kind, bytes(buffer[start:end])))
+            offset = end
+        del buffer[:offset]
+        return frames
+
+    def close(self):
+        # Whatever is still held back goes out now
+        while self.outbox:
+            self._write(self.outbox.popleft()[1])
+        self.closed = True
+        self.sock.close()
+
+
+class VersusHost:
+    """
+    Runs rounds of the authoritative VersusSimulation and streams them to the
+    joined player, who plays the second snake (player 1).
+    """
+    def __init__(self, connection, mode="Classic", seed=None, limit=ARENA_LIMIT, speed_level=0):
+        self.connection = connection
+        self.sim = VersusSimulation(mode, seed, limit)
+        # Rounds start at this speed level (0 is the slowest, 18 the 30 ms minimum delay)
+        self.start_speed_level = speed_level
+        self.remote_turns = deque()
+        # The obstacle layout as last sent, to diff new layouts against
+        self.obstacles = set()
+        self.step_bytes = []
+        self.snapshot_bytes = []
+        self.rounds = 0
+
+    def start_round(self):
+        sim = self.sim
+        sim.reset()
+        sim.speed_level = self.start_speed_level
+        self.remote_turns.clear()
+        self.obstacles = set(sim.arena.obstacles)
+        self.snapshot_bytes.append(self.connection.send(HELLO, encode_snapshot(sim, 1)))
+        self.rounds += 1
+
+    def poll(self):
+        """Takes in the joined player's turns and answers its pings. Raises ProtocolError on a bad frame."""
+        for kind, payload in self.connection.receive():
+            if kind == TURN:
+                # Buffered like local key presses, one consumed per step
+                if len(self.remote_turns) < MAX_QUEUED_TURNS:
+                    try:
+                        (direction,) = DIRECTION.unpack(payload)
+                        self.remote_turns.append(DIRECTIONS[direction])
+                    except DECODE_ERRORS as error:
+                        raise ProtocolError(f"bad TURN frame: {error}") from error
+            elif kind == PING:
+                self.connection.send(PONG, payload)
+
+    def step(self, local_turn=None):
+        """Steps both snakes and sends the delta. Returns the step result."""
+        remote_turn = self.remote_turns.popleft() if self.remote_turns else None
+        result = self.sim.step((local_turn, remote_turn))
+        self.step_bytes.append(self.connection.send(STEP, encode_step(self.sim, result, self.obstacles)))
+        if result.obstacles_changed:
+            self.obstacles = set(self.sim.arena.obstacles)
+        return result
+
+
+class VersusClient:
+    """
+    The joined player's end: a mirror of the host's round built from its
+    frames, local turns sent as they happen, and prediction of its own snake.
+    """
+    def __init__(self, connection, clock=time.perf_counter):
+        self.connection = connection
+        self.clock = clock
+        # Mirror of the host's round, created by the first HELLO
+        self.sim = None
+        self.player = 1
+        # (direction, time sent) of turns the host has not applied yet
+        self.pending = deque()
+        # (cell, direction, turned) the local head is predicted to take ahead of the host
+        self.predicted = []
+        self.last_frame = clock()
+        self.last_ping = 0.0
+        self.rtts = []
+        self.steps = 0
+        self.predictions = 0
+        self.hits = 0
+        self.misses = 0
+
+    def poll(self):
+        """
+        Applies the host's frames. Returns (HELLO, None) and (STEP, result)
+        events in order. Raises ProtocolError on a frame that cannot be applied.
+        """
+        events = []
+        for kind, payload in self.connection.receive():
+            try:
+                if kind == HELLO:
+                    self.sim, self.player = load_snapshot(payload, self.sim)
+                    self.pending.clear()
+                    self.predicted.clear()
+                    self.last_frame = self.clock()
+                    events.append((HELLO, None))
+                elif kind == STEP:
+                    if self.sim is None:
+                        raise ProtocolError("STEP before HELLO")
+                    result = apply_step(self.sim, payload)
+                    self.last_frame = self.clock()
+                    self.steps += 1
+                    self._confirm(result)
+                    events.append((STEP, result))
+                elif kind == PONG:
+                    (sent,) = TIMESTAMP.unpack(payload)
+                    self.rtts.append((self.clock() - sent) * 1000.0)
+            except DECODE_ERRORS as error:
+                raise ProtocolError(f"bad {FRAME_NAMES[kind]} frame: {error}") from error
+        if self.clock() - self.last_ping >= PING_INTERVAL:
+            self.ping()
+        return events
+
+    def _confirm(self, result):
+        """Matches a confirmed step against the pending turns and the prediction."""
+        body = self.sim.bodies[self.player]
+        if self.pending and self.pending[0][0] == body.direction:
+            self.pending.popleft()
+        if not self.predicted:
+            return
+        if self.predicted[0][0] == result.heads[self.player] and not result.game_over:
+            self.predicted.pop(0)
+            self.hits += 1
+        else:
+            self.predicted.clear()
+            self.misses += 1
+
+    def turn(self, direction):
+        """Sends a turn of the local snake to the host straight away."""
+        if self.sim is None or self.sim.is_game_over:
+            return
+        # Filtered against the direction the snake will have after the pending turns
+        current = self.pending[-1][0] if self.pending else self.sim.bodies[self.player].direction
+        if direction == current or direction == OPPOSITE[current] or len(self.pending) >= MAX_QUEUED_TURNS:
+            return
+        self.pending.append((direction, self.clock()))
+        self.connection.send(TURN, DIRECTION.pack(DIRECTIONS.index(direction)))
+
+    def ping(self):
+        self.last_ping = self.clock()
+        self.connection.send(PING, TIMESTAMP.pack(self.last_ping))
+
+    def next_prediction(self):
+        """perf_counter time at which the next step's frame counts as late, or None."""
+        sim = self.sim
+        if sim is None or sim.is_game_over or len(self.predicted) >= MAX_PREDICTED_STEPS:
+            return None
+        late_ms = sim.get_current_delay() * (len(self.predicted) + 1) + PREDICTION_SLACK_MS
+        return self.last_frame + late_ms / 1000.0
+
+    def predict(self):
+        """Moves the predicted head on if the host's frame is late. Returns True if it did."""
+        due = self.next_prediction()
+        if due is None or self.clock() < due:
+            return False
+        body = self.sim.bodies[self.player]
+        head, direction, _ = self.predicted[-1] if self.predicted else (body.head, body.direction, False)
+        # The host applies at most one pending turn per step, and only once the
+        # turn has reached it: the step's frame would arrive half a round trip
+        # after the step, the turn half a round trip after it was sent
+        turned = False
+        used = sum(1 for _, _, turned_before in self.predicted if turned_before)
+        if used < len(self.pending):
+            turn, sent_at = self.pending[used]
+            rtt = self.rtts[-1] / 1000.0 if self.rtts else 0.0
+            if sent_at + rtt <= due - PREDICTION_SLACK_MS / 1000.0:
+                direction = turn
+                turned = True
+        cell, _ = self.sim.arena.check_collision((head[0] + direction[0], head[1] + direction[1]))
+        self.predicted.append((cell, direction, turned))
+        self.predictions += 1
+        return True
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * p // 100)]
+
+
+def link_report(host=None, client=None):
+    """Lines on traffic per step, round-trip time and prediction for either end (or both)."""
+    lines = []
+    if host is not None and host.step_bytes:
+        step_bytes = host.step_bytes
+        lines.append(f"downstream  {sum(step_bytes) / len(step_bytes):.1f} B/step over {len(step_bytes)} steps "
+                     f"(max {max(step_bytes)}), {sum(host.snapshot_bytes) / len(host.snapshot_bytes):.0f} B "
+                     f"snapshot per round")
+    if client is not None and client.steps:
+        connection = client.connection
+        lines.append(f"received    {connection.bytes_received / client.steps:.1f} B/step, "
+                     f"upstream {connection.bytes_sent / client.steps:.1f} B/step (turns and pings)")
+        if client.rtts:
+            lines.append(f"round trip  p50 {percentile(client.rtts, 50):.2f} ms, p95 {percentile(client.rtts, 95):.2f} ms, "
+                         f"max {max(client.rtts):.2f} ms ({len(client.rtts)} pings)")
+        lines.append(f"prediction  {client.predictions} steps predicted, {client.hits} confirmed, "
+                     f"{client.misses} rolled back")
+    return lines
+
+
+def host_rounds(host, rounds, rng, pause_ms=ROUND_PAUSE_MS):
+    """
+    Plays rounds in real time with a bot on the host's snake, headless.
+    Returns the snapshot of each finished round.
+    """
+    clock = FrameClock()
+    finished = []
+    connection = host.connection
+    for _ in range(rounds):
+        host.start_round()
+        clock.start()
+        sim = host.sim
+        while not sim.is_game_over and not connection.closed:
+            host.poll()
+            clock.tick()
+            while not sim.is_game_over and clock.consume(sim.get_current_delay()):
+                host.step(greedy_turn(sim, 0, rng))
+            connection.wait(clock.next_delay(sim.get_current_delay()) / 1000.0)
+        if connection.closed:
+            break
+        finished.append(encode_snapshot(sim, 1))
+        restart = time.perf_counter() + pause_ms / 1000.0
+        while time.perf_counter() < restart and not connection.closed:
+            host.poll()
+            connection.wait(restart - time.perf_counter())
+    return finished
+
+
+def client_rounds(client, rng):
+    """
+    Plays as the joined player with a bot until the host hangs up.
+    Returns the mirror's snapshot at the end of each round.
+    """
+    finished = []
+    connection = client.connection
+    while not connection.closed:
+        decide = False
+        for kind, result in client.poll():
+            decide = True
+            if kind == STEP and result.game_over:
+                finished.append(encode_snapshot(client.sim, client.player))
+        sim = client.sim
+        # One decision per confirmed step, made once earlier turns have gone through
+        if decide and sim is not None and not sim.is_game_over and not client.pending:
+            turn = greedy_turn(sim, client.player, rng)
+            if turn is not None:
+                client.turn(turn)
+        client.predict()
+        wakeups = [client.last_ping + PING_INTERVAL]
+        due = client.next_prediction()
+        if due is not None:
+            wakeups.append(due)
+        connection.wait(min(wakeups) - time.perf_counter())
+    return finished
+
+
+def fastest_speed_level(sim):
+    """The speed level at which steps reach the minimum delay."""
+    return -(-(sim.base_speed - sim.min_speed) // sim.speed_step)
+
+
+def loopback(mode="Classic", rounds=5, seed=0, fast=False, lag_ms=0, jitter_ms=0):
+    """
+    Plays bot rounds between a host and a client over localhost (the host on
+    a thread) and checks that the client's mirror ends every round equal to
+    the host's round. Returns (host, client, mirrors_match).
+    """
+    server = socket.create_server(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+    ends = {}
+
+    def serve():
+        sock, _ = server.accept()
+        server.close()
+        host = VersusHost(Connection(sock, lag_ms, jitter_ms, random.Random(seed)), mode, seed)
+        if fast:
+            host.start_speed_level = fastest_speed_level(host.sim)
+        ends["host"] = host
+        ends["finished"] = host_rounds(host, rounds, random.Random(seed), pause_ms=200)
+        host.connection.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    client = VersusClient(Connection(socket.create_connection(("127.0.0.1", port)), lag_ms, jitter_ms,
+                                    random.Random(seed + 1)))
+    mirrored = client_rounds(client, random.Random(seed + 1))
+    thread.join()
+    client.connection.close()
+    return ends["host"], client, mirrored == ends["finished"] and len(mirrored) == rounds
+
+
+class VersusView:
+    """
+    Draws a versus round through a renderer: both snakes, the food, the walls
+    and a HUD line. The camera follows the local player's snake in large arenas.
+    """
+    colors = ("#2ecc71", "#3498db")
+    predicted_color = "#bdc3c7"
+
+    def __init__(self, renderer, sim, player):
+        self.renderer = renderer
+        self.sim = sim
+        self.player = player
+        self.camera = Camera(sim.arena.limit)
+        width, height = window_size(self.camera.view_limit)
+        self.modes = {
+            "Classic": ClassicMode(renderer, width, height, sim.arenas["Classic"], self.camera),
+            "Obstacle": ObstacleMode(renderer, width, height, sim.arenas["Obstacle"], self.camera)
+        }
+        self.mode = self.modes[sim.mode_name]
+        self.snakes = [Snake(renderer, body, self.camera) for body in sim.bodies]
+        self.food = Food(renderer, self.camera)
+        # Items drawn for the predicted cells ahead of the local head
+        self.predicted = []
+        self.hud = Label(renderer, 0, 260, "", "white", ("Courier", 18, "bold"))
+        self.hud.show()
+        self.banner = Label(renderer, 0, 0, "", "white", ("Courier", 36, "bold"))
+
+    def new_round(self):
+        sim = self.sim
+        self.banner.hide()
+        self.camera.reset(sim.bodies[self.player].head)
+        self.mode.clear()
+        self.mode = self.modes[sim.mode_name]
+        self.mode.setup()
+        for snake, color in zip(self.snakes, self.colors):
+            snake.reset()
+            snake.set_color(color)
+        self.food.refresh(sim.food)
+        self.show_predicted(())
+
+    def show_step(self, result):
+        sim = self.sim
+        if self.camera.follow(sim.bodies[self.player].head):
+            for snake in self.snakes:
+                snake.redraw()
+            self.mode.scroll()
+            self.food.reposition()
+        else:
+            for snake in self.snakes:
+                snake.move()
+        if result.obstacles_changed:
+            self.mode.setup()
+        if result.ate_food is not None or result.obstacles_changed or result.food_spawned:
+            self.food.refresh(sim.food)
+        if result.game_over:
+            if sim.winner is None:
+                text = "DRAW"
+            else:
+                text = "YOU WIN" if sim.winner == self.player else "YOU LOSE"
+            self.banner.set(text=text, color=self.colors[self.player])
+            self.banner.show()
+
+    def show_predicted(self, cells):
+        pool = self.renderer.pool
+        pool.release_all(self.predicted)
+        self.predicted = []
+        for cell in cells:
+            position = self.camera.to_pixels(cell)
+            if position is not None:
+                self.predicted.append(pool.acquire_cell(*position, self.predicted_color))
+
+    def show_hud(self, extra=""):
+        scores = self.sim.scores
+        other = 1 - self.player
+        self.hud.set(text=f"YOU {scores[self.player]}  THEM {scores[other]}  LEVEL {self.sim.level}{extra}")
+
+    def show_message(self, text):
+        self.banner.set(text=text, color="white")
+        self.banner.show()
+
+
+class HostWindow:
+    """Plays the host's snake in a window; a round restarts shortly after each one ends."""
+    def __init__(self, host, renderer_name="turtle", bot=False):
+        self.host = host
+        self.bot = random.Random() if bot else None
+        self.renderer = create_renderer(renderer_name, *window_size(), "Snake — Versus (host)")
+        self.renderer.background("black")
+        self.view = VersusView(self.renderer, host.sim, 0)
+        snake = self.view.snakes[0]
+        for key, handler in (("Up", snake.up), ("Down", snake.down), ("Left", snake.left), ("Right", snake.right)):
+            self.renderer.on_key(key, handler)
+        self.clock = FrameClock(clock=self.renderer.clock)
+        self.restart_at = None
+
+    def start_round(self):
+        self.host.start_round()
+        self.view.snakes[0].turn_queue.clear()
+        self.view.new_round()
+        self.clock.start()
+
+    def frame(self):
+        host = self.host
+        sim = host.sim
+        try:
+            host.poll()
+        except ProtocolError as error:
+            # A peer we cannot understand ends the session, not the window
+            print(f"Ending the game: {error}")
+            host.connection.close()
+            self.view.show_message("PLAYER OUT OF SYNC")
+            self.renderer.flush()
+            return
+        if host.connection.closed:
+            self.view.show_message("PLAYER LEFT")
+            self.renderer.flush()
+            return
+        if sim.is_game_over:
+            if self.restart_at is None:
+                self.restart_at = self.renderer.clock() + ROUND_PAUSE_MS / 1000.0
+            elif self.renderer.clock() >= self.restart_at:
+                self.restart_at = None
+                self.start_round()
+        else:
+            self.clock.tick()
+            while not sim.is_game_over and self.clock.consume(sim.get_current_delay()):
+                if self.bot is not None:
+                    turn = greedy_turn(sim, 0, self.bot)
+                else:
+                    turn = self.view.snakes[0].take_turn()
+                self.view.show_step(host.step(turn))
+        step_bytes = host.step_bytes[-100:]
+        average = sum(step_bytes) / len(step_bytes) if step_bytes else 0
+        self.view.show_hud(f"  {average:.0f} B/step")
+        self.renderer.flush()
+        self.renderer.after(self.clock.next_delay(sim.get_current_delay()), self.frame)
+
+    def run(self):
+        self.start_round()
+        self.frame()
+        self.renderer.run()
+
+
+class JoinWindow:
+    """Plays the joined player's snake in a window, drawing the mirrored round."""
+    def __init__(self, client, renderer_name="turtle", bot=False):
+        self.client = client
+        self.bot = random.Random() if bot else None
+        self.renderer = create_renderer(renderer_name, *window_size(), "Snake — Versus")
+        self.renderer.background("black")
+        self.view = None
+        for key, direction in (("Up", UP), ("Down", DOWN), ("Left", LEFT), ("Right", RIGHT)):
+            self.renderer.on_key(key, lambda direction=direction: client.turn(direction))
+
+    def frame(self):
+        client = self.client
+        try:
+            events = client.poll()
+        except ProtocolError as error:
+            # A peer we cannot understand ends the session, not the window
+            print(f"Leaving the game: {error}")
+            client.connection.close()
+            if self.view is not None:
+                self.view.show_message("HOST OUT OF SYNC")
+            self.renderer.flush()
+            return
+        for kind, result in events:
+            if kind == HELLO:
+                if self.view is None:
+                    self.view = VersusView(self.renderer, client.sim, client.player)
+                self.view.new_round()
+            else:
+                self.view.show_step(result)
+        if client.connection.closed:
+            if self.view is not None:
+                self.view.show_message("HOST LEFT")
+            self.renderer.flush()
+            return
+        if self.view is not None:
+            sim = client.sim
+            if self.bot is not None and events and not sim.is_game_over and not client.pending:
+                turn = greedy_turn(sim, client.player, self.bot)
+                if turn is not None:
+                    client.turn(turn)
+            client.predict()
+            self.view.show_predicted([cell for cell, _, _ in client.predicted])
+            rtt = f"  RTT {client.rtts[-1]:.0f} ms" if client.rtts else ""
+            self.view.show_hud(rtt)
+        self.renderer.flush()
+        self.renderer.after(FRAME_MS, self.frame)
+
+    def run(self):
+        self.frame()
+        self.renderer.run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Two-player versus Snake over the network.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    host_parser = commands.add_parser("host", help="host a game and wait for a player")
+    host_parser.add_argument("--mode", choices=MODES, default="Classic")
+    host_parser.add_argument("--bind", default="127.0.0.1", help="address to listen on")
+    join_parser = commands.add_parser("join", help="join a hosted game")
+    join_parser.add_argument("address", nargs="?", default="127.0.0.1")
+    for command in (host_parser, join_parser):
+        command.add_argument("--port", type=int, default=DEFAULT_PORT)
+        command.add_argument("--renderer", choices=RENDERERS, default="turtle")
+        command.add_argument("--bot", action="store_true", help="let a bot play this snake")
+    loopback_parser = commands.add_parser("loopback", help="bots on both ends over localhost, then a report")
+    loopback_parser.add_argument("--mode", choices=MODES, default="Classic")
+    loopback_parser.add_argument("--rounds", type=int, default=5)
+    loopback_parser.add_argument("--seed", type=int, default=0)
+    loopback_parser.add_argument("--lag", type=float, default=0, metavar="MS",
+                                 help="hold every frame back this long on both ends")
+    loopback_parser.add_argument("--jitter", type=float, default=0, metavar="MS",
+                                 help="and up to this much longer at random")
+    for command in (host_parser, loopback_parser):
+        command.add_argument("--fast", action="store_true",
+                             help="start every round at the minimum step delay (30 ms)")
+    args = parser.parse_args(argv)
+
+    if args.command == "loopback":
+        host, client, matched = loopback(args.mode, args.rounds, args.seed, args.fast,
+                                         args.lag, args.jitter)
+        print(f"Versus loopback: {args.mode}, {host.rounds} rounds, {len(host.step_bytes)} steps")
+        for line in link_report(host, client):
+            print("  " + line)
+        print("  mirror      " + ("matches the host after every round" if matched else "DIFFERS from the host"))
+        return 0 if matched else 1
+
+    if args.command == "host":
+        server = socket.create_server((args.bind, args.port))
+        print(f"Waiting for a player on {args.bind}:{args.port} ...")
+        sock, address = server.accept()
+        server.close()
+        print(f"{address[0]} joined")
+        host = VersusHost(Connection(sock), args.mode)
+        if args.fast:
+            host.start_speed_level = fastest_speed_level(host.sim)
+        HostWindow(host, args.renderer, args.bot).run()
+        host.connection.close()
+        report = link_report(host=host)
+    else:
+        client = VersusClient(Connection(socket.create_connection((args.address, args.port))))
+        JoinWindow(client, args.renderer, args.bot).run()
+        client.connection.close()
+        report = link_report(client=client)
+    for line in report:
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""
+Pooled particle system for the eat effects.
+
+Particle state lives in fixed-size arrays: the live particles are always the
+first `count` slots, updated together in one pass, and a dead particle's slot
+is refilled by swapping in the last live one. ParticleView draws the pool with
+one renderer item per slot, created once and reused for the whole session.
+"""
+import math
+import random
+from array import array
+
+MAX_PARTICLES = 64
+PARTICLES_PER_BURST = 8
+PARTICLE_LIFE = 15 # frames
+PARTICLE_SIZE = 6 # px, a 0.3 shapesize square
+
+
+class ParticleSystem:
+    """A fixed-capacity pool of particles. Bursts beyond the cap are dropped."""
+    def __init__(self, capacity=MAX_PARTICLES, rng=None):
+        self.capacity = capacity
+        self.rng = rng if rng is not None else random.Random()
+        self.x = array("d", bytes(8 * capacity))
+        self.y = array("d", bytes(8 * capacity))
+        self.vx = array("d", bytes(8 * capacity))
+        self.vy = array("d", bytes(8 * capacity))
+        self.life = array("i", bytes(4 * capacity))
+        self.color = [None] * capacity
+        self.count = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, x, y, color, amount=PARTICLES_PER_BURST):
+        """Starts a burst of particles flying out from (x, y)."""
+        for _ in range(amount):
+            i = self.count
+            if i == self.capacity:
+                self.dropped += 1
+                continue
+            heading = math.radians(self.rng.randint(0, 360))
+            speed = self.rng.randint(5, 12)
+            self.x[i] = x
+            self.y[i] = y
+            self.vx[i] = speed * math.cos(heading)
+            self.vy[i] = speed * math.sin(heading)
+            self.life[i] = PARTICLE_LIFE
+            self.color[i] = color
+            self.count = i + 1
+
+    def update(self):
+        """Advances every live particle by one frame and retires the dead ones."""
+        x, y, vx, vy, life, color = self.x, self.y, self.vx, self.vy, self.life, self.color
+        i = 0
+        while i < self.count:
+            remaining = life[i] - 1
+            if remaining <= 0:
+                # Swap the last live particle into this slot
+                last = self.count - 1
+                x[i] = x[last]
+                y[i] = y[last]
+                vx[i] = vx[last]
+                vy[i] = vy[last]
+                life[i] = life[last]
+                color[i] = color[last]
+                color[last] = None
+                self.count = last
+                continue
+            life[i] = remaining
+            x[i] += vx[i]
+            y[i] += vy[i]
+            i += 1
+
+    def clear(self):
+        for i in range(self.count):
+            self.color[i] = None
+        self.count = 0
+
+
+class ParticleView:
+    """Draws a ParticleSystem with one reusable renderer rectangle per slot."""
+    def __init__(self, system, renderer):
+        self.system = system
+        self.renderer = renderer
+        self.items = []
+        self.colors = []
+        self.shown = 0
+        for _ in range(system.capacity):
+            self.items.append(renderer.rect(0, 0, 0, 0, "white", visible=False))
+            self.colors.append(None)
+
+    def draw(self):
+        """Syncs the renderer items with the pool. Returns True if anything was drawn or hidden."""
+        system = self.system
+        if not system.count and not self.shown:
+            return False
+        renderer = self.renderer
+        half = PARTICLE_SIZE / 2
+        for i in range(system.count):
+            item = self.items[i]
+            px = system.x[i]
+            py = system.y[i]
+            renderer.move(item, px - half, py - half, px + half, py + half)
+            if self.colors[i] != system.color[i]:
+                self.colors[i] = system.color[i]
+                renderer.configure(item, color=system.color[i])
+            if i >= self.shown:
+                renderer.configure(item, visible=True)
+        for i in range(system.count, self.shown):
+            renderer.configure(self.items[i], visible=False)
+        self.shown = system.count
+        return True
@@ -0,0 +1,84 @@
+"""
+Lifecycle of the shapes drawn on screen.
+
+Items are never deleted during a session. When a view stops showing a shape
+(a snake segment leaving the view, food being eaten, a wall layout going
+away), it releases the item to the renderer's ItemPool, which hides it and
+hands it to the next view that asks for that kind of shape. The number of
+canvas items therefore stops growing once a session has drawn its biggest
+scene, however many games are played.
+
+Pools are kept per kind of shape ("rect" or "oval") and layer: lowered items
+(walls) stay below everything else, so they are only reused as walls.
+"""
+from simulation import CELL_SIZE
+
+
+class ItemPool:
+    """Hands out hidden renderer items for reuse; counts live and pooled items per kind."""
+    def __init__(self, renderer):
+        self.renderer = renderer
+        # (kind, lowered) -> hidden items ready for reuse
+        self.free = {}
+        # item -> (kind, lowered) for items currently handed out
+        self.live = {}
+        self.created = {}
+        self.reused = 0
+
+    def acquire(self, kind, x0, y0, x1, y1, color, lowered=False):
+        """A visible rect or oval with this box and colour, recycled if one is free."""
+        key = (kind, lowered)
+        free = self.free.get(key)
+        renderer = self.renderer
+        if free:
+            item = free.pop()
+            renderer.move(item, x0, y0, x1, y1)
+            renderer.configure(item, color=color, visible=True)
+            self.reused += 1
+        else:
+            make = renderer.oval if kind == "oval" else renderer.rect
+            item = make(x0, y0, x1, y1, color)
+            if lowered:
+                renderer.lower(item)
+            self.created[key] = self.created.get(key, 0) + 1
+        self.live[item] = key
+        return item
+
+    def acquire_cell(self, x, y, color, scale=1.0, shape="square"):
+        """A grid cell sized square (or circle) centred on (x, y), as Renderer.cell draws it."""
+        half = CELL_SIZE * scale / 2
+        kind = "oval" if shape == "circle" else "rect"
+        return self.acquire(kind, x - half, y - half, x + half, y + half, color)
+
+    def release(self, item):
+        """Hides item and keeps it for the next acquire of its kind."""
+        key = self.live.pop(item)
+        self.renderer.configure(item, visible=False)
+        self.free.setdefault(key, []).append(item)
+
+    def release_all(self, items):
+        for item in items:
+            self.release(item)
+
+    def stats(self):
+        """{"live", "pooled", "created", "reused"} totals over every kind."""
+        return {
+            "live": len(self.live),
+            "pooled": sum(len(items) for items in self.free.values()),
+            "created": sum(self.created.values()),
+            "reused": self.reused,
+        }
+
+    def breakdown(self):
+        """{"kind" or "kind/lowered": {"live", "pooled", "created"}}."""
+        keys = set(self.created)
+        result = {}
+        for key in keys:
+            kind, lowered = key
+            name = f"{kind}/lowered" if lowered else kind
+            result[name] = {
+                "live": sum(1 for live_key in self.live.values() if live_key == key),
+                "pooled": len(self.free.get(key, ())),
+                "created": self.created[key],
+            }
+        return result
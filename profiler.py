@@ -0,0 +1,104 @@
+"""
+Per-phase frame profiler for the game loop.
+
+Each phase of a frame is timed with time.perf_counter and stored in a
+fixed-size ring buffer (the last FRAME_HISTORY frames), from which rolling
+p50/p95/p99 are computed for the on-screen overlay and which can be dumped to
+CSV for offline analysis. While disabled, every call returns after a single
+attribute check.
+"""
+import csv
+import time
+from array import array
+
+# Phases of Game.game_loop, in order
+PHASES = ("effects", "bonus", "particles", "sim", "snake", "events", "flush")
+FRAME_HISTORY = 3000
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler:
+    """Times frame phases into a ring buffer of per-frame samples (ms)."""
+    def __init__(self, phases=PHASES, capacity=FRAME_HISTORY):
+        self.enabled = False
+        self.recording = False
+        self.phases = phases
+        self.phase_index = {phase: i for i, phase in enumerate(phases)}
+        self.capacity = capacity
+        self.samples = [array("d", bytes(8 * capacity)) for _ in phases]
+        self.totals = array("d", bytes(8 * capacity))
+        # 1 if the frame redrew the screen, 0 if the compositor skipped it
+        self.redraws = array("b", bytes(capacity))
+        self.frames = 0
+        self.current = [0.0] * len(phases)
+        self.frame_start = 0.0
+        self.last = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+
+    def begin_frame(self):
+        self.recording = self.enabled
+        if not self.recording:
+            return
+        self.frame_start = self.last = time.perf_counter()
+        for i in range(len(self.current)):
+            self.current[i] = 0.0
+
+    def mark(self, phase):
+        """Attributes the time since the previous mark to phase (adds up over repeats)."""
+        if not self.recording:
+            return
+        now = time.perf_counter()
+        self.current[self.phase_index[phase]] += (now - self.last) * 1000.0
+        self.last = now
+
+    def end_frame(self, redrew=True):
+        if not self.recording:
+            return
+        self.recording = False
+        slot = self.frames % self.capacity
+        for i, value in enumerate(self.current):
+            self.samples[i][slot] = value
+        self.totals[slot] = (time.perf_counter() - self.frame_start) * 1000.0
+        self.redraws[slot] = redrew
+        self.frames += 1
+
+    def _ordered(self, buffer):
+        """The recorded values of a ring buffer, oldest first."""
+        if self.frames <= self.capacity:
+            return list(buffer[:self.frames])
+        start = self.frames % self.capacity
+        return list(buffer[start:]) + list(buffer[:start])
+
+    def percentiles(self):
+        """{phase: (p50, p95, p99)} over the buffered frames, plus "frame" for the whole frame."""
+        result = {}
+        columns = list(zip(self.phases, self.samples)) + [("frame", self.totals)]
+        for name, buffer in columns:
+            values = sorted(self._ordered(buffer))
+            if not values:
+                result[name] = (0.0,) * len(PERCENTILES)
+                continue
+            result[name] = tuple(values[min(len(values) - 1, len(values) * p // 100)] for p in PERCENTILES)
+        return result
+
+    def overlay_text(self):
+        lines = ["phase      p50   p95   p99 (ms)"]
+        for name, values in self.percentiles().items():
+            lines.append(f"{name:<9}" + "".join(f"{v:6.2f}" for v in values))
+        return "\n".join(lines)
+
+    def export_csv(self, path):
+        """Writes the buffered per-frame samples, oldest first. Returns the row count."""
+        columns = [self._ordered(buffer) for buffer in self.samples]
+        totals = self._ordered(self.totals)
+        redraws = self._ordered(self.redraws)
+        first_frame = self.frames - len(totals)
+        with open(path, "w", newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow(("frame",) + tuple(self.phases) + ("total", "redrew"))
+            for row, total in enumerate(totals):
+                writer.writerow([first_frame + row] + [f"{column[row]:.4f}" for column in columns]
+                                + [f"{total:.4f}", redraws[row]])
+        return len(totals)
@@ -0,0 +1,587 @@
+"""
+Drawing backends.
+
+Every view (snake, food, walls, particles, menus, HUD) draws through a
+Renderer instead of turtle or Tk directly. The interface is retained: shapes
+and text are created once as items and afterwards moved, recoloured, shown or
+hidden by id, and flush() ends the frame. Shapes that come and go are
+recycled through the renderer's ItemPool (pool.py) rather than deleted. Coordinates are turtle coordinates
+(origin at the centre of the window, y up) in pixels. A renderer also owns the
+window's event loop: key and click handlers, timers and the clock.
+
+- TurtleRenderer: items on the turtle Screen's Tk canvas (the original look).
+- PygameRenderer: a pygame window. Items are kept in a display list; a change
+  marks the rectangles it covers dirty and flush() repaints and blits only
+  those.
+- NullRenderer: draws nothing and runs timers on a virtual clock as fast as
+  they come due, for headless runs and benchmarks.
+"""
+import heapq
+import itertools
+import time
+from simulation import CELL_SIZE
+from pool import ItemPool
+
+RENDERERS = ("turtle", "pygame", "null")
+# Where a text item sits relative to its point, as Turtle.write places it
+ANCHORS = {"left": "sw", "center": "s", "right": "se"}
+# Beyond this many dirty rectangles a frame repaints their bounding box instead
+MAX_DIRTY_RECTS = 64
+
+
+def create_renderer(name, width, height, title="Snake"):
+    """The renderer called name ("turtle", "pygame" or "null") for a width x height window."""
+    if name == "turtle":
+        return TurtleRenderer(width, height, title)
+    if name == "pygame":
+        return PygameRenderer(width, height, title)
+    if name == "null":
+        return NullRenderer(width, height, title)
+    raise ValueError(f"unknown renderer {name!r}, expected one of {', '.join(RENDERERS)}")
+
+
+class Renderer:
+    """
+    Base class for the drawing backends.
+    Shapes are given by their bounding box (x0, y0, x1, y1) with x0 <= x1 and
+    y0 <= y1. Every create call returns an item id for the other calls.
+    """
+    name = None
+
+    def __init__(self, width, height, title="Snake"):
+        self.width = width
+        self.height = height
+        self.frames = 0
+        # Shapes views show and hide over and over are recycled through here
+        self.pool = ItemPool(self)
+
+    # Items
+
+    def rect(self, x0, y0, x1, y1, color, visible=True):
+        """A filled rectangle."""
+        raise NotImplementedError
+
+    def oval(self, x0, y0, x1, y1, color, visible=True):
+        """A filled ellipse inside the box."""
+        raise NotImplementedError
+
+    def line(self, x0, y0, x1, y1, color, visible=True):
+        """A one pixel line."""
+        raise NotImplementedError
+
+    def text(self, x, y, text, color, font, align="center", visible=True):
+        """A line of text with its bottom at y; font is a Tk-style (family, size, weight) tuple."""
+        raise NotImplementedError
+
+    def move(self, item, x0, y0, x1, y1):
+        """Gives a rectangle or oval a new bounding box."""
+        raise NotImplementedError
+
+    def configure(self, item, color=None, text=None, font=None, visible=None):
+        """Changes whichever of the item's colour, text, font and visibility are given."""
+        raise NotImplementedError
+
+    def lower(self, item):
+        """Puts the item below every item that was not lowered (walls go under everything)."""
+        raise NotImplementedError
+
+    def delete(self, item):
+        raise NotImplementedError
+
+    def cell(self, x, y, color, scale=1.0, shape="square", visible=True):
+        """A grid cell sized square (or circle) scaled by scale, centred on (x, y)."""
+        half = CELL_SIZE * scale / 2
+        make = self.oval if shape == "circle" else self.rect
+        return make(x - half, y - half, x + half, y + half, color, visible)
+
+    def move_cell(self, item, x, y, scale=1.0):
+        """Centres a cell item on (x, y), resized to scale."""
+        half = CELL_SIZE * scale / 2
+        self.move(item, x - half, y - half, x + half, y + half)
+
+    # Frame and window
+
+    def background(self, color):
+        raise NotImplementedError
+
+    def title(self, text):
+        pass
+
+    def flush(self):
+        """Ends the frame and shows what changed."""
+        self.frames += 1
+
+    # Events and time
+
+    def on_key(self, key, handler):
+        """Calls handler() when key ("Up", "space", "p", "F3", ...) is pressed."""
+        raise NotImplementedError
+
+    def on_click(self, handler):
+        """Calls handler(x, y) on a mouse click."""
+        raise NotImplementedError
+
+    def after(self, ms, handler):
+        """Calls handler() once after ms milliseconds."""
+        raise NotImplementedError
+
+    def clock(self):
+        """The time in seconds the game loop measures frames with."""
+        return time.perf_counter()
+
+    def run(self):
+        """Runs the event loop until the window is closed."""
+        raise NotImplementedError
+
+    def close(self):
+        """Closes the window (and ends run())."""
+        raise NotImplementedError
+
+
+class TurtleRenderer(Renderer):
+    """Draws on the turtle Screen's Tk canvas. Canvas y grows downwards, so y is flipped."""
+    name = "turtle"
+
+    def __init__(self, width, height, title="Snake"):
+        super().__init__(width, height, title)
+        from turtle import Screen
+        self.screen = Screen()
+        self.screen.setup(width=width, height=height)
+        self.screen.bgcolor("black")
+        self.screen.title(title)
+        self.screen.tracer(0)
+        self.canvas = self.screen.getcanvas()
+        # Shapes take their colour as fill and outline, text and lines as fill only
+        self.outlined = set()
+
+    def _state(self, visible):
+        return "normal" if visible else "hidden"
+
+    def rect(self, x0, y0, x1, y1, color, visible=True):
+        item = self.canvas.create_rectangle(x0, -y1, x1, -y0, fill=color, outline=color,
+                                            state=self._state(visible))
+        self.outlined.add(item)
+        return item
+
+    def oval(self, x0, y0, x1, y1, color, visible=True):
+        item = self.canvas.create_oval(x0, -y1, x1, -y0, fill=color, outline=color,
+                                       state=self._state(visible))
+        self.outlined.add(item)
+        return item
+
+    def line(self, x0, y0, x1, y1, color, visible=True):
+        return self.canvas.create_line(x0, -y0, x1, -y1, fill=color, state=self._state(visible))
+
+    def text(self, x, y, text, color, font, align="center", visible=True):
+        return self.canvas.create_text(x - 1, -y, text=text, fill=color, font=font,
+                                       anchor=ANCHORS[align], state=self._state(visible))
+
+    def move(self, item, x0, y0, x1, y1):
+        self.canvas.coords(item, x0, -y1, x1, -y0)
+
+    def configure(self, item, color=None, text=None, font=None, visible=None):
+        changes = {}
+        if color is not None:
+            changes["fill"] = color
+            if item in self.outlined:
+                changes["outline"] = color
+        if text is not None:
+            changes["text"] = text
+        if font is not None:
+            changes["font"] = font
+        if visible is not None:
+            changes["state"] = self._state(visible)
+        if changes:
+            self.canvas.itemconfigure(item, **changes)
+
+    def lower(self, item):
+        self.canvas.tag_lower(item)
+
+    def delete(self, item):
+        self.canvas.delete(item)
+        self.outlined.discard(item)
+
+    def background(self, color):
+        self.screen.bgcolor(color)
+
+    def title(self, text):
+        self.screen.title(text)
+
+    def flush(self):
+        self.frames += 1
+        self.screen.update()
+
+    def on_key(self, key, handler):
+        self.screen.onkey(handler, key)
+        self.screen.listen()
+
+    def on_click(self, handler):
+        self.screen.onscreenclick(handler)
+
+    def after(self, ms, handler):
+        self.screen.ontimer(handler, ms)
+
+    def run(self):
+        self.screen.mainloop()
+
+    def close(self):
+        self.screen.bye()
+
+
+def merge_rects(rects):
+    """
+    Merges overlapping rectangles into their bounding boxes until none overlap,
+    so nothing is drawn twice (blending text twice would darken it). Too many
+    rectangles collapse into one.
+    """
+    rects = [rect for rect in rects if rect.width and rect.height]
+    if len(rects) > MAX_DIRTY_RECTS:
+        return [rects[0].unionall(rects)]
+    merged = []
+    for rect in rects:
+        index = rect.collidelist(merged)
+        while index >= 0:
+            rect = rect.union(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class PygameItem:
+    """One entry of PygameRenderer's display list."""
+    __slots__ = ("kind", "box", "color", "text", "font", "align", "visible", "rect", "surface")
+
+    def __init__(self, kind, box, color, visible, text=None, font=None, align="center"):
+        self.kind = kind
+        self.box = box
+        self.color = color
+        self.text = text
+        self.font = font
+        self.align = align
+        self.visible = visible
+        self.rect = None
+        self.surface = None
+
+
+class PygameRenderer(Renderer):
+    """
+    Draws into a pygame window with dirty rectangles.
+    Items live in a display list in drawing order, with lowered items (walls)
+    in a list of their own drawn first. Changing a visible item marks its old
+    and new screen rectangles dirty; flush() repaints the background and every
+    item overlapping a dirty rectangle (clipped to it) and pushes just those
+    rectangles to the display.
+    """
+    name = "pygame"
+    KEYS = {"K_UP": "Up", "K_DOWN": "Down", "K_LEFT": "Left", "K_RIGHT": "Right",
+            "K_SPACE": "space", "K_p": "p", "K_F3": "F3"}
+
+    def __init__(self, width, height, title="Snake"):
+        super().__init__(width, height, title)
+        import pygame
+        self.pygame = pygame
+        pygame.display.init()
+        pygame.font.init()
+        self.surface = pygame.display.set_mode((width, height))
+        pygame.display.set_caption(title)
+        self.keys = {getattr(pygame, constant): name for constant, name in self.KEYS.items()}
+        self.cx = width // 2
+        self.cy = height // 2
+        # id -> item, plus the drawing order: lowered items, then the rest
+        self.items = {}
+        self.bottom = {}
+        self.top = {}
+        self.ids = itertools.count(1)
+        self.fonts = {}
+        self.bg = pygame.Color("black")
+        self.dirty = [self.surface.get_rect()]
+        self.key_handlers = {}
+        self.click_handler = None
+        self.timers = []
+        self.sequence = itertools.count()
+        self.running = False
+        self.rects_pushed = 0
+
+    # Items
+
+    def _add(self, item):
+        item_id = next(self.ids)
+        self.items[item_id] = self.top[item_id] = item
+        self._layout(item)
+        if item.visible:
+            self.dirty.append(item.rect)
+        return item_id
+
+    def rect(self, x0, y0, x1, y1, color, visible=True):
+        return self._add(PygameItem("rect", (x0, y0, x1, y1), self.pygame.Color(color), visible))
+
+    def oval(self, x0, y0, x1, y1, color, visible=True):
+        return self._add(PygameItem("oval", (x0, y0, x1, y1), self.pygame.Color(color), visible))
+
+    def line(self, x0, y0, x1, y1, color, visible=True):
+        return self._add(PygameItem("line", (x0, y0, x1, y1), self.pygame.Color(color), visible))
+
+    def text(self, x, y, text, color, font, align="center", visible=True):
+        return self._add(PygameItem("text", (x, y), self.pygame.Color(color), visible, text, font, align))
+
+    def _font(self, font):
+        cached = self.fonts.get(font)
+        if cached is None:
+            family, size, weight = font
+            # Tk sizes are points; at 96 dpi that is 4/3 pixels each
+            cached = self.fonts[font] = self.pygame.font.SysFont(
+                f"{family},couriernew,monospace", round(size * 4 / 3), bold=weight == "bold")
+        return cached
+
+    def _layout(self, item):
+        """Works out the item's screen rectangle (and renders text)."""
+        Rect = self.pygame.Rect
+        if item.kind == "text":
+            item.surface = self._font(item.font).render(item.text, True, item.color)
+            x, y = item.box
+            width, height = item.surface.get_size()
+            left = self.cx + x
+            if item.align == "center":
+                left -= width // 2
+            elif item.align == "right":
+                left -= width
+            item.rect = Rect(left, self.cy - y - height, width, height)
+        elif item.kind == "line":
+            x0, y0, x1, y1 = item.box
+            left, right = sorted((self.cx + x0, self.cx + x1))
+            top, bottom = sorted((self.cy - y0, self.cy - y1))
+            item.rect = Rect(left, top, right - left + 1, bottom - top + 1)
+        else:
+            x0, y0, x1, y1 = item.box
+            item.rect = Rect(round(self.cx + x0), round(self.cy - y1),
+                             max(1, round(x1 - x0)), max(1, round(y1 - y0)))
+
+    def move(self, item, x0, y0, x1, y1):
+        entry = self.items[item]
+        if entry.visible:
+            self.dirty.append(entry.rect)
+        entry.box = (x0, y0, x1, y1)
+        self._layout(entry)
+        if entry.visible:
+            self.dirty.append(entry.rect)
+
+    def configure(self, item, color=None, text=None, font=None, visible=None):
+        entry = self.items[item]
+        was_visible = entry.visible
+        old_rect = entry.rect
+        changed = False
+        if color is not None:
+            color = self.pygame.Color(color)
+            if color != entry.color:
+                entry.color = color
+                changed = True
+        if text is not None and text != entry.text:
+            entry.text = text
+            changed = True
+        if font is not None and font != entry.font:
+            entry.font = font
+            changed = True
+        if visible is not None:
+            entry.visible = visible
+        if changed and entry.kind == "text":
+            self._layout(entry)
+        if was_visible and (changed or not entry.visible):
+            self.dirty.append(old_rect)
+        if entry.visible and (changed or not was_visible):
+            self.dirty.append(entry.rect)
+
+    def lower(self, item):
+        # Lowered items keep their order among themselves; only walls are lowered
+        entry = self.top.pop(item, None)
+        if entry is not None:
+            self.bottom[item] = entry
+            if entry.visible:
+                self.dirty.append(entry.rect)
+
+    def delete(self, item):
+        entry = self.items.pop(item, None)
+        self.top.pop(item, None)
+        self.bottom.pop(item, None)
+        if entry is not None and entry.visible:
+            self.dirty.append(entry.rect)
+
+    # Frame and window
+
+    def background(self, color):
+        color = self.pygame.Color(color)
+        if color != self.bg:
+            self.bg = color
+            self.dirty = [self.surface.get_rect()]
+
+    def title(self, text):
+        self.pygame.display.set_caption(text)
+
+    def _draw(self, entry, area):
+        """Draws an item, clipped to area."""
+        self.surface.set_clip(area)
+        draw = self.pygame.draw
+        if entry.kind == "rect":
+            # fill() mis-clips rectangles that start left of the surface; clip them first
+            self.surface.fill(entry.color, entry.rect.clip(area))
+        elif entry.kind == "oval":
+            draw.ellipse(self.surface, entry.color, entry.rect)
+        elif entry.kind == "text":
+            self.surface.blit(entry.surface, entry.rect)
+        else:
+            x0, y0, x1, y1 = entry.box
+            draw.line(self.surface, entry.color, (self.cx + x0, self.cy - y0), (self.cx + x1, self.cy - y1))
+
+    def flush(self):
+        self.frames += 1
+        dirty = self.dirty
+        if not dirty:
+            return
+        screen = self.surface.get_rect()
+        dirty = merge_rects([rect.clip(screen) for rect in dirty])
+        if not dirty:
+            self.dirty = []
+            return
+        bounds = dirty[0].unionall(dirty)
+        surface = self.surface
+        for rect in dirty:
+            surface.fill(self.bg, rect)
+        for layer in (self.bottom, self.top):
+            for entry in layer.values():
+                if not entry.visible or not entry.rect.colliderect(bounds):
+                    continue
+                for index in entry.rect.collidelistall(dirty):
+                    self._draw(entry, dirty[index])
+        surface.set_clip(None)
+        self.pygame.display.update(dirty)
+        self.rects_pushed += len(dirty)
+        self.dirty = []
+
+    # Events and time
+
+    def on_key(self, key, handler):
+        self.key_handlers[key] = handler
+
+    def on_click(self, handler):
+        self.click_handler = handler
+
+    def after(self, ms, handler):
+        heapq.heappush(self.timers, (time.perf_counter() + ms / 1000.0, next(self.sequence), handler))
+
+    def _handle_events(self):
+        pygame = self.pygame
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                handler = self.key_handlers.get(self.keys.get(event.key))
+                if handler is not None:
+                    handler()
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.click_handler:
+                x, y = event.pos
+                self.click_handler(x - self.cx, self.cy - y)
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self._handle_events()
+            now = time.perf_counter()
+            while self.running and self.timers and self.timers[0][0] <= now:
+                heapq.heappop(self.timers)[2]()
+            # Sleep until the next timer, waking often enough to stay responsive to input
+            wait = self.timers[0][0] - time.perf_counter() if self.timers else 0.01
+            if wait > 0:
+                time.sleep(min(wait, 0.01))
+        self.pygame.display.quit()
+
+    def close(self):
+        self.running = False
+
+
+class NullRenderer(Renderer):
+    """
+    Draws nothing. Items are only counted and keep their visibility, so views
+    can be exercised headless. Timers run on a virtual clock: run() jumps
+    straight to the next due timer, so a game plays as fast as it can step.
+    """
+    name = "null"
+
+    def __init__(self, width=0, height=0, title="Snake"):
+        super().__init__(width, height, title)
+        self.ids = itertools.count(1)
+        # item -> visible
+        self.items = {}
+        self.created = 0
+        self.updates = 0
+        self.bg = "black"
+        self.key_handlers = {}
+        self.click_handler = None
+        self.timers = []
+        self.sequence = itertools.count()
+        self.now = 0.0
+        self.running = False
+
+    def _add(self, visible):
+        item = next(self.ids)
+        self.items[item] = visible
+        self.created += 1
+        return item
+
+    def rect(self, x0, y0, x1, y1, color, visible=True):
+        return self._add(visible)
+
+    def oval(self, x0, y0, x1, y1, color, visible=True):
+        return self._add(visible)
+
+    def line(self, x0, y0, x1, y1, color, visible=True):
+        return self._add(visible)
+
+    def text(self, x, y, text, color, font, align="center", visible=True):
+        return self._add(visible)
+
+    def move(self, item, x0, y0, x1, y1):
+        self.updates += 1
+
+    def configure(self, item, color=None, text=None, font=None, visible=None):
+        self.updates += 1
+        if visible is not None:
+            self.items[item] = visible
+
+    def lower(self, item):
+        pass
+
+    def delete(self, item):
+        self.items.pop(item, None)
+
+    def background(self, color):
+        self.bg = color
+
+    def on_key(self, key, handler):
+        self.key_handlers[key] = handler
+
+    def on_click(self, handler):
+        self.click_handler = handler
+
+    def after(self, ms, handler):
+        heapq.heappush(self.timers, (self.now + ms / 1000.0, next(self.sequence), handler))
+
+    def clock(self):
+        return self.now
+
+    def step(self):
+        """Runs the next due timer, moving the clock to it. Returns False if none is left."""
+        if not self.timers:
+            return False
+        due, _, handler = heapq.heappop(self.timers)
+        self.now = max(self.now, due)
+        handler()
+        return True
+
+    def run(self):
+        """Runs timers until none are left or close() is called."""
+        self.running = True
+        while self.running and self.step():
+            pass
+        self.running = False
+
+    def close(self):
+        self.running = False
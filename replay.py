@@ -0,0 +1,139 @@
+"""
+Deterministic replays.
+
+A game is fully described by its mode, its seed, the arena size and the turns
+taken, keyed by the step they were applied on (see Simulation). Recorder collects these while
+a game is played and produces a small JSON document; simulate() re-runs one
+headlessly at full speed, and verify() checks that the re-run reaches the
+recorded score, length and cause of death.
+
+Usage:
+    python replay.py [replay.json ...]    # defaults to the last game played
+"""
+import json
+import os
+import sys
+from simulation import Simulation, ARENA_LIMIT, UP, DOWN, LEFT, RIGHT
+from storage import atomic_write, DATA_DIR, REPLAY_FILE
+
+# 2: spawn indexes are updated in place on level-up, which changes where food lands
+REPLAY_VERSION = 2
+
+DIRECTION_CODES = {UP: "U", DOWN: "D", LEFT: "L", RIGHT: "R"}
+CODE_DIRECTIONS = {code: direction for direction, code in DIRECTION_CODES.items()}
+
+
+def encode_inputs(inputs):
+    """{step: direction} -> "3R12U..." (steps since the previous input, then the direction)."""
+    parts = []
+    previous = 0
+    for step in sorted(inputs):
+        parts.append(f"{step - previous}{DIRECTION_CODES[inputs[step]]}")
+        previous = step
+    return "".join(parts)
+
+
+def decode_inputs(text):
+    """The inverse of encode_inputs."""
+    inputs = {}
+    step = 0
+    digits = ""
+    for char in text:
+        if char.isdigit():
+            digits += char
+        else:
+            step += int(digits)
+            inputs[step] = CODE_DIRECTIONS[char]
+            digits = ""
+    return inputs
+
+
+class Recorder:
+    """Collects the mode, seed and turns of the game being played."""
+    def __init__(self):
+        self.mode = None
+        self.seed = None
+        self.limit = ARENA_LIMIT
+        self.inputs = {}
+        self.result = None
+
+    def start(self, mode, seed, limit=ARENA_LIMIT):
+        self.mode = mode
+        self.seed = seed
+        self.limit = limit
+        self.inputs = {}
+        self.result = None
+
+    def record(self, step, direction):
+        """Notes the turn passed to Simulation.step for step (1-based)."""
+        self.inputs[step] = direction
+
+    def finish(self, sim):
+        """Stores the outcome the replay must reproduce."""
+        self.result = {
+            "steps": sim.steps,
+            "score": sim.score,
+            "length": len(sim.body),
+            "cause": sim.cause,
+        }
+
+    def to_dict(self):
+        replay = {
+            "version": REPLAY_VERSION,
+            "mode": self.mode,
+            "seed": self.seed,
+            "limit": self.limit,
+            "inputs": encode_inputs(self.inputs),
+        }
+        if self.result is not None:
+            replay.update(self.result)
+        return replay
+
+    def save(self, path):
+        atomic_write(path, json.dumps(self.to_dict()))
+
+
+def load_replay(path):
+    with open(path) as data:
+        replay = json.load(data)
+    if replay.get("version") != REPLAY_VERSION:
+        raise ValueError(f"unsupported replay version: {replay.get('version')}")
+    return replay
+
+
+def simulate(replay, max_steps=None):
+    """Re-runs a replay without rendering. Returns the finished Simulation."""
+    sim = Simulation(replay["mode"], seed=replay["seed"], limit=replay.get("limit", ARENA_LIMIT))
+    inputs = decode_inputs(replay["inputs"])
+    if max_steps is None:
+        max_steps = replay.get("steps")
+    while not sim.is_game_over and (max_steps is None or sim.steps < max_steps):
+        sim.step(inputs.get(sim.steps + 1))
+    return sim
+
+
+def verify(replay):
+    """
+    Returns (ok, mismatches, sim): mismatches maps each recorded field the
+    re-run disagrees on to (recorded, simulated).
+    """
+    sim = simulate(replay)
+    simulated = {"steps": sim.steps, "score": sim.score, "length": len(sim.body), "cause": sim.cause}
+    mismatches = {
+        key: (replay[key], value) for key, value in simulated.items()
+        if key in replay and replay[key] != value
+    }
+    return not mismatches, mismatches, sim
+
+
+if __name__ == "__main__":
+    failed = 0
+    for path in sys.argv[1:] or [os.path.join(DATA_DIR, REPLAY_FILE)]:
+        ok, mismatches, sim = verify(load_replay(path))
+        if ok:
+            print(f"{path}: OK ({sim.mode_name}, score {sim.score}, {sim.steps} steps, {sim.cause})")
+        else:
+            failed += 1
+            details = ", ".join(f"{key} recorded {a} got {b}" for key, (a, b) in mismatches.items())
+            print(f"{path}: MISMATCH ({details})")
+    sys.exit(1 if failed else 0)
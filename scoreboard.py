@@ -1,58 +1,37 @@
-from turtle import Turtle
-import os
-
-import json
+from ui import Label
+from storage import ScoreStore
 
 ALIGNMENT = "center"
 FONT = ("Courier", 24, "bold")
 
-class Scoreboard(Turtle):
-    """Class to manage score and high score display."""
-    def __init__(self):
-        super().__init__()
+class Scoreboard:
+    """
+    Class to manage score and high score display.
+    The HUD lines are retained labels: a score change only updates their text.
+    """
+    def __init__(self, renderer, store=None):
+        self.store = store if store is not None else ScoreStore()
         self.score = 0
         self.high_scores = self.load_high_scores()
         self.current_mode = "Classic"
         self.high_score = self.high_scores.get(self.current_mode, 0)
-        self.color("white")
-        self.penup()
-        self.hideturtle()
-        self.goto(0, 260)
+        self.score_label = Label(renderer, 0, 260, "", "white", FONT, ALIGNMENT)
+        self.game_over_label = Label(renderer, 0, 0, "GAME OVER", "white", FONT, ALIGNMENT)
+        self.high_score_label = Label(renderer, 0, -40, "NEW HIGH SCORE!", "white", ("Courier", 20, "bold"), ALIGNMENT)
+        self.dirty = False
+        # False for games that should not set high scores (e.g. autopilot)
+        self.record_high_scores = True
         self.update_scoreboard()
+        self.score_label.show()
 
     def load_high_scores(self):
         """Loads high scores from a file."""
-        try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            data_path = os.path.join(script_dir, "data.txt")
-            if os.path.exists(data_path):
-                with open(data_path, "r") as data:
-                    content = data.read()
-                    # Try parsing as JSON
-                    try:
-                        result = json.loads(content)
-                        if isinstance(result, dict):
-                            return result
-                        else:
-                            # It's valid JSON but not a dict (likely the old int high score)
-                            return {"Classic": int(result), "Obstacle": 0}
-                    except json.JSONDecodeError:
-                        # Fallback for legacy single integer format (if not valid JSON for some reason)
-                        return {"Classic": int(content), "Obstacle": 0}
-            return {"Classic": 0, "Obstacle": 0}
-        except:
-            return {"Classic": 0, "Obstacle": 0}
+        return self.store.load_high_scores()
 
     def save_high_score(self):
-        """Saves current high score to a file."""
-        try:
-            self.high_scores[self.current_mode] = self.high_score
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            data_path = os.path.join(script_dir, "data.txt")
-            with open(data_path, "w") as data:
-                json.dump(self.high_scores, data)
-        except:
-            pass
+        """Saves current high score in the background."""
+        self.high_scores[self.current_mode] = self.high_score
+        self.store.save_high_scores(self.high_scores)
 
     def set_mode(self, mode_name):
         self.current_mode = mode_name
@@ -61,26 +40,42 @@ class Scoreboard(Turtle):
 
     def update_scoreboard(self):
         """Refresh the score display."""
-        self.clear()
-        self.write(f"Score: {self.score} High Score: {self.high_score}", align=ALIGNMENT, font=FONT)
+        self.score_label.set(text=f"Score: {self.score} High Score: {self.high_score}")
+        self.dirty = False
+
+    def clear(self):
+        """Hide everything the scoreboard shows."""
+        self.score_label.hide()
+        self.game_over_label.hide()
+        self.high_score_label.hide()
 
     def increase_score(self, amount=1):
+        # Redrawn once per frame by refresh(), however many points came in
         self.score += amount
+        self.dirty = True
+
+    def refresh(self):
+        """Redraws the score if it changed since the last frame. Returns True if it did."""
+        if not self.dirty:
+            return False
         self.update_scoreboard()
+        return True
 
     def game_over(self):
-        self.goto(0, 0)
-        self.write("GAME OVER", align=ALIGNMENT, font=FONT)
-        if self.score > self.high_score:
+        # Show any pending points along with the game over text
+        self.refresh()
+        self.game_over_label.show()
+        if self.record_high_scores and self.score > self.high_score:
             self.high_score = self.score
             self.save_high_score()
-            self.goto(0, -40)
-            self.write("NEW HIGH SCORE!", align=ALIGNMENT, font=("Courier", 20, "bold"))
+            self.high_score_label.show()
 
     def reset(self):
-        if self.score > self.high_score:
+        if self.record_high_scores and self.score > self.high_score:
             self.high_score = self.score
             self.save_high_score()
         self.score = 0
-        self.goto(0, 260)  # Reset position to top
-        self.update_scoreboard()
\ No newline at end of file
+        self.game_over_label.hide()
+        self.high_score_label.hide()
+        self.update_scoreboard()
+        self.score_label.show()
\ No newline at end of file
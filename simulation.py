@@ -0,0 +1,550 @@
+"""
+Headless simulation core for the Snake game.
+
+All game state lives here as plain data: the snake body, food, bonus food and
+obstacles are integer grid cells, and the rules (movement, wrap-around, eating,
+levels, speed and score) mirror the turtle game. Nothing in this module touches
+turtle or Tk, so it can be stepped without a display, as fast as Python allows.
+The turtle classes in snake.py, food.py, modes.py and game_engine.py only render
+the state held by a Simulation.
+"""
+import random
+from collections import deque
+
+CELL_SIZE = 20
+
+UP = (0, 1)
+DOWN = (0, -1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+OPPOSITE = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+
+STARTING_CELLS = [(0, 0), (-1, 0), (-2, 0)]
+
+# Cells beyond +/-16 (330px from the centre) are off the board
+ARENA_LIMIT = 16
+# Larger arenas are supported up to 501x501 cells (the view follows the head)
+MAX_ARENA_LIMIT = 250
+MIN_ARENA_LIMIT = 8
+
+# Independent random streams of a game, each seeded from the game seed, so
+# e.g. an extra obstacle draw never shifts where the next food appears
+RNG_STREAMS = ("food", "bonus", "obstacles", "particles")
+
+# Food spawns within +/-14 cells (280px), bonus food within +/-13 (260px);
+# in other arena sizes the same distance from the edge
+FOOD_LIMIT = 14
+BONUS_LIMIT = 13
+FOOD_MARGIN = ARENA_LIMIT - FOOD_LIMIT
+BONUS_MARGIN = ARENA_LIMIT - BONUS_LIMIT
+
+BONUS_LIFETIME_MS = 5000
+
+
+def to_pixels(cell):
+    """Converts a grid cell to turtle screen coordinates."""
+    return cell[0] * CELL_SIZE, cell[1] * CELL_SIZE
+
+
+class SnakeBody:
+    """
+    The snake as a deque of grid cells, head first.
+    occupancy counts the segments on each cell and is updated incrementally by
+    move() and extend(), so head-vs-body checks are a single dict lookup.
+    """
+    def __init__(self):
+        self.cells = deque()
+        self.occupancy = {}
+        self.direction = RIGHT
+        self.reset()
+
+    def reset(self, cells=None):
+        self.cells = deque(STARTING_CELLS if cells is None else cells)
+        self.occupancy = {}
+        for cell in self.cells:
+            self.occupancy[cell] = self.occupancy.get(cell, 0) + 1
+        self.direction = RIGHT
+
+    @property
+    def head(self):
+        return self.cells[0]
+
+    def __len__(self):
+        return len(self.cells)
+
+    def turn(self, direction):
+        """Changes direction unless it would reverse the snake onto itself."""
+        if direction != OPPOSITE[self.direction]:
+            self.direction = direction
+
+    def next_cell(self):
+        x, y = self.cells[0]
+        dx, dy = self.direction
+        return (x + dx, y + dy)
+
+    def move(self, cell):
+        """Moves the head to cell and drops the tail. Returns the old tail cell."""
+        occupancy = self.occupancy
+        tail = self.cells.pop()
+        count = occupancy[tail] - 1
+        if count:
+            occupancy[tail] = count
+        else:
+            del occupancy[tail]
+        self.cells.appendleft(cell)
+        occupancy[cell] = occupancy.get(cell, 0) + 1
+        return tail
+
+    def extend(self):
+        """Grows by one segment, stacked on the tail until the next move."""
+        tail = self.cells[-1]
+        self.cells.append(tail)
+        self.occupancy[tail] += 1
+
+    def hits_itself(self):
+        return self.occupancy[self.cells[0]] > 1
+
+    def occupies(self, cell):
+        return cell in self.occupancy
+
+
+class Arena:
+    """
+    Base class for the board rules of a game mode.
+    Obstacles are a set of cells built once per layout, so a head collision is
+    a single lookup however many blocks the map has.
+    """
+    def __init__(self, limit=ARENA_LIMIT):
+        self.limit = limit
+        self.obstacles = set()
+        # Bumped whenever the layout is rebuilt, so planners can cache per layout
+        self.version = 0
+
+    def setup(self, rng, body):
+        """Builds the starting layout."""
+        self.obstacles.clear()
+        self.version += 1
+
+    def on_level_up(self, level, rng, body):
+        """Returns True if the obstacle layout changed."""
+        return False
+
+    def check_collision(self, cell):
+        """Resolves the cell the head moves into. Returns (cell, cause)."""
+        return cell, None
+
+    def scale(self, value):
+        """Maps a layout coordinate designed for the standard arena onto this one."""
+        return round(value * self.limit / ARENA_LIMIT)
+
+    def in_bounds(self, cell):
+        return -self.limit <= cell[0] <= self.limit and -self.limit <= cell[1] <= self.limit
+
+    def _add_obstacle(self, x, y):
+        self.obstacles.add((x, y))
+
+    def _create_wall_segment(self, c1, c2, c3, horizontal=True):
+        if horizontal:
+            for x in range(c1, c2):
+                self._add_obstacle(x, c3)
+        else:
+            for y in range(c2, c3):
+                self._add_obstacle(c1, y)
+
+
+class ClassicArena(Arena):
+    """
+    Classic rules: walls along the border, wrap-around through the open corners.
+    """
+    def setup(self, rng, body):
+        self.obstacles.clear()
+        self.version += 1
+        # Walls leave the three cells next to each corner open for wrapping
+        end = self.limit - 3
+        # Top and bottom walls sit just past the edge (y=+/-340px)
+        self._create_wall_segment(-end, end + 1, self.limit + 1, True)
+        self._create_wall_segment(-end, end + 1, -self.limit - 1, True)
+        # Left and right walls on the edge column (x=+/-320px)
+        self._create_wall_segment(-self.limit, -end, end + 1, False)
+        self._create_wall_segment(self.limit, -end, end + 1, False)
+
+    def check_collision(self, cell):
+        if cell in self.obstacles:
+            return cell, "wall"
+
+        # Wrap around logic (teleport)
+        x, y = cell
+        if x > self.limit:
+            x = -self.limit
+        elif x < -self.limit:
+            x = self.limit
+        if y > self.limit:
+            y = -self.limit
+        elif y < -self.limit:
+            y = self.limit
+        return (x, y), None
+
+
+class ObstacleArena(Arena):
+    """
+    Obstacle rules: solid edges and inner walls that change every level.
+    """
+    def __init__(self, limit=ARENA_LIMIT):
+        super().__init__(limit)
+        self.safe_cells = None
+
+    def setup(self, rng, body):
+        # Initial setup uses level 1 layout
+        self.generate_obstacles(1, rng, ())
+
+    def on_level_up(self, level, rng, body):
+        self.generate_obstacles(level, rng, body.occupancy)
+        return True
+
+    def generate_obstacles(self, level, rng, snake_cells):
+        """snake_cells is any container of cells (set, dict) to keep clear."""
+        self.obstacles.clear()
+        self.version += 1
+        # Blocks are never placed on or next to the snake
+        self.safe_cells = snake_cells
+
+        layout_type = level % 4
+        # Layouts are drawn for the standard arena and scaled to this one
+        s = self.scale
+        box, arm, gap = s(10), s(7), s(2)
+
+        if layout_type == 1:
+            # Level 1, 5, 9...: The Classic Box
+            self._create_wall_segment(-box, -gap, box, True)
+            self._create_wall_segment(gap, box + 1, box, True)
+            self._create_wall_segment(-box, -gap, -box, True)
+            self._create_wall_segment(gap, box + 1, -box, True)
+            self._create_wall_segment(-box, -box, -gap, False)
+            self._create_wall_segment(-box, gap, box + 1, False)
+            self._create_wall_segment(box, -box, -gap, False)
+            self._create_wall_segment(box, gap, box + 1, False)
+
+        elif layout_type == 2:
+            # Level 2, 6, 10...: The Cross
+            self._create_wall_segment(-arm, arm + 1, 0, True)
+            self._create_wall_segment(0, -arm, arm + 1, False)
+
+        elif layout_type == 3:
+            # Level 3, 7, 11...: Four Pillars
+            for x in [-arm, arm]:
+                for y in [-arm, arm]:
+                    self._add_obstacle(x, y)
+            for x in [-arm, arm]:
+                for y in [-arm, arm]:
+                    self._add_obstacle(x + 1, y)
+                    self._add_obstacle(x - 1, y)
+                    self._add_obstacle(x, y + 1)
+                    self._add_obstacle(x, y - 1)
+
+        else:  # layout_type == 0
+            # Level 4, 8, 12...: Random Scattered Blocks (20 per standard arena area)
+            spread = self.limit - FOOD_MARGIN
+            for _ in range(round(20 * (self.limit / ARENA_LIMIT) ** 2)):
+                self._add_obstacle(rng.randint(-spread, spread), rng.randint(-spread, spread))
+
+        self.safe_cells = None
+
+    def _add_obstacle(self, x, y):
+        safe = self.safe_cells
+        if safe:
+            # Same cell or orthogonally adjacent (within 25px)
+            if ((x, y) in safe or (x + 1, y) in safe or (x - 1, y) in safe
+                    or (x, y + 1) in safe or (x, y - 1) in safe):
+                return
+        super()._add_obstacle(x, y)
+
+    def check_collision(self, cell):
+        if not self.in_bounds(cell):
+            return cell, "wall"
+        if cell in self.obstacles:
+            return cell, "obstacle"
+        return cell, None
+
+
+class FreeCellIndex:
+    """
+    The cells of a square spawn region that food may use: not on the snake and
+    not within one cell (40px) of an obstacle. Free cells are kept in a list
+    plus a cell -> position map, so picking one uniformly at random, freeing
+    one and claiming one are all O(1).
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.cells = []
+        self.positions = {}
+        self.blocked = set()
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.positions
+
+    @staticmethod
+    def blocked_cells(obstacles):
+        blocked = set()
+        for ox, oy in obstacles:
+            for x in range(ox - 1, ox + 2):
+                for y in range(oy - 1, oy + 2):
+                    blocked.add((x, y))
+        return blocked
+
+    def rebuild(self, obstacles, occupied):
+        """Recomputes the index from scratch (new game)."""
+        limit = self.limit
+        self.blocked = self.blocked_cells(obstacles)
+
+        self.cells = []
+        self.positions = {}
+        for x in range(-limit, limit + 1):
+            for y in range(-limit, limit + 1):
+                cell = (x, y)
+                if cell not in self.blocked and cell not in occupied:
+                    self.positions[cell] = len(self.cells)
+                    self.cells.append(cell)
+
+    def relayout(self, obstacles, occupied):
+        """
+        Updates the index for a new obstacle layout while the snake stays put.
+        Only cells around the old and new obstacles are touched, so the cost
+        does not grow with the size of the arena.
+        """
+        blocked = self.blocked_cells(obstacles)
+        freed = self.blocked - blocked
+        for cell in blocked - self.blocked:
+            self.claim(cell)
+        self.blocked = blocked
+        # Sorted so the resulting order (and so every later pick) is reproducible
+        for cell in sorted(freed):
+            if cell not in occupied:
+                self.release(cell)
+
+    def release(self, cell):
+        """Marks cell free again (no-op if it is blocked or outside the region)."""
+        if cell in self.positions or cell in self.blocked:
+            return
+        if -self.limit <= cell[0] <= self.limit and -self.limit <= cell[1] <= self.limit:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def claim(self, cell):
+        """Removes cell from the free set by swapping in the last entry."""
+        position = self.positions.pop(cell, None)
+        if position is None:
+            return
+        last = self.cells.pop()
+        if position < len(self.cells):
+            self.cells[position] = last
+            self.positions[last] = position
+
+    def choice(self, rng):
+        """A uniformly random free cell, or None if the region is full."""
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+
+class StepResult:
+    """What happened during a single Simulation.step."""
+    __slots__ = ("head", "tail", "grew", "ate_food", "food_points", "ate_bonus",
+                 "bonus_points", "bonus_spawned", "bonus_expired", "slow_motion_ended",
+                 "leveled_up", "obstacles_changed", "food_spawned", "game_over", "cause")
+
+    def __init__(self):
+        self.head = None
+        self.tail = None
+        self.grew = False
+        self.ate_food = None
+        self.food_points = 0
+        self.ate_bonus = None
+        self.bonus_points = 0
+        self.bonus_spawned = False
+        self.bonus_expired = False
+        self.slow_motion_ended = False
+        self.leveled_up = False
+        self.obstacles_changed = False
+        # Food placed again after the board had no room for it
+        self.food_spawned = False
+        self.game_over = False
+        self.cause = None
+
+
+class Simulation:
+    """
+    A complete game of Snake as plain data. Call step() once per snake move.
+    Time is measured in game milliseconds: each step advances the clock by the
+    delay the turtle game would wait before that move.
+
+    Every game has a seed. A game is fully determined by its mode, its seed,
+    the arena size and the action passed to each step, which is what replay.py
+    records.
+    """
+    def __init__(self, mode="Classic", seed=None, limit=ARENA_LIMIT):
+        if not MIN_ARENA_LIMIT <= limit <= MAX_ARENA_LIMIT:
+            raise ValueError(f"arena limit must be between {MIN_ARENA_LIMIT} and {MAX_ARENA_LIMIT}")
+        # Draws the seed of each game reset without an explicit one
+        self.seeds = random.Random(seed)
+        self.streams = {name: random.Random() for name in RNG_STREAMS}
+        self.arenas = {
+            "Classic": ClassicArena(limit),
+            "Obstacle": ObstacleArena(limit)
+        }
+        self.mode_name = mode
+        self.arena = self.arenas[mode]
+        self.body = SnakeBody()
+        self.free_food = FreeCellIndex(limit - FOOD_MARGIN)
+        self.free_bonus = FreeCellIndex(limit - BONUS_MARGIN)
+
+        self.base_speed = 100
+        self.speed_step = 4
+        self.min_speed = 30
+
+        self.reset(seed)
+
+    def set_mode(self, mode_name):
+        if mode_name in self.arenas:
+            self.mode_name = mode_name
+            self.arena = self.arenas[mode_name]
+
+    def reset(self, seed=None):
+        """Starts a new game in the current mode, with a fresh seed unless one is given."""
+        if seed is None:
+            seed = self.seeds.getrandbits(32)
+        self.seed = seed
+        for name, stream in self.streams.items():
+            stream.seed(f"{seed}/{name}")
+        self.body.reset()
+        self.score = 0
+        self.level = 1
+        self.foods_eaten = 0
+        self.speed_level = 0
+        self.slow_motion_active = False
+        self.time_ms = 0
+        self.steps = 0
+        self.is_game_over = False
+        self.cause = None
+
+        self.arena.setup(self.streams["obstacles"], self.body)
+        self.rebuild_free_cells()
+        self.refresh_food()
+        self.bonus = None
+        self.bonus_spawn_ms = 0
+
+    def get_current_delay(self):
+        base_delay = max(self.min_speed, self.base_speed - self.speed_level * self.speed_step)
+
+        if self.slow_motion_active:
+            return base_delay + 50
+
+        return base_delay
+
+    def rebuild_free_cells(self):
+        """Recomputes the spawn indexes from scratch (new game)."""
+        self.free_food.rebuild(self.arena.obstacles, self.body.occupancy)
+        self.free_bonus.rebuild(self.arena.obstacles, self.body.occupancy)
+
+    def relayout_free_cells(self):
+        """Updates the spawn indexes for a new obstacle layout."""
+        self.free_food.relayout(self.arena.obstacles, self.body.occupancy)
+        self.free_bonus.relayout(self.arena.obstacles, self.body.occupancy)
+
+    def refresh_food(self):
+        """Moves the food to a random free cell (None if the board is full)."""
+        self.food = self.free_food.choice(self.streams["food"])
+
+    def spawn_bonus(self):
+        self.bonus = self.free_bonus.choice(self.streams["bonus"])
+        self.bonus_spawn_ms = self.time_ms
+
+    def level_up(self, result):
+        """Increases the level and regenerates obstacles if the mode has them."""
+        self.level += 1
+        result.leveled_up = True
+
+        if self.arena.on_level_up(self.level, self.streams["obstacles"], self.body):
+            result.obstacles_changed = True
+            # Make sure food is not inside a new obstacle
+            self.relayout_free_cells()
+            self.refresh_food()
+            self.bonus = None
+
+    def step(self, action=None):
+        """Advances the game by one snake move. action is a direction or None."""
+        result = StepResult()
+        if self.is_game_over:
+            result.game_over = True
+            result.cause = self.cause
+            return result
+
+        if action is not None:
+            self.body.turn(action)
+
+        self.time_ms += self.get_current_delay()
+        self.steps += 1
+
+        if self.bonus is not None and self.time_ms - self.bonus_spawn_ms >= BONUS_LIFETIME_MS:
+            self.bonus = None
+            result.bonus_expired = True
+
+        cell, cause = self.arena.check_collision(self.body.next_cell())
+        tail = self.body.move(cell)
+        if not self.body.occupies(tail):
+            self.free_food.release(tail)
+            self.free_bonus.release(tail)
+        self.free_food.claim(cell)
+        self.free_bonus.claim(cell)
+        result.tail = tail
+        result.head = cell
+
+        if cause is None:
+            if cell == self.food:
+                result.ate_food = cell
+                self.refresh_food()
+                self.body.extend()
+                result.grew = True
+
+                # Score depends on level
+                result.food_points = self.level
+                self.score += result.food_points
+
+                self.foods_eaten += 1
+                self.speed_level += 1
+
+                if self.foods_eaten % 5 == 0:
+                    self.level_up(result)
+
+                if self.slow_motion_active:
+                    self.slow_motion_active = False
+                    result.slow_motion_ended = True
+
+                if self.foods_eaten % 5 == 0 and self.bonus is None:
+                    self.spawn_bonus()
+                    result.bonus_spawned = self.bonus is not None
+
+            if self.bonus is not None and cell == self.bonus:
+                result.ate_bonus = cell
+                self.bonus = None
+                result.bonus_points = 5 * self.level
+                self.score += result.bonus_points
+                self.slow_motion_active = True
+
+            if self.body.hits_itself():
+                cause = "self"
+
+        if cause is None and self.food is None:
+            # The food region was full; the tail may have freed a cell since
+            self.refresh_food()
+            result.food_spawned = self.food is not None
+
+        if cause is not None:
+            self.is_game_over = True
+            self.cause = cause
+            result.game_over = True
+            result.cause = cause
+
+        return result
@@ -1,89 +1,147 @@
-from turtle import Turtle
+from collections import deque
+import time
+from simulation import SnakeBody, UP, DOWN, LEFT, RIGHT, OPPOSITE
+from camera import Camera
 
-STARTING_POSITIONS = [(0,0), (-20,0), (-40,0)]
-MOVE_DISTANCE = 20
+# Turns buffered ahead of the snake, one consumed per step
+MAX_QUEUED_TURNS = 3
 
 class Snake:
-    """Class respresenting the snake, its movement, and growth."""
-    def __init__(self):
+    """
+    Class respresenting the snake, its movement, and growth.
+    Only body cells inside the camera's view have a renderer item, one per cell
+    however many segments are stacked on it. A step moves a single item: the
+    freed tail's, which becomes the new head. When the camera recentres,
+    redraw() lays out the visible body again. Items come from and go back to
+    the renderer's shared pool.
+    """
+    def __init__(self, renderer, body=None, camera=None):
+        self.renderer = renderer
+        self.pool = renderer.pool
+        # The body (grid cells and direction) is owned by the simulation
+        self.body = body if body is not None else SnakeBody()
+        self.camera = camera if camera is not None else Camera()
         self.body_color = "white"
-        self.segments = []
+        # cell -> renderer item for the visible part of the body
+        self.segments = {}
+        self.head = None
+        self.head_cell = None
+        self.tail_cell = None
         self.create_snake()
-        self.head = self.segments[0]
 
     def create_snake(self):
-        """Creates the initial snake body."""
-        for position in STARTING_POSITIONS:
-            self.add_segment(position)
-        self.head = self.segments[0]
+        """Creates the snake's segments from the current body."""
+        self.redraw()
+        # (direction, perf_counter time of the key press)
+        self.turn_queue = deque()
+        self.last_turn_latency_ms = None
+
+    def redraw(self):
+        """Lays out every visible body cell from scratch (after the camera moved)."""
+        self.pool.release_all(self.segments.values())
+        self.segments.clear()
+        for cell in self._visible_cells():
+            self.segments[cell] = self._take_item(cell)
+        self.head_cell = self.body.head
+        self.tail_cell = self.body.cells[-1]
         self._update_head_visual()
-        self.can_turn = True
+
+    def _visible_cells(self):
+        occupancy = self.body.occupancy
+        camera = self.camera
+        # Walk whichever is smaller: the body or the view
+        if len(occupancy) <= camera.area:
+            return [cell for cell in occupancy if camera.contains(cell)]
+        return [cell for cell in camera.visible_cells() if cell in occupancy]
+
+    def _take_item(self, cell):
+        # Revert to "square" for classic look as requested.
+        return self.pool.acquire_cell(*self.camera.to_pixels(cell), self.body_color)
 
     def set_color(self, color):
         self.body_color = color
-        for seg in self.segments:
-            seg.color(color)
+        for seg in self.segments.values():
+            self.renderer.configure(seg, color=color)
         # Keep head distinct? Maybe just slightly darker/lighter?
         # For now, uniform color is fine or we can update head separately.
         self._update_head_visual()
 
-    def add_segment(self, position):
-        # Revert to "square" for classic look as requested.
-        new_segment = Turtle("square")
-        new_segment.color(self.body_color)
-        new_segment.penup()
-        new_segment.goto(position)
-        self.segments.append(new_segment)
-
     def _update_head_visual(self):
         # Make head distinct but keep classic square shape
-        head = self.segments[0]
-        head.color("#bdc3c7") # Light grey, subtle difference
+        self.head = self.segments.get(self.body.head)
+        if self.head is not None:
+            self.renderer.configure(self.head, color="#bdc3c7") # Light grey, subtle difference
         # No size change to keep grid alignment perfect
         # head.shapesize(stretch_wid=1.2, stretch_len=1.2)
 
+    def set_visible(self, visible):
+        """Shows or hides the drawn segments without giving them up (e.g. to blink)."""
+        for seg in self.segments.values():
+            self.renderer.configure(seg, visible=visible)
+
     def hide(self):
-        for seg in self.segments:
-            seg.goto(1000, 1000)
-            seg.hideturtle()
+        self.pool.release_all(self.segments.values())
         self.segments.clear()
+        self.head = None
 
     def reset(self):
         self.hide()
         self.create_snake()
-        self.head = self.segments[0]
-        self.can_turn = True
 
     def move(self):
-        """Moves the snake forward by one step."""
-        for seg_num in range(len(self.segments) - 1, 0, -1):
-            new_x = self.segments[seg_num - 1].xcor()
-            new_y = self.segments[seg_num - 1].ycor()
-            self.segments[seg_num].goto(new_x, new_y)
-        
-        self.head.forward(MOVE_DISTANCE)
-        self.can_turn = True
+        """Follows one simulation step: the freed tail's item jumps to the new head."""
+        body = self.body
+        segments = self.segments
+        freed = None
+        if self.tail_cell not in body.occupancy:
+            freed = segments.pop(self.tail_cell, None)
+
+        if self.head is not None and self.head_cell in segments:
+            self.renderer.configure(self.head, color=self.body_color)
+
+        head = body.head
+        if head not in segments and self.camera.contains(head):
+            if freed is None:
+                segments[head] = self._take_item(head)
+            else:
+                self.renderer.move_cell(freed, *self.camera.to_pixels(head))
+                segments[head] = freed
+                freed = None
+        if freed is not None:
+            self.pool.release(freed)
+
+        self.head_cell = head
+        self.tail_cell = body.cells[-1]
+        self._update_head_visual()
+
+    def take_turn(self):
+        """
+        Returns the next queued direction for this step, if any, and records
+        how long it waited since the key press in last_turn_latency_ms.
+        """
+        if not self.turn_queue:
+            self.last_turn_latency_ms = None
+            return None
+        direction, pressed_at = self.turn_queue.popleft()
+        self.last_turn_latency_ms = (time.perf_counter() - pressed_at) * 1000.0
+        return direction
+
+    def _turn(self, direction):
+        # Filter against the direction the snake will have after the queued turns
+        current = self.turn_queue[-1][0] if self.turn_queue else self.body.direction
+        if direction == current or direction == OPPOSITE[current]:
+            return
+        if len(self.turn_queue) < MAX_QUEUED_TURNS:
+            self.turn_queue.append((direction, time.perf_counter()))
 
     def up(self):
-        if self.can_turn and self.head.heading() != 270:
-            self.head.setheading(90)
-            self.can_turn = False
+        self._turn(UP)
 
     def down(self):
-        if self.can_turn and self.head.heading() != 90:
-            self.head.setheading(270)
-            self.can_turn = False
+        self._turn(DOWN)
 
     def left(self):
-        if self.can_turn and self.head.heading() != 0:
-            self.head.setheading(180)
-            self.can_turn = False
+        self._turn(LEFT)
 
     def right(self):
-        if self.can_turn and self.head.heading() != 180:
-            self.head.setheading(0)
-            self.can_turn = False
-
-    def extend(self):
-        """Adds a new segment to the snake."""
-        self.add_segment(self.segments[-1].position())
+        self._turn(RIGHT)
@@ -0,0 +1,194 @@
+"""
+Score persistence: high scores and run history.
+
+Writes never happen on the UI thread. ScoreStore hands them to a background
+writer thread. High scores are rewritten atomically (temp file + rename), so a
+crash mid-write leaves the previous data.txt intact. Every finished run is
+appended to a local SQLite database indexed for per-mode top-N and
+recent-runs queries, and the replay of the latest run is kept next to it.
+"""
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+HIGH_SCORE_FILE = "data.txt"
+RUN_HISTORY_FILE = "runs.db"
+REPLAY_FILE = "last_replay.json"
+
+
+def default_high_scores():
+    return {"Classic": 0, "Obstacle": 0}
+
+
+def load_high_scores(path):
+    """Reads high scores, accepting the JSON dict, JSON int and legacy plain-integer formats."""
+    try:
+        if os.path.exists(path):
+            with open(path, "r") as data:
+                content = data.read()
+                # Try parsing as JSON
+                try:
+                    result = json.loads(content)
+                    if isinstance(result, dict):
+                        return result
+                    else:
+                        # It's valid JSON but not a dict (likely the old int high score)
+                        return {"Classic": int(result), "Obstacle": 0}
+                except json.JSONDecodeError:
+                    # Fallback for legacy single integer format (if not valid JSON for some reason)
+                    return {"Classic": int(content), "Obstacle": 0}
+        return default_high_scores()
+    except (OSError, ValueError, TypeError):
+        return default_high_scores()
+
+
+def atomic_write(path, text):
+    """Writes text to path via a synced temp file in the same directory and a rename."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w") as temp:
+            temp.write(text)
+            temp.flush()
+            os.fsync(temp.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class RunHistory:
+    """Append-only SQLite log of finished runs."""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            mode TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            duration_ms INTEGER NOT NULL,
+            timestamp REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS runs_by_mode_score ON runs (mode, score DESC);
+        CREATE INDEX IF NOT EXISTS runs_by_time ON runs (timestamp DESC);
+    """
+    COLUMNS = ("mode", "score", "level", "length", "duration_ms", "timestamp")
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(self.SCHEMA)
+        return connection
+
+    def append(self, connection, run):
+        with connection:
+            connection.execute(
+                "INSERT INTO runs (mode, score, level, length, duration_ms, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                [run[column] for column in self.COLUMNS])
+
+    def top(self, mode, limit=10):
+        """The best runs for a mode, highest score first."""
+        return self._query("SELECT mode, score, level, length, duration_ms, timestamp FROM runs "
+                           "WHERE mode = ? ORDER BY score DESC LIMIT ?", (mode, limit))
+
+    def recent(self, limit=10):
+        """The latest runs across all modes, newest first."""
+        return self._query("SELECT mode, score, level, length, duration_ms, timestamp FROM runs "
+                           "ORDER BY timestamp DESC LIMIT ?", (limit,))
+
+    def _query(self, sql, params):
+        if not os.path.exists(self.path):
+            return []
+        connection = self.connect()
+        try:
+            return [dict(zip(self.COLUMNS, row)) for row in connection.execute(sql, params)]
+        finally:
+            connection.close()
+
+
+class ScoreStore:
+    """Loads scores synchronously and writes them on a background thread."""
+    def __init__(self, directory=DATA_DIR):
+        self.high_score_path = os.path.join(directory, HIGH_SCORE_FILE)
+        self.history = RunHistory(os.path.join(directory, RUN_HISTORY_FILE))
+        self.replay_path = os.path.join(directory, REPLAY_FILE)
+        self.errors = 0
+        self.last_error = None
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+        self.thread.start()
+
+    def load_high_scores(self):
+        return load_high_scores(self.high_score_path)
+
+    def save_high_scores(self, high_scores):
+        self.queue.put(("high_scores", dict(high_scores)))
+
+    def record_run(self, mode, score, level, length, duration_ms, timestamp=None):
+        run = {
+            "mode": mode,
+            "score": score,
+            "level": level,
+            "length": length,
+            "duration_ms": int(duration_ms),
+            "timestamp": time.time() if timestamp is None else timestamp,
+        }
+        self.queue.put(("run", run))
+
+    def save_replay(self, replay):
+        """Overwrites the last replay with replay (a dict from replay.Recorder)."""
+        self.queue.put(("replay", dict(replay)))
+
+    def top_runs(self, mode, limit=10):
+        return self.history.top(mode, limit)
+
+    def recent_runs(self, limit=10):
+        return self.history.recent(limit)
+
+    def flush(self):
+        """Blocks until every queued write has been handled."""
+        self.queue.join()
+
+    def close(self):
+        """Finishes pending writes and stops the writer thread."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _run(self):
+        connection = None
+        try:
+            while True:
+                task = self.queue.get()
+                try:
+                    if task is None:
+                        return
+                    kind, payload = task
+                    if kind == "high_scores":
+                        atomic_write(self.high_score_path, json.dumps(payload))
+                    elif kind == "replay":
+                        atomic_write(self.replay_path, json.dumps(payload))
+                    else:
+                        if connection is None:
+                            connection = self.history.connect()
+                        self.history.append(connection, payload)
+                except (OSError, sqlite3.Error) as error:
+                    # Never take the game down over a failed save
+                    self.errors += 1
+                    self.last_error = error
+                finally:
+                    self.queue.task_done()
+        finally:
+            if connection is not None:
+                connection.close()
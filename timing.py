@@ -0,0 +1,104 @@
+"""
+Drift-free fixed-timestep scheduling for the game loop.
+
+FrameClock measures real elapsed time with time.perf_counter instead of assuming
+each timer callback took exactly its nominal interval. Simulation steps are
+taken whenever a step's delay has accumulated (catching up after slow frames,
+with a bounded number of steps per frame), and the next ontimer delay is sized
+to land on the next step, so the step rate follows the speed curve exactly
+rather than in multiples of the frame interval.
+"""
+import csv
+import math
+import time
+
+FRAME_MS = 20
+MAX_CATCHUP_STEPS = 5
+
+
+class FrameClock:
+    """Tracks accumulated real time and hands it out as fixed-size steps."""
+    def __init__(self, frame_ms=FRAME_MS, max_catchup_steps=MAX_CATCHUP_STEPS, clock=time.perf_counter):
+        self.frame_ms = frame_ms
+        self.max_catchup_steps = max_catchup_steps
+        self.clock = clock
+        self.last = clock()
+        self.accumulator = 0.0
+        self.frame_steps = 0
+        self.dropped_ms = 0.0
+
+    def start(self):
+        """Restarts the clock with nothing accumulated."""
+        self.last = self.clock()
+        self.accumulator = 0.0
+        self.frame_steps = 0
+
+    def tick(self):
+        """Starts a frame. Returns the real milliseconds since the previous frame."""
+        now = self.clock()
+        elapsed_ms = (now - self.last) * 1000.0
+        self.last = now
+        self.accumulator += elapsed_ms
+        self.frame_steps = 0
+        return elapsed_ms
+
+    def skip(self):
+        """Lets time pass without accumulating it (e.g. while paused)."""
+        self.last = self.clock()
+        self.frame_steps = 0
+
+    def consume(self, delay_ms):
+        """
+        Returns True if a step of delay_ms is due, and takes it off the
+        accumulator. After max_catchup_steps in one frame the remaining
+        backlog is dropped so a long stall cannot trigger a burst of moves.
+        """
+        if self.accumulator < delay_ms:
+            return False
+        if self.frame_steps >= self.max_catchup_steps:
+            backlog = self.accumulator - self.accumulator % delay_ms
+            self.dropped_ms += backlog
+            self.accumulator -= backlog
+            return False
+        self.accumulator -= delay_ms
+        self.frame_steps += 1
+        return True
+
+    def next_delay(self, delay_ms):
+        """Whole milliseconds to wait before the next frame: until the next step, at most one frame."""
+        remaining = delay_ms - self.accumulator - (self.clock() - self.last) * 1000.0
+        return max(1, min(self.frame_ms, int(math.ceil(remaining))))
+
+
+class LatencyStats:
+    """Count, mean and max of latency samples (ms), grouped by a key such as the step delay."""
+    def __init__(self):
+        self.samples = {}
+
+    def record(self, key, latency_ms):
+        count, total, worst = self.samples.get(key, (0, 0.0, 0.0))
+        self.samples[key] = (count + 1, total + latency_ms, max(worst, latency_ms))
+
+    def summary(self):
+        """{key: {"count", "mean_ms", "max_ms"}}, sorted by key."""
+        return {
+            key: {"count": count, "mean_ms": total / count, "max_ms": worst}
+            for key, (count, total, worst) in sorted(self.samples.items())
+        }
+
+    def report(self, key_name="delay_ms"):
+        """The summary as a text table, one row per key."""
+        lines = [f"{key_name:>9} {'count':>6} {'mean_ms':>8} {'max_ms':>8}"]
+        for key, row in self.summary().items():
+            lines.append(f"{key:>9} {row['count']:>6} {row['mean_ms']:8.2f} {row['max_ms']:8.2f}")
+        return "\n".join(lines)
+
+    def export_csv(self, path, key_name="delay_ms"):
+        """Writes the summary, one row per key. Returns the row count."""
+        summary = self.summary()
+        with open(path, "w", newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow((key_name, "count", "mean_ms", "max_ms"))
+            for key, row in summary.items():
+                writer.writerow((key, row["count"], f"{row['mean_ms']:.4f}", f"{row['max_ms']:.4f}"))
+        return len(summary)
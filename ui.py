@@ -0,0 +1,130 @@
+"""
+Retained-mode UI for menus, the game over screen and the HUD.
+
+Labels and buttons are created once as renderer items and afterwards only
+have their text, colour or visibility changed. Buttons carry their own hit
+boxes, so click handling is derived from the same definitions that draw them.
+Coordinates are turtle coordinates (y up).
+"""
+
+
+class Widget:
+    """Base class: a group of renderer items shown and hidden together."""
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.items = []
+        self.visible = False
+
+    def show(self):
+        if not self.visible:
+            self.visible = True
+            self._apply_state()
+
+    def hide(self):
+        if self.visible:
+            self.visible = False
+            self._apply_state()
+
+    def _apply_state(self):
+        for item in self.items:
+            self.renderer.configure(item, visible=self.visible)
+
+
+class Label(Widget):
+    """A line of text, drawn the way Turtle.write places it."""
+    def __init__(self, renderer, x, y, text, color, font, align="center"):
+        super().__init__(renderer)
+        self.text = text
+        self.color = color
+        self.font = font
+        self.item = renderer.text(x, y, text, color, font, align, visible=False)
+        self.items.append(self.item)
+
+    def set(self, text=None, color=None, font=None):
+        """Updates only what changed. Returns True if the item was touched."""
+        changes = {}
+        if text is not None and text != self.text:
+            self.text = changes["text"] = text
+        if color is not None and color != self.color:
+            self.color = changes["color"] = color
+        if font is not None and font != self.font:
+            self.font = changes["font"] = font
+        if changes:
+            self.renderer.configure(self.item, **changes)
+        return bool(changes)
+
+
+class Button(Widget):
+    """A filled rectangle with a centred label (e.g. START GAME)."""
+    def __init__(self, renderer, x, y, label, color, text_color, action, w=160, h=50):
+        super().__init__(renderer)
+        self.action = action
+        self.box = (x - w / 2, y - h / 2, x + w / 2, y + h / 2)
+        self.items.append(renderer.rect(*self.box, color, visible=False))
+        self.label = Label(renderer, x, y - 12, label, text_color, ("Courier", 20, "bold"))
+        self.items.append(self.label.item)
+
+    def contains(self, x, y):
+        x0, y0, x1, y1 = self.box
+        return x0 <= x <= x1 and y0 <= y <= y1
+
+
+class TextButton(Widget):
+    """A selectable text option (e.g. a mode), underlined while selected."""
+    def __init__(self, renderer, x, y, label, action, w=100, h=30,
+                 color="#2ecc71", idle_color="#7f8c8d"):
+        super().__init__(renderer)
+        self.action = action
+        self.colors = (idle_color, color)
+        self.selected = False
+        # Hit box reaches a little above the text baseline
+        self.box = (x - w / 2, y - 10, x + w / 2, y - 10 + h)
+        self.label = Label(renderer, x, y, label, idle_color, ("Courier", 16, "normal"))
+        self.underline = renderer.line(x - 40, y - 5, x + 40, y - 5, color, visible=False)
+        self.items.append(self.label.item)
+
+    def select(self, selected):
+        if selected == self.selected:
+            return
+        self.selected = selected
+        self.label.set(color=self.colors[selected],
+                       font=("Courier", 16, "bold" if selected else "normal"))
+        self._apply_state()
+
+    def _apply_state(self):
+        super()._apply_state()
+        self.renderer.configure(self.underline, visible=self.visible and self.selected)
+
+    def contains(self, x, y):
+        x0, y0, x1, y1 = self.box
+        return x0 <= x <= x1 and y0 <= y <= y1
+
+
+class Panel:
+    """A screen's worth of widgets: shown, hidden and hit-tested together."""
+    def __init__(self):
+        self.widgets = []
+        self.visible = False
+
+    def add(self, widget):
+        self.widgets.append(widget)
+        return widget
+
+    def show(self):
+        self.visible = True
+        for widget in self.widgets:
+            widget.show()
+
+    def hide(self):
+        self.visible = False
+        for widget in self.widgets:
+            widget.hide()
+
+    def hit(self, x, y):
+        """Returns the clickable widget under (x, y), or None."""
+        if not self.visible:
+            return None
+        for widget in self.widgets:
+            if hasattr(widget, "contains") and widget.contains(x, y):
+                return widget
+        return None
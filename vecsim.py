@@ -0,0 +1,425 @@
+"""
+Vectorized simulation of many games in lockstep (requires numpy).
+
+BatchSimulation holds N independent games as numpy arrays: each snake is a ring
+buffer of cell indexes with a per-cell occupancy count, and obstacles and spawn
+exclusion zones are per-game bitmaps. One call to step() advances every game
+still running by one move: turning, the game clock, bonus expiry, collisions
+(Classic wrap-around and walls, Obstacle solid edges and blocks), eating,
+growth, score, level and speed all happen as array operations. Food and bonus
+placement picks a uniformly random free cell per game with one cumulative sum
+over the spawn masks of the games that need it. Only an Obstacle level-up
+drops to Python, regenerating that game's layout with ObstacleArena and its
+own "obstacles" random stream, exactly as Simulation does.
+
+The rules match Simulation.step. Spawn positions come from a numpy generator
+rather than Simulation's streams, so verify() checks equivalence by replaying
+each game's actions in a Simulation fed with the same spawns.
+
+Usage:
+    python vecsim.py --games 4096 --steps 2000
+"""
+import argparse
+import random
+import time
+from collections import deque
+from simulation import (Simulation, ClassicArena, ObstacleArena, STARTING_CELLS, ARENA_LIMIT,
+                        FOOD_MARGIN, BONUS_MARGIN, BONUS_LIFETIME_MS, UP, DOWN, LEFT, RIGHT)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Direction ids used in the arrays, and their opposites
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+OPPOSITE_IDS = (1, 0, 3, 2)
+NO_TURN = -1
+
+CAUSES = (None, "wall", "obstacle", "self")
+WALL, OBSTACLE, SELF = 1, 2, 3
+
+
+class BatchSimulation:
+    """N games of one mode, stepped together."""
+    def __init__(self, mode, games, seed=0, limit=ARENA_LIMIT, record_spawns=False):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("BatchSimulation needs numpy (pip install numpy)")
+        self.mode = mode
+        self.games = games
+        self.seed = seed
+        self.limit = limit
+        self.rng = np.random.default_rng(seed)
+        self.record_spawns = record_spawns
+
+        # The grid has a one-cell margin so walls just past the edge (Classic) fit
+        self.offset = limit + 1
+        self.side = 2 * self.offset + 1
+        cells = self.side * self.side
+        self.capacity = cells + 2
+        xs, ys = np.divmod(np.arange(cells), self.side)
+        xs -= self.offset
+        ys -= self.offset
+        self.cell_x = xs
+        self.cell_y = ys
+        food_limit = limit - FOOD_MARGIN
+        bonus_limit = limit - BONUS_MARGIN
+        self.food_region = (np.abs(xs) <= food_limit) & (np.abs(ys) <= food_limit)
+        self.bonus_region = (np.abs(xs) <= bonus_limit) & (np.abs(ys) <= bonus_limit)
+        self.dx = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+        self.dy = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+        self.opposite = np.array(OPPOSITE_IDS, dtype=np.int8)
+
+        self.base_speed = 100
+        self.speed_step = 4
+        self.min_speed = 30
+        self.reset()
+
+    def index(self, x, y):
+        return (x + self.offset) * self.side + (y + self.offset)
+
+    def cell(self, index):
+        return (int(self.cell_x[index]), int(self.cell_y[index]))
+
+    def reset(self):
+        n = self.games
+        cells = self.side * self.side
+        self.body = np.zeros((n, self.capacity), dtype=np.int32)
+        self.occupancy = np.zeros((n, cells), dtype=np.int16)
+        start = [self.index(x, y) for x, y in reversed(STARTING_CELLS)]
+        self.body[:, :len(start)] = start
+        self.occupancy[:, start] = 1
+        self.head_pos = np.full(n, len(start) - 1, dtype=np.int64)
+        self.length = np.full(n, len(start), dtype=np.int64)
+        self.head_x = np.full(n, STARTING_CELLS[0][0], dtype=np.int32)
+        self.head_y = np.full(n, STARTING_CELLS[0][1], dtype=np.int32)
+        self.direction = np.full(n, DIRECTIONS.index(RIGHT), dtype=np.int8)
+
+        self.score = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.foods_eaten = np.zeros(n, dtype=np.int64)
+        self.speed_level = np.zeros(n, dtype=np.int64)
+        self.slow_motion = np.zeros(n, dtype=bool)
+        self.time_ms = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.alive = np.ones(n, dtype=bool)
+        self.cause = np.zeros(n, dtype=np.int8)
+        self.bonus = np.full(n, -1, dtype=np.int64)
+        self.bonus_spawn_ms = np.zeros(n, dtype=np.int64)
+
+        # Obstacle layouts: per game, built with the same arena code and streams as Simulation
+        self.arenas = None
+        self.obstacles = np.zeros((n, cells), dtype=bool)
+        if self.mode == "Classic":
+            arena = ClassicArena(self.limit)
+            arena.setup(None, None)
+            self._set_layout(slice(None), arena.obstacles)
+        else:
+            self.arenas = [ObstacleArena(self.limit) for _ in range(n)]
+            self.obstacle_rngs = [random.Random(f"{self.seed + i}/obstacles") for i in range(n)]
+            for arena in self.arenas:
+                arena.generate_obstacles(1, None, ())
+            self._set_layout(slice(None), self.arenas[0].obstacles)
+        self.blocked = self._dilate(self.obstacles)
+
+        self.spawns = [deque() for _ in range(n)] if self.record_spawns else None
+        everyone = np.arange(n)
+        self.food = np.full(n, -1, dtype=np.int64)
+        self.food[everyone] = self._choose_free(everyone, self.food_region)
+
+    def _set_layout(self, rows, obstacles):
+        self.obstacles[rows] = False
+        indexes = [self.index(x, y) for x, y in obstacles
+                   if abs(x) <= self.offset and abs(y) <= self.offset]
+        self.obstacles[rows, indexes] = True
+
+    def _dilate(self, obstacles):
+        """Cells within one cell (3x3) of an obstacle, per game."""
+        grid = obstacles.reshape(-1, self.side, self.side)
+        padded = np.pad(grid, ((0, 0), (1, 1), (1, 1)))
+        blocked = np.zeros_like(grid)
+        for ox in range(3):
+            for oy in range(3):
+                blocked |= padded[:, ox:ox + self.side, oy:oy + self.side]
+        return blocked.reshape(obstacles.shape)
+
+    def _choose_free(self, rows, region):
+        """A uniformly random free spawn cell in region for each game in rows (-1 if full)."""
+        if len(rows) == 0:
+            return np.zeros(0, dtype=np.int64)
+        free = region & ~self.blocked[rows] & (self.occupancy[rows] == 0)
+        counts = free.sum(axis=1)
+        picks = (self.rng.random(len(rows)) * counts).astype(np.int64)
+        totals = np.cumsum(free, axis=1)
+        chosen = np.argmax(totals > picks[:, None], axis=1)
+        chosen[counts == 0] = -1
+        if self.spawns is not None:
+            for row, index in zip(rows.tolist(), chosen.tolist()):
+                self.spawns[row].append(None if index < 0 else self.cell(index))
+        return chosen
+
+    def delays(self, rows):
+        base = np.maximum(self.min_speed, self.base_speed - self.speed_level[rows] * self.speed_step)
+        return base + 50 * self.slow_motion[rows]
+
+    def step(self, actions=None):
+        """
+        Advances every running game by one move. actions is an array of
+        direction ids (NO_TURN to keep going). Returns the number of games stepped.
+        """
+        rows = np.flatnonzero(self.alive)
+        if len(rows) == 0:
+            return 0
+
+        if actions is not None:
+            turn = actions[rows]
+            valid = (turn >= 0) & (turn != self.opposite[self.direction[rows]])
+            self.direction[rows[valid]] = turn[valid]
+
+        self.time_ms[rows] += self.delays(rows)
+        self.steps[rows] += 1
+
+        expired = (self.bonus[rows] >= 0) & (self.time_ms[rows] - self.bonus_spawn_ms[rows] >= BONUS_LIFETIME_MS)
+        self.bonus[rows[expired]] = -1
+
+        direction = self.direction[rows]
+        nx = self.head_x[rows] + self.dx[direction]
+        ny = self.head_y[rows] + self.dy[direction]
+        cause = np.zeros(len(rows), dtype=np.int8)
+        limit = self.limit
+        if self.mode == "Classic":
+            cause[self.obstacles[rows, self.index(nx, ny)]] = WALL
+            nx = np.where(nx > limit, -limit, np.where(nx < -limit, limit, nx))
+            ny = np.where(ny > limit, -limit, np.where(ny < -limit, limit, ny))
+        else:
+            outside = (np.abs(nx) > limit) | (np.abs(ny) > limit)
+            inside = ~outside
+            hit = np.zeros(len(rows), dtype=bool)
+            hit[inside] = self.obstacles[rows[inside], self.index(nx[inside], ny[inside])]
+            cause[hit] = OBSTACLE
+            cause[outside] = WALL
+
+        # Games that hit a wall end here; the rest move
+        moving = cause == 0
+        rows_m = rows[moving]
+        nx, ny = nx[moving], ny[moving]
+        cell = self.index(nx, ny)
+        tail_pos = (self.head_pos[rows_m] - self.length[rows_m] + 1) % self.capacity
+        tail = self.body[rows_m, tail_pos]
+        self.occupancy[rows_m, tail] -= 1
+        self.head_pos[rows_m] = (self.head_pos[rows_m] + 1) % self.capacity
+        self.body[rows_m, self.head_pos[rows_m]] = cell
+        self.occupancy[rows_m, cell] += 1
+        self.head_x[rows_m] = nx
+        self.head_y[rows_m] = ny
+
+        eating = self.food[rows_m] == cell
+        if eating.any():
+            self._eat(rows_m[eating], tail_pos[eating])
+
+        bonus_hit = (self.bonus[rows_m] >= 0) & (self.bonus[rows_m] == cell)
+        if bonus_hit.any():
+            takers = rows_m[bonus_hit]
+            self.bonus[takers] = -1
+            self.score[takers] += 5 * self.level[takers]
+            self.slow_motion[takers] = True
+
+        crashed = self.occupancy[rows_m, cell] > 1
+        cause[np.flatnonzero(moving)[crashed]] = SELF
+
+        dead = cause != 0
+        self.alive[rows[dead]] = False
+        self.cause[rows[dead]] = cause[dead]
+
+        # Games whose food region was full try again now that tails have moved
+        hungry = rows[~dead & (self.food[rows] < 0)]
+        if len(hungry):
+            self.food[hungry] = self._choose_free(hungry, self.food_region)
+        return len(rows)
+
+    def _eat(self, eaters, freed_pos):
+        """freed_pos is the ring slot each eater's old tail was just dropped from."""
+        self.food[eaters] = self._choose_free(eaters, self.food_region)
+        # Grow: a second segment stacked on the tail, in the slot just freed
+        tail = self.body[eaters, (freed_pos + 1) % self.capacity]
+        self.body[eaters, freed_pos] = tail
+        self.length[eaters] += 1
+        self.occupancy[eaters, tail] += 1
+
+        self.score[eaters] += self.level[eaters]
+        self.foods_eaten[eaters] += 1
+        self.speed_level[eaters] += 1
+
+        leveled = eaters[self.foods_eaten[eaters] % 5 == 0]
+        if len(leveled):
+            self.level[leveled] += 1
+            if self.arenas is not None:
+                for row in leveled.tolist():
+                    self._regenerate(row)
+                self.blocked[leveled] = self._dilate(self.obstacles[leveled])
+                self.food[leveled] = self._choose_free(leveled, self.food_region)
+                self.bonus[leveled] = -1
+
+        self.slow_motion[eaters] = False
+
+        spawning = leveled[self.bonus[leveled] < 0]
+        if len(spawning):
+            self.bonus[spawning] = self._choose_free(spawning, self.bonus_region)
+            self.bonus_spawn_ms[spawning] = self.time_ms[spawning]
+
+    def body_cells(self, row):
+        """The cells of one game's snake, head first."""
+        positions = (self.head_pos[row] - np.arange(self.length[row])) % self.capacity
+        return [self.cell(index) for index in self.body[row, positions].tolist()]
+
+    def _regenerate(self, row):
+        """New obstacle layout for one game after a level-up, as ObstacleArena.on_level_up does."""
+        arena = self.arenas[row]
+        occupied = set(self.body_cells(row))
+        arena.generate_obstacles(int(self.level[row]), self.obstacle_rngs[row], occupied)
+        self._set_layout(row, arena.obstacles)
+
+    def result(self, row):
+        return {
+            "score": int(self.score[row]),
+            "length": int(self.length[row]),
+            "level": int(self.level[row]),
+            "steps": int(self.steps[row]),
+            "time_ms": int(self.time_ms[row]),
+            "cause": CAUSES[self.cause[row]],
+        }
+
+
+def random_actions(rng, games, turn_chance=0.2):
+    """A random turn for about turn_chance of the games, NO_TURN for the rest."""
+    actions = rng.integers(0, len(DIRECTIONS), games).astype(np.int8)
+    actions[rng.random(games) >= turn_chance] = NO_TURN
+    return actions
+
+
+def greedy_actions(batch, rng, noise=0.5):
+    """
+    For every game, the move that gets closest to the food without dying at
+    once (ties broken at random), like batch.greedy_policy but for all games.
+    """
+    rows = np.arange(batch.games)
+    nx = batch.head_x[:, None] + batch.dx[None, :]
+    ny = batch.head_y[:, None] + batch.dy[None, :]
+    unsafe = batch.obstacles[rows[:, None], batch.index(nx, ny)]
+    limit = batch.limit
+    if batch.mode == "Classic":
+        nx = np.where(nx > limit, -limit, np.where(nx < -limit, limit, nx))
+        ny = np.where(ny > limit, -limit, np.where(ny < -limit, limit, ny))
+    else:
+        unsafe |= (np.abs(nx) > limit) | (np.abs(ny) > limit)
+    cells = batch.index(nx, ny)
+    occupied = batch.occupancy[rows[:, None], cells]
+    tail = batch.body[rows, (batch.head_pos - batch.length + 1) % batch.capacity]
+    food = batch.food
+    # The tail moves out of the way unless the snake is about to grow
+    vacated = (cells == tail[:, None]) & (occupied == 1) & (cells != food[:, None])
+    unsafe |= (occupied > 0) & ~vacated
+    unsafe[rows, batch.opposite[batch.direction]] = True
+    fx = np.where(food >= 0, batch.cell_x[food], batch.head_x)
+    fy = np.where(food >= 0, batch.cell_y[food], batch.head_y)
+    cost = np.abs(nx - fx[:, None]) + np.abs(ny - fy[:, None]) + noise * rng.random(nx.shape)
+    cost[unsafe] += 10000
+    return np.argmin(cost, axis=1).astype(np.int8)
+
+
+POLICIES = {"random": lambda batch, rng: random_actions(rng, batch.games), "greedy": greedy_actions}
+
+
+def run(mode, games, steps, seed=0, record=False, policy="greedy"):
+    """
+    Plays games bot games for up to steps batch steps.
+    Returns (batch, actions per step or None, game-steps per second).
+    """
+    batch = BatchSimulation(mode, games, seed, record_spawns=record)
+    rng = np.random.default_rng(seed + 1)
+    choose = POLICIES[policy]
+    log = [] if record else None
+    game_steps = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        actions = choose(batch, rng)
+        if record:
+            log.append(actions)
+        stepped = batch.step(actions)
+        if not stepped:
+            break
+        game_steps += stepped
+    elapsed = time.perf_counter() - start
+    return batch, log, game_steps / elapsed if elapsed else 0.0
+
+
+def replay_game(batch, row, log):
+    """Plays one game of a recorded batch through Simulation, fed the batch's spawns."""
+    sim = Simulation(batch.mode, seed=batch.seed + row, limit=batch.limit)
+    spawns = deque(batch.spawns[row])
+    sim.food = spawns.popleft()
+
+    def refresh_food():
+        sim.food = spawns.popleft()
+
+    def spawn_bonus():
+        sim.bonus = spawns.popleft()
+        sim.bonus_spawn_ms = sim.time_ms
+
+    sim.refresh_food = refresh_food
+    sim.spawn_bonus = spawn_bonus
+    for actions in log:
+        if sim.is_game_over:
+            break
+        action = int(actions[row])
+        sim.step(DIRECTIONS[action] if action != NO_TURN else None)
+    return sim
+
+
+def verify(mode, games=200, steps=3000, seed=0, policy="greedy"):
+    """
+    Runs a recorded batch and replays every game through Simulation.
+    Returns the rows whose outcome differs (empty if the rules match).
+    """
+    batch, log, _ = run(mode, games, steps, seed, record=True, policy=policy)
+    mismatched = []
+    for row in range(games):
+        sim = replay_game(batch, row, log)
+        expected = {
+            "score": sim.score,
+            "length": len(sim.body),
+            "level": sim.level,
+            "steps": sim.steps,
+            "time_ms": sim.time_ms,
+            "cause": sim.cause,
+        }
+        if expected != batch.result(row) or (batch.alive[row] and sim.body.head != batch.body_cells(row)[0]):
+            mismatched.append(row)
+    return mismatched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Step many games in lockstep with numpy.")
+    parser.add_argument("--games", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=2000, help="batch steps (games that die stop early)")
+    parser.add_argument("--modes", nargs="+", default=["Classic", "Obstacle"], choices=["Classic", "Obstacle"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--policy", default="greedy", choices=sorted(POLICIES))
+    parser.add_argument("--verify", type=int, default=100, metavar="GAMES",
+                        help="games to check against Simulation first (0 to skip)")
+    args = parser.parse_args(argv)
+
+    for mode in args.modes:
+        if args.verify:
+            mismatched = verify(mode, args.verify, args.steps, args.seed, args.policy)
+            status = "OK" if not mismatched else f"{len(mismatched)} games differ (e.g. #{mismatched[0]})"
+            print(f"{mode}: rules checked against Simulation on {args.verify} games: {status}")
+        batch, _, rate = run(mode, args.games, args.steps, args.seed, policy=args.policy)
+        print(f"{mode}: {args.games} games, {rate:,.0f} game-steps/s, "
+              f"mean score {batch.score.mean():.2f}, {int(batch.alive.sum())} still running")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Two-player versus rules on top of the simulation core.
+
+Two snakes share one arena and one food. Both move on every step; a snake that
+runs into a wall, an obstacle, itself or the other snake loses the round, and
+if both crash on the same step (heads meeting on one cell included) the round
+is a draw. Food eaten by either snake scores for that snake and counts towards
+the shared level and speed, so Obstacle mode regenerates its layout every five
+foods as in the single-player game, keeping clear of both snakes. There is no
+bonus food.
+
+Like Simulation, a round is fully determined by its mode, seed, arena size and
+the two players' actions. Nothing here touches the network or a display:
+netplay.py runs a VersusSimulation on the host and mirrors it on the client.
+"""
+import random
+from simulation import (SnakeBody, ClassicArena, ObstacleArena, FreeCellIndex,
+                        UP, DOWN, LEFT, RIGHT, OPPOSITE, ARENA_LIMIT, MIN_ARENA_LIMIT,
+                        MAX_ARENA_LIMIT, RNG_STREAMS, FOOD_MARGIN)
+
+PLAYERS = 2
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+CAUSES = ("wall", "obstacle", "self", "snake", "head-on")
+
+
+def start_cells(player, limit):
+    """Player 0 starts above the centre heading right, player 1 below it heading left."""
+    row = limit // 2
+    if player == 0:
+        return [(0, row), (-1, row), (-2, row)], RIGHT
+    return [(0, -row), (1, -row), (2, -row)], LEFT
+
+
+class VersusStepResult:
+    """What happened during a single VersusSimulation.step, per player where it matters."""
+    __slots__ = ("heads", "tails", "grew", "ate_food", "leveled_up", "obstacles_changed",
+                 "food_spawned", "game_over", "causes", "winner")
+
+    def __init__(self):
+        self.heads = [None] * PLAYERS
+        self.tails = [None] * PLAYERS
+        self.grew = [False] * PLAYERS
+        self.ate_food = None
+        self.leveled_up = False
+        self.obstacles_changed = False
+        # Food placed again after the board had no room for it
+        self.food_spawned = False
+        self.game_over = False
+        self.causes = [None] * PLAYERS
+        # Player who won the round, None for a draw
+        self.winner = None
+
+
+class VersusSimulation:
+    """
+    A round of two-player Snake as plain data. Call step() once per move with
+    both players' actions. Speed, levels and obstacle layouts follow the
+    single-player rules, driven by the foods eaten by both snakes together.
+    """
+    def __init__(self, mode="Classic", seed=None, limit=ARENA_LIMIT):
+        if not MIN_ARENA_LIMIT <= limit <= MAX_ARENA_LIMIT:
+            raise ValueError(f"arena limit must be between {MIN_ARENA_LIMIT} and {MAX_ARENA_LIMIT}")
+        self.seeds = random.Random(seed)
+        self.streams = {name: random.Random() for name in RNG_STREAMS}
+        self.arenas = {
+            "Classic": ClassicArena(limit),
+            "Obstacle": ObstacleArena(limit)
+        }
+        self.mode_name = mode
+        self.arena = self.arenas[mode]
+        self.bodies = [SnakeBody() for _ in range(PLAYERS)]
+        self.free_food = FreeCellIndex(limit - FOOD_MARGIN)
+
+        self.base_speed = 100
+        self.speed_step = 4
+        self.min_speed = 30
+
+        self.reset(seed)
+
+    def set_mode(self, mode_name):
+        if mode_name in self.arenas:
+            self.mode_name = mode_name
+            self.arena = self.arenas[mode_name]
+
+    def reset(self, seed=None):
+        """Starts a new round, with a fresh seed unless one is given."""
+        if seed is None:
+            seed = self.seeds.getrandbits(32)
+        self.seed = seed
+        for name, stream in self.streams.items():
+            stream.seed(f"{seed}/{name}")
+        for player, body in enumerate(self.bodies):
+            cells, direction = start_cells(player, self.arena.limit)
+            body.reset(cells)
+            body.direction = direction
+        self.scores = [0] * PLAYERS
+        self.level = 1
+        self.foods_eaten = 0
+        self.speed_level = 0
+        self.time_ms = 0
+        self.steps = 0
+        self.is_game_over = False
+        self.causes = [None] * PLAYERS
+        self.winner = None
+
+        self.arena.setup(self.streams["obstacles"], self)
+        self.free_food.rebuild(self.arena.obstacles, self.occupancy)
+        self.refresh_food()
+
+    @property
+    def occupancy(self):
+        """Cells covered by either snake, so arenas and spawn indexes treat both as one body."""
+        cells = dict(self.bodies[0].occupancy)
+        for body in self.bodies[1:]:
+            cells.update(body.occupancy)
+        return cells
+
+    def get_current_delay(self):
+        return max(self.min_speed, self.base_speed - self.speed_level * self.speed_step)
+
+    def refresh_food(self):
+        self.food = self.free_food.choice(self.streams["food"])
+
+    def level_up(self, result):
+        self.level += 1
+        result.leveled_up = True
+        if self.arena.on_level_up(self.level, self.streams["obstacles"], self):
+            result.obstacles_changed = True
+            self.free_food.relayout(self.arena.obstacles, self.occupancy)
+            self.refresh_food()
+
+    def step(self, actions=(None, None)):
+        """Advances the round by one move of both snakes. actions holds a direction or None per player."""
+        result = VersusStepResult()
+        if self.is_game_over:
+            result.game_over = True
+            result.causes = list(self.causes)
+            result.winner = self.winner
+            return result
+
+        bodies = self.bodies
+        for body, action in zip(bodies, actions):
+            if action is not None:
+                body.turn(action)
+
+        self.time_ms += self.get_current_delay()
+        self.steps += 1
+
+        causes = result.causes
+        heads = result.heads
+        for player, body in enumerate(bodies):
+            heads[player], causes[player] = self.arena.check_collision(body.next_cell())
+            result.tails[player] = body.move(heads[player])
+        # A tail cell is free again only if neither snake still covers it
+        for tail in result.tails:
+            if not any(body.occupies(tail) for body in bodies):
+                self.free_food.release(tail)
+        for head in heads:
+            self.free_food.claim(head)
+
+        for player, body in enumerate(bodies):
+            if causes[player] is None and heads[player] == self.food:
+                result.ate_food = self.food
+                self.refresh_food()
+                body.extend()
+                result.grew[player] = True
+                self.scores[player] += self.level
+                self.foods_eaten += 1
+                self.speed_level += 1
+                if self.foods_eaten % 5 == 0:
+                    self.level_up(result)
+
+        for player, body in enumerate(bodies):
+            if causes[player] is not None:
+                continue
+            if heads[0] == heads[1]:
+                causes[player] = "head-on"
+            elif body.hits_itself():
+                causes[player] = "self"
+            elif any(other.occupies(heads[player]) for other in bodies if other is not body):
+                causes[player] = "snake"
+
+        survivors = [player for player, cause in enumerate(causes) if cause is None]
+        if len(survivors) == PLAYERS and self.food is None:
+            # The food region was full; the tails may have freed a cell since
+            self.refresh_food()
+            result.food_spawned = self.food is not None
+        if len(survivors) < PLAYERS:
+            self.is_game_over = True
+            self.causes = list(causes)
+            self.winner = survivors[0] if len(survivors) == 1 else None
+            result.game_over = True
+            result.winner = self.winner
+
+        return result
+
+
+def greedy_turn(sim, player, rng):
+    """
+    A simple bot: the move closest to the food that does not crash at once.
+    Returns a new direction, or None to keep going. Works on a mirror of the
+    round as well as on the host's simulation.
+    """
+    body = sim.bodies[player]
+    head = body.head
+    options = [d for d in DIRECTIONS if d != OPPOSITE[body.direction]]
+    target = sim.food if sim.food is not None else head
+    # Cells another head could reach next step risk a head-on crash
+    contested = set()
+    for other in sim.bodies:
+        if other is not body:
+            ox, oy = other.head
+            contested.update(((ox + 1, oy), (ox - 1, oy), (ox, oy + 1), (ox, oy - 1)))
+
+    def score(d):
+        cell = (head[0] + d[0], head[1] + d[1])
+        return (cell in contested, abs(cell[0] - target[0]) + abs(cell[1] - target[1]), rng.random())
+
+    options.sort(key=score)
+    for direction in options:
+        cell, cause = sim.arena.check_collision((head[0] + direction[0], head[1] + direction[1]))
+        if cause is not None:
+            continue
+        # A tail moves out of the way unless it is stacked (the snake just grew)
+        if any(other.occupancy.get(cell, 0) > (1 if cell == other.cells[-1] else 0) for other in sim.bodies):
+            continue
+        return None if direction == body.direction else direction
+    return None